@@ -35,7 +35,7 @@ configure_grub() {
     fi
 
     if [[ -d /etc/default/grub.d ]]; then
-        echo "GRUB_CMDLINE_LINUX_DEFAULT=\"\$GRUB_CMDLINE_LINUX_DEFAULT crashkernel=${CRASHKERNEL_VALUE}\"" > "/etc/default/grub.d/${kdump_grub_file}"
+        echo "GRUB_CMDLINE_LINUX_DEFAULT=\"\$GRUB_CMDLINE_LINUX_DEFAULT crashkernel=${CRASHKERNEL_VALUE}\"" | "${SKYHOOK_DIR}/skyhook_dir/grub_coordinator.sh" write "${kdump_grub_file}"
     else
         local grub_file="/etc/default/grub"
         if grep -q "crashkernel=" "$grub_file"; then
@@ -52,21 +52,8 @@ update_grub_config() {
         return
     fi
 
-    if command -v update-grub &> /dev/null; then
-        update-grub
-    elif command -v grub2-mkconfig &> /dev/null; then
-        local grub_cfg="/boot/grub2/grub.cfg"
-        if [[ -d /sys/firmware/efi ]]; then
-            local efi_dir="/boot/efi/EFI"
-            local distro_dir
-            distro_dir=$(ls "$efi_dir" | head -n1)
-            grub_cfg="${efi_dir}/${distro_dir}/grub.cfg"
-        fi
-        grub2-mkconfig -o "$grub_cfg"
-    else
-        echo "ERROR: could not detect grub update command."
-        exit 1
-    fi
+    # Skips the regeneration when the GRUB inputs haven't changed since the last one
+    "${SKYHOOK_DIR}/skyhook_dir/grub_coordinator.sh" update
 }
 
 copy_kdump_config() {
@@ -0,0 +1,174 @@
+#!/bin/bash
+
+# SPDX-FileCopyrightText: Copyright (c) 2026 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: Apache-2.0
+#
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Shared GRUB drop-in coordinator.
+#
+# NOTE: identical copies of this script ship in tuning, kdump, nvidia-setup and
+#       nvidia-tuned (profiles/plugins). Keep them in sync (make check-shared-scripts).
+#
+# Regenerating grub.cfg takes many seconds on nodes with several kernels, so packages
+# write their drop-ins through this script and then ask for a single regeneration.
+# The regeneration only happens when the effective GRUB inputs (/etc/default/grub,
+# grub.d drop-ins, /etc/grub.d scripts, installed kernels) changed since the last one
+# done by any package on the node.
+#
+# Usage:
+#   grub_coordinator.sh write <name> [mode]  Write stdin to /etc/default/grub.d/<name> atomically
+#                                            with an octal mode (default 644); the file is left
+#                                            untouched if the content is the same
+#   grub_coordinator.sh remove <name>        Remove /etc/default/grub.d/<name>
+#   grub_coordinator.sh update [--force]     Regenerate grub.cfg if the inputs changed
+#   grub_coordinator.sh pending              Exit 0 if the inputs changed since the last regeneration
+#
+# Environment:
+#   GRUB_D_DIR       drop-in directory (default: /etc/default/grub.d)
+#   GRUB_STAMP_FILE  hash of the inputs at the last regeneration
+#                    (default: /var/lib/skyhook-packages/grub/inputs.sha256)
+
+set -e
+
+if [ ${SET_X:-0} -eq 1 ]; then
+set -x
+fi
+
+GRUB_D_DIR=${GRUB_D_DIR:-/etc/default/grub.d}
+GRUB_STAMP_FILE=${GRUB_STAMP_FILE:-/var/lib/skyhook-packages/grub/inputs.sha256}
+
+# Work out the regeneration command and the grub.cfg it writes
+# Sets GRUB_CMD (array) and GRUB_CFG
+detect_grub_command() {
+    if command -v update-grub &> /dev/null; then
+        GRUB_CMD=(update-grub)
+        GRUB_CFG=/boot/grub/grub.cfg
+    elif command -v grub2-mkconfig &> /dev/null; then
+        GRUB_CFG=/boot/grub2/grub.cfg
+        if [[ -d /sys/firmware/efi ]]; then
+            local efi_dir="/boot/efi/EFI"
+            local distro_dir
+            distro_dir=$(ls "$efi_dir" | head -n1)
+            GRUB_CFG="${efi_dir}/${distro_dir}/grub.cfg"
+        fi
+        GRUB_CMD=(grub2-mkconfig -o "$GRUB_CFG")
+    elif command -v grub-mkconfig &> /dev/null; then
+        GRUB_CFG=/boot/grub/grub.cfg
+        GRUB_CMD=(grub-mkconfig -o "$GRUB_CFG")
+    else
+        echo "ERROR: could not detect grub update command."
+        exit 1
+    fi
+}
+
+# Hash everything grub-mkconfig reads to build grub.cfg
+# /etc/tuned/bootcmdline is included because tuned drop-ins source it
+inputs_hash() {
+    local f
+    {
+        for f in /etc/default/grub "$GRUB_D_DIR"/*.cfg /etc/grub.d/* /etc/tuned/bootcmdline; do
+            [ -f "$f" ] || continue
+            # The executable bit decides whether an /etc/grub.d script runs
+            echo "== $f $(stat -c %a "$f")"
+            cat "$f"
+        done
+        echo "== kernels"
+        ls -1 /boot 2>/dev/null | grep -E '^(vmlinu[xz]|Image|initrd|initramfs)' || true
+        echo "== command ${GRUB_CMD[*]}"
+    } | sha256sum | cut -f 1 -d ' '
+}
+
+# Serialize regenerations between packages running at the same time
+lock() {
+    mkdir -p "$(dirname "$GRUB_STAMP_FILE")"
+    if command -v flock &> /dev/null; then
+        exec 9> "${GRUB_STAMP_FILE}.lock"
+        flock 9
+    fi
+}
+
+write_dropin() {
+    local name=$1
+    local mode=${2:-644}
+    local target="${GRUB_D_DIR}/${name}"
+    mkdir -p "$GRUB_D_DIR"
+    local tmp
+    tmp=$(mktemp "${GRUB_D_DIR}/.${name}.XXXXXX")
+    cat > "$tmp"
+    if [ -f "$target" ] && cmp -s "$tmp" "$target"; then
+        rm -f "$tmp"
+        chmod "$mode" "$target"
+        echo "GRUB drop-in unchanged: $target"
+        return 0
+    fi
+    chmod "$mode" "$tmp"
+    mv -f "$tmp" "$target"
+    echo "Wrote GRUB drop-in: $target"
+}
+
+remove_dropin() {
+    local target="${GRUB_D_DIR}/$1"
+    if [ -f "$target" ]; then
+        rm -f "$target"
+        echo "Removed GRUB drop-in: $target"
+    fi
+}
+
+is_pending() {
+    local current=$1
+    [ -f "$GRUB_CFG" ] || return 0
+    [ -f "$GRUB_STAMP_FILE" ] || return 0
+    [ "$(cat "$GRUB_STAMP_FILE")" != "$current" ]
+}
+
+update_grub() {
+    local force=false
+    [ "${1:-}" = "--force" ] && force=true
+    detect_grub_command
+    lock
+    local before
+    before=$(inputs_hash)
+    if [ "$force" = "false" ] && ! is_pending "$before"; then
+        echo "GRUB inputs unchanged since last regeneration, skipping ${GRUB_CMD[*]}"
+        return 0
+    fi
+    echo "Regenerating ${GRUB_CFG}"
+    "${GRUB_CMD[@]}"
+    echo "$before" > "${GRUB_STAMP_FILE}.tmp"
+    mv -f "${GRUB_STAMP_FILE}.tmp" "$GRUB_STAMP_FILE"
+}
+
+cmd="${1:-}"
+case "$cmd" in
+    write)
+        [ -n "${2:-}" ] || { echo "Usage: $0 write <name> [mode]" >&2; exit 1; }
+        write_dropin "$2" "${3:-}"
+        ;;
+    remove)
+        [ -n "${2:-}" ] || { echo "Usage: $0 remove <name>" >&2; exit 1; }
+        remove_dropin "$2"
+        ;;
+    update)
+        update_grub "${2:-}"
+        ;;
+    pending)
+        detect_grub_command
+        is_pending "$(inputs_hash)"
+        ;;
+    *)
+        echo "Usage: $0 write <name> [mode] | remove <name> | update [--force] | pending" >&2
+        exit 1
+        ;;
+esac
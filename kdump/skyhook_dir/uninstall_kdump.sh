@@ -24,7 +24,15 @@ remove_crashkernel_from_grub() {
     if [[ -d /etc/default/grub.d ]]; then
         local grub_d_file="/etc/default/grub.d/${kdump_grub_file}"
         if [[ -f "$grub_d_file" ]]; then
-            sed -i 's/\<crashkernel=[^" ]* *//g' "$grub_d_file"
+            # Go through the coordinator so the drop-in is replaced atomically: drop it when
+            # the crashkernel argument was all it added, otherwise write it back without it
+            local stripped
+            stripped=$(sed 's/\<crashkernel=[^" ]* *//g' "$grub_d_file")
+            if ! grep -v -E '^[[:space:]]*(#|$)|^GRUB_CMDLINE_LINUX_DEFAULT="\$\{?GRUB_CMDLINE_LINUX_DEFAULT\}? *"$' <<< "$stripped" | grep -q .; then
+                "${SKYHOOK_DIR}/skyhook_dir/grub_coordinator.sh" remove "${kdump_grub_file}"
+            else
+                printf '%s\n' "$stripped" | "${SKYHOOK_DIR}/skyhook_dir/grub_coordinator.sh" write "${kdump_grub_file}" "$(stat -c %a "$grub_d_file")"
+            fi
         fi
     else
         local grub_file="/etc/default/grub"
@@ -35,16 +43,8 @@ remove_crashkernel_from_grub() {
 }
 
 update_grub_config() {
-    if command -v update-grub &> /dev/null; then
-        update-grub
-    elif command -v grub2-mkconfig &> /dev/null; then
-        local grub_cfg="/boot/grub2/grub.cfg"
-        [[ -d /sys/firmware/efi ]] && grub_cfg="/boot/efi/EFI/$(ls /boot/efi/EFI | head -n1)/grub.cfg"
-        grub2-mkconfig -o "$grub_cfg"
-    else
-        echo "ERROR: could not detect grub update command."
-        exit 1
-    fi
+    # Skips the regeneration when the GRUB inputs haven't changed since the last one
+    "${SKYHOOK_DIR}/skyhook_dir/grub_coordinator.sh" update
 }
 
 remove_service() {
@@ -33,16 +33,16 @@ downgrade_kernel() {
     linux-modules-$full_kernel_ver \
     linux-modules-extra-$full_kernel_ver
     
-  # Update grub to make sure the new kernel is available 
-  update-grub
-
   # List all installed kernels
   dpkg --list | grep linux-image
 
   # Set the default kernel version in /etc/default/grub
   sed -i 's|^GRUB_DEFAULT=.*|GRUB_DEFAULT=saved|' /etc/default/grub
   grub-set-default "Advanced options for Ubuntu>Ubuntu, with Linux ${full_kernel_ver}"
-  update-grub
+
+  # One regeneration covers both the new kernel and GRUB_DEFAULT (grub-set-default only
+  # writes grubenv, it doesn't need grub.cfg to be current). Skipped if nothing changed.
+  "${SKYHOOK_DIR}/skyhook_dir/grub_coordinator.sh" update
 
 
   if [ "${NVIDIA_PIN_KERNEL:-false}" = "true" ]; then
@@ -0,0 +1 @@
+../../../plugins/hugepages.sh
\ No newline at end of file
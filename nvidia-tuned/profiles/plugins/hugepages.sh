@@ -0,0 +1,256 @@
+#!/bin/bash
+# TuneD script plugin lifecycle: start | stop [full_rollback] | verify [ignore_missing]
+# https://github.com/redhat-performance/tuned/blob/v2.21.0/tuned/plugins/plugin_script.py
+
+# SPDX-FileCopyrightText: Copyright (c) 2026 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: Apache-2.0
+
+# Hugepages and transparent hugepages for the profile this script is deployed with.
+# Profiles link it (and grub_coordinator.sh) into their directory next to a
+# hugepages.conf:
+#   pagesize=2M             hugepage size (2M, 1G or a size in kB)
+#   per_node=10%            pages reserved on every NUMA node: a count, or a fraction of the
+#                           node's memory (0.1 or 10%)
+#   thp_enabled=madvise     transparent_hugepage/enabled, empty leaves it alone
+#   thp_defrag=defer+madvise
+#                           transparent_hugepage/defrag, empty leaves it alone
+#   khugepaged_defrag=0     transparent_hugepage/khugepaged/defrag, empty leaves it alone
+#
+# Pages are reserved at runtime first. When a node can't reserve all of them (memory is
+# already fragmented), the reservation is added to the kernel command line through a GRUB
+# drop-in so it is made at the next boot (per node from kernel 5.16, the total before);
+# the drop-in is kept until a full rollback.
+#
+# Environment:
+#   SYS_ROOT, PROC_ROOT    override /sys and /proc (testing)
+#   HUGEPAGES_STATE_FILE   THP settings and reserved pages before start, restored by stop
+
+set -e
+
+SCRIPT_DIR="$(cd "$(dirname "$0")" && pwd)"
+CONF_FILE="${SCRIPT_DIR}/hugepages.conf"
+SYS_ROOT=${SYS_ROOT:-/sys}
+PROC_ROOT=${PROC_ROOT:-/proc}
+THP_DIR="${SYS_ROOT}/kernel/mm/transparent_hugepage"
+STATE_FILE=${HUGEPAGES_STATE_FILE:-/run/tuned-nvidia-hugepages.state}
+GRUB_CONFIG_NAME="99_nvidia_hugepages.cfg"
+
+PAGESIZE=2M
+PER_NODE=0
+THP_ENABLED=""
+THP_DEFRAG=""
+KHUGEPAGED_DEFRAG=""
+
+read_conf() {
+	local key value
+	[ -f "$CONF_FILE" ] || return 0
+	while IFS='=' read -r key value; do
+		key=$(echo $key)
+		value=$(echo $value)
+		case "$key" in
+			pagesize) PAGESIZE=$value ;;
+			per_node) PER_NODE=$value ;;
+			thp_enabled) THP_ENABLED=$value ;;
+			thp_defrag) THP_DEFRAG=$value ;;
+			khugepaged_defrag) KHUGEPAGED_DEFRAG=$value ;;
+		esac
+	done < <(grep -v '^[[:space:]]*#' "$CONF_FILE")
+}
+
+# Sets PAGE_KB from PAGESIZE
+page_kb() {
+	case "$PAGESIZE" in
+		*[Gg]) PAGE_KB=$(( ${PAGESIZE%?} * 1048576 )) ;;
+		*[Mm]) PAGE_KB=$(( ${PAGESIZE%?} * 1024 )) ;;
+		*[kK][bB]) PAGE_KB=${PAGESIZE%??} ;;
+		*) PAGE_KB=$PAGESIZE ;;
+	esac
+}
+
+# Print "<node> <nr_hugepages file> <MemTotal kB>" for every NUMA node, or a single
+# "- <file> <MemTotal>" line for the whole system when there is no NUMA information
+list_nodes() {
+	local node mem found=false
+	for node in "${SYS_ROOT}"/devices/system/node/node[0-9]*; do
+		[ -f "$node/meminfo" ] || continue
+		mem=$(awk '$3 == "MemTotal:" { print $4 }' "$node/meminfo")
+		echo "${node##*/node} $node/hugepages/hugepages-${PAGE_KB}kB/nr_hugepages ${mem:-0}"
+		found=true
+	done
+	if [ "$found" = false ]; then
+		mem=$(awk '$1 == "MemTotal:" { print $2 }' "${PROC_ROOT}/meminfo" 2>/dev/null)
+		echo "- ${SYS_ROOT}/kernel/mm/hugepages/hugepages-${PAGE_KB}kB/nr_hugepages ${mem:-0}"
+	fi
+}
+
+# Sets REPLY to the pages to reserve on a node with $1 kB of memory
+node_target() {
+	case "$PER_NODE" in
+		*%) REPLY=$(awk -v m="$1" -v p="${PER_NODE%\%}" -v k="$PAGE_KB" 'BEGIN { printf "%d", m * p / 100 / k }') ;;
+		*.*) REPLY=$(awk -v m="$1" -v p="$PER_NODE" -v k="$PAGE_KB" 'BEGIN { printf "%d", m * p / k }') ;;
+		*) REPLY=$PER_NODE ;;
+	esac
+}
+
+# Sets REPLY to the selected value of a sysfs option file ("always [madvise] never")
+thp_current() {
+	REPLY=""
+	[ -r "$1" ] || return 1
+	REPLY=$(cat "$1")
+	if [[ "$REPLY" == *"["*"]"* ]]; then
+		REPLY=${REPLY#*[}
+		REPLY=${REPLY%%]*}
+	fi
+}
+
+thp_files() {
+	echo "enabled $THP_DIR/enabled $THP_ENABLED"
+	echo "defrag $THP_DIR/defrag $THP_DEFRAG"
+	echo "khugepaged_defrag $THP_DIR/khugepaged/defrag $KHUGEPAGED_DEFRAG"
+}
+
+# Remember the THP settings and the pages reserved on every node that tuned found,
+# once, so stop can put them back
+save_state() {
+	local name file value node mem
+	[ ! -f "$STATE_FILE" ] || return 0
+	{
+		while read -r name file value; do
+			thp_current "$file" && echo "$name $file $REPLY"
+		done < <(thp_files)
+		while read -r node file mem; do
+			[ -f "$file" ] && echo "nr_hugepages $file $(cat "$file")"
+		done < <(list_nodes)
+	} > "$STATE_FILE" || true
+}
+
+apply_thp() {
+	local name file value
+	while read -r name file value; do
+		[ -n "$value" ] && [ -w "$file" ] || continue
+		echo "$value" > "$file"
+	done < <(thp_files)
+}
+
+# Put back the THP settings and the reserved pages found at start
+restore_state() {
+	local name file value
+	[ -f "$STATE_FILE" ] || return 0
+	while read -r name file value; do
+		[ -w "$file" ] && echo "$value" > "$file" 2>/dev/null || true
+	done < "$STATE_FILE"
+	rm -f "$STATE_FILE"
+}
+
+# Whether the kernel takes per node reservations on its command line
+# ("hugepages=<node>:<pages>,...", added in 5.16)
+kernel_per_node_hugepages() {
+	local release major minor
+	release=$(cat "${PROC_ROOT}/sys/kernel/osrelease" 2>/dev/null || uname -r)
+	major=${release%%.*}
+	minor=${release#*.}
+	minor=${minor%%[!0-9]*}
+	[ "${major:-0}" -gt 5 ] 2>/dev/null || { [ "${major:-0}" -eq 5 ] && [ "${minor:-0}" -ge 16 ]; } 2>/dev/null
+}
+
+# Reserve the pages on every node, then fall back to the kernel command line for
+# nodes that came up short
+reserve_hugepages() {
+	local node file mem reserved boot_pages="" total=0 short=false
+	while read -r node file mem; do
+		node_target "$mem"
+		total=$((total + REPLY))
+		boot_pages+="${boot_pages:+,}${node}:${REPLY}"
+		if [ ! -e "$file" ]; then
+			echo "WARNING: no ${PAGESIZE} hugepages on node ${node} (${file} not found)"
+			continue
+		fi
+		echo "$REPLY" > "$file" 2>/dev/null || true
+		reserved=$(cat "$file" 2>/dev/null || true)
+		if [ "${reserved:-0}" -lt "$REPLY" ]; then
+			reserved=${reserved:-0}
+			echo "WARNING: reserved ${reserved} of ${REPLY} ${PAGESIZE} hugepages on node ${node}"
+			short=true
+		fi
+	done < <(list_nodes)
+
+	[ "$short" = true ] || return 0
+	if [ ! -x "${SCRIPT_DIR}/grub_coordinator.sh" ]; then
+		echo "WARNING: grub_coordinator.sh not found, not reserving hugepages at boot"
+		return 0
+	fi
+	# Without NUMA information (a single "-" entry) or per node support, reserve the total
+	if [[ "$boot_pages" == -:* ]] || ! kernel_per_node_hugepages; then
+		boot_pages=$total
+	fi
+	cat <<EOF | "${SCRIPT_DIR}/grub_coordinator.sh" write "$GRUB_CONFIG_NAME"
+# Generated by the nvidia-tuned hugepages plugin: runtime reservation fell short
+GRUB_CMDLINE_LINUX_DEFAULT="\${GRUB_CMDLINE_LINUX_DEFAULT} hugepagesz=${PAGESIZE} hugepages=${boot_pages}"
+EOF
+	"${SCRIPT_DIR}/grub_coordinator.sh" update
+	echo "Hugepages will be reserved at the next boot: hugepagesz=${PAGESIZE} hugepages=${boot_pages}"
+}
+
+remove_boot_reservation() {
+	[ -x "${SCRIPT_DIR}/grub_coordinator.sh" ] || return 0
+	"${SCRIPT_DIR}/grub_coordinator.sh" remove "$GRUB_CONFIG_NAME"
+	"${SCRIPT_DIR}/grub_coordinator.sh" update
+}
+
+verify_hugepages() {
+	local ignore_missing=false rc=0 node file mem reserved name value
+	[ "${2:-}" = "ignore_missing" ] && ignore_missing=true
+
+	while read -r node file mem; do
+		node_target "$mem"
+		if [ ! -e "$file" ]; then
+			echo "No ${PAGESIZE} hugepages on node ${node}: ${file}"
+			$ignore_missing || rc=1
+			continue
+		fi
+		reserved=$(cat "$file" 2>/dev/null || true)
+		if [ "${reserved:-0}" -lt "$REPLY" ]; then
+			echo "Hugepages on node ${node}: expected ${REPLY} ${PAGESIZE} pages, reserved ${reserved:-0}"
+			rc=1
+		fi
+	done < <(list_nodes)
+
+	while read -r name file value; do
+		[ -n "$value" ] || continue
+		if ! thp_current "$file"; then
+			$ignore_missing || rc=1
+			continue
+		fi
+		if [ "$REPLY" != "$value" ]; then
+			echo "Transparent hugepages ${name}: expected ${value}, got ${REPLY}"
+			rc=1
+		fi
+	done < <(thp_files)
+	exit $rc
+}
+
+read_conf
+page_kb
+
+cmd="${1:-}"
+case "$cmd" in
+	start)
+		save_state
+		apply_thp
+		reserve_hugepages
+		;;
+	stop)
+		restore_state
+		# full_rollback (arg 2): the profile is being removed, drop the boot reservation too
+		if [ "${2:-}" = "full_rollback" ]; then
+			remove_boot_reservation
+		fi
+		;;
+	verify)
+		verify_hugepages "$@"
+		;;
+	*)
+		echo "Usage: $0 start | stop [full_rollback] | verify [ignore_missing]" >&2
+		exit 1
+		;;
+esac
@@ -0,0 +1,223 @@
+#!/bin/bash
+# TuneD script plugin lifecycle: start | stop [full_rollback] | verify [ignore_missing]
+# https://github.com/redhat-performance/tuned/blob/v2.21.0/tuned/plugins/plugin_script.py
+
+# SPDX-FileCopyrightText: Copyright (c) 2026 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: Apache-2.0
+
+# NUMA-aware IRQ affinity for NIC and NVMe interrupts.
+#
+# Pins the MSI interrupts of every physical NIC (/sys/class/net/*/device) and NVMe
+# controller (/sys/class/nvme/*/device) to the CPUs of the device's local NUMA node,
+# leaving out isolated CPUs (/sys/devices/system/cpu/isolated, and isolated_cores from
+# an isolation.conf next to this script). irqbalance is told to leave those IRQs alone
+# with --banirq through a systemd drop-in. Devices without NUMA locality are left to
+# irqbalance.
+#
+# Environment:
+#   SYS_ROOT, PROC_ROOT      override /sys and /proc (testing)
+#   IRQ_AFFINITY_STATE_FILE  affinities before start, restored by stop
+#   IRQBALANCE_DROPIN_DIR    irqbalance.service drop-in directory
+
+set -e
+
+SCRIPT_DIR="$(cd "$(dirname "$0")" && pwd)"
+SYS_ROOT=${SYS_ROOT:-/sys}
+PROC_ROOT=${PROC_ROOT:-/proc}
+STATE_FILE=${IRQ_AFFINITY_STATE_FILE:-/run/tuned-nvidia-irq-affinity.state}
+DROPIN_DIR=${IRQBALANCE_DROPIN_DIR:-/etc/systemd/system/irqbalance.service.d}
+DROPIN_FILE=nvidia-irq-affinity.conf
+
+# Print a cpulist ("0-3,8,10-11") one CPU per line
+expand_cpulist() {
+	echo "$1" | awk -F, '{
+		for (i = 1; i <= NF; i++) {
+			if ($i == "") continue
+			n = split($i, r, "-")
+			for (c = r[1]; c <= r[n]; c++) print c
+		}
+	}'
+}
+
+# Print the CPUs read on stdin as a cpulist
+compress_cpulist() {
+	sort -n -u | awk '
+		NR == 1 { start = prev = $1; next }
+		$1 == prev + 1 { prev = $1; next }
+		{ out = out sep (start == prev ? start : start "-" prev); sep = ","; start = prev = $1 }
+		END { if (NR) print out sep (start == prev ? start : start "-" prev) }'
+}
+
+# Print the isolated CPUs, one per line
+isolated_cpus() {
+	local list=""
+	[ -r "${SYS_ROOT}/devices/system/cpu/isolated" ] && list=$(cat "${SYS_ROOT}/devices/system/cpu/isolated")
+	if [ -f "${SCRIPT_DIR}/isolation.conf" ]; then
+		list+=",$(awk -F= '$1 == "isolated_cores" { print $2 }' "${SCRIPT_DIR}/isolation.conf")"
+	fi
+	expand_cpulist "$list"
+}
+
+# Print "<device> <irq> <cpulist>" for every MSI interrupt of the NICs and NVMe
+# controllers with NUMA locality, <cpulist> being the local CPUs that aren't isolated
+plan() {
+	local dev name node cpus cpu irq
+	local -A isolated=()
+	for cpu in $(isolated_cpus); do
+		isolated[$cpu]=1
+	done
+	for dev in "${SYS_ROOT}"/class/net/*/device "${SYS_ROOT}"/class/nvme/*/device; do
+		[ -e "$dev/msi_irqs" ] || continue
+		name=${dev%/device}
+		name=${name##*/}
+		node=$(cat "$dev/numa_node" 2>/dev/null || echo -1)
+		[ "$node" -ge 0 ] 2>/dev/null || continue
+		if [ -r "$dev/local_cpulist" ]; then
+			cpus=$(cat "$dev/local_cpulist")
+		else
+			cpus=$(cat "${SYS_ROOT}/devices/system/node/node${node}/cpulist" 2>/dev/null) || continue
+		fi
+		cpus=$(for cpu in $(expand_cpulist "$cpus"); do
+			[ -n "${isolated[$cpu]+set}" ] || echo "$cpu"
+		done | compress_cpulist)
+		if [ -z "$cpus" ]; then
+			echo "WARNING: every CPU local to $name is isolated, leaving its IRQs to irqbalance" >&2
+			continue
+		fi
+		for irq in "$dev"/msi_irqs/*; do
+			[ -e "$irq" ] || continue
+			irq=${irq##*/}
+			[ -e "${PROC_ROOT}/irq/${irq}/smp_affinity_list" ] || continue
+			echo "$name $irq $cpus"
+		done
+	done
+}
+
+restart_irqbalance() {
+	# Nothing to restart without systemd (containers, tests)
+	[ -d /run/systemd/system ] || return 0
+	systemctl daemon-reload
+	if systemctl is-active --quiet irqbalance; then
+		systemctl restart irqbalance
+	fi
+}
+
+# Usage: expected_dropin <irq>...; without IRQs the drop-in only records that start ran
+expected_dropin() {
+	local args="" irq
+	for irq in "$@"; do
+		args+="${args:+ }--banirq=${irq}"
+	done
+	printf '[Service]\n'
+	[ -z "$args" ] || printf 'Environment="IRQBALANCE_ARGS=%s"\n' "$args"
+}
+
+apply_affinity() {
+	local name irq cpus planned=0
+	local -a irqs=()
+	# Remember the affinities tuned found, once, so stop can put them back
+	if [ ! -f "$STATE_FILE" ]; then
+		while read -r name irq cpus; do
+			echo "$irq $(cat "${PROC_ROOT}/irq/${irq}/smp_affinity_list")"
+		done < <(plan) > "$STATE_FILE"
+	fi
+	while read -r name irq cpus; do
+		planned=$((planned + 1))
+		if ! echo "$cpus" > "${PROC_ROOT}/irq/${irq}/smp_affinity_list" 2>/dev/null; then
+			# Some interrupts (managed by the driver) can't be moved
+			echo "WARNING: could not set affinity of IRQ ${irq} (${name}) to ${cpus}"
+			continue
+		fi
+		echo "IRQ ${irq} (${name}) -> CPUs ${cpus}"
+		irqs+=("$irq")
+	done < <(plan)
+
+	# The drop-in records the IRQs that were pinned, verify only expects those
+	[ "$planned" -gt 0 ] || return 0
+	mkdir -p "$DROPIN_DIR"
+	expected_dropin "${irqs[@]}" > "$DROPIN_DIR/$DROPIN_FILE"
+	restart_irqbalance
+}
+
+restore_affinity() {
+	local irq cpus
+	if [ -f "$STATE_FILE" ]; then
+		while read -r irq cpus; do
+			echo "$cpus" > "${PROC_ROOT}/irq/${irq}/smp_affinity_list" 2>/dev/null || true
+		done < "$STATE_FILE"
+		rm -f "$STATE_FILE"
+	fi
+	if [ -f "$DROPIN_DIR/$DROPIN_FILE" ]; then
+		rm -f "$DROPIN_DIR/$DROPIN_FILE"
+		if [ -d "$DROPIN_DIR" ] && [ -z "$(ls -A "$DROPIN_DIR" 2>/dev/null)" ]; then
+			rmdir "$DROPIN_DIR"
+		fi
+		restart_irqbalance
+	fi
+}
+
+# Print the IRQs the drop-in bans from irqbalance, one per line
+banned_irqs() {
+	[ -f "$DROPIN_DIR/$DROPIN_FILE" ] || return 0
+	grep -o -- '--banirq=[0-9]*' "$DROPIN_DIR/$DROPIN_FILE" | cut -d= -f2
+}
+
+verify_affinity() {
+	local ignore_missing=false only_pinned=false rc=0 planned=0 name irq cpus actual
+	local -a irqs=()
+	local -A pinned=()
+	[ "${2:-}" = "ignore_missing" ] && ignore_missing=true
+
+	# Once start ran, only the IRQs it could pin (the ones it banned) are expected on their
+	# node: the kernel refuses to move managed interrupts (NVMe, some mlx5 queues)
+	if [ -f "$STATE_FILE" ]; then
+		only_pinned=true
+		for irq in $(banned_irqs); do
+			pinned[$irq]=1
+		done
+	fi
+
+	while read -r name irq cpus; do
+		planned=$((planned + 1))
+		if $only_pinned && [ -z "${pinned[$irq]+set}" ]; then
+			echo "IRQ ${irq} (${name}): not pinned by start (managed by the driver), skipped"
+			continue
+		fi
+		actual=$(cat "${PROC_ROOT}/irq/${irq}/smp_affinity_list")
+		if [ "$actual" != "$cpus" ]; then
+			echo "IRQ ${irq} (${name}): expected CPUs ${cpus}, got ${actual}"
+			rc=1
+		fi
+		irqs+=("$irq")
+	done < <(plan)
+
+	if [ "$planned" -eq 0 ]; then
+		exit $rc
+	fi
+	if [ ! -f "$DROPIN_DIR/$DROPIN_FILE" ]; then
+		echo "irqbalance drop-in doesn't exist: $DROPIN_DIR/$DROPIN_FILE"
+		$ignore_missing || rc=1
+	elif [ "$(expected_dropin "${irqs[@]}"; echo x)" != "$(cat "$DROPIN_DIR/$DROPIN_FILE"; echo x)" ]; then
+		echo "irqbalance drop-in doesn't ban the pinned IRQs: $DROPIN_DIR/$DROPIN_FILE"
+		rc=1
+	fi
+	exit $rc
+}
+
+cmd="${1:-}"
+case "$cmd" in
+	start)
+		apply_affinity
+		;;
+	stop)
+		restore_affinity
+		# full_rollback (arg 2) - same unapply for this script
+		;;
+	verify)
+		verify_affinity "$@"
+		;;
+	*)
+		echo "Usage: $0 start | stop [full_rollback] | verify [ignore_missing]" >&2
+		exit 1
+		;;
+esac
@@ -0,0 +1,362 @@
+#!/bin/bash
+# TuneD script plugin lifecycle: start | stop [full_rollback] | verify [ignore_missing]
+# https://github.com/redhat-performance/tuned/blob/v2.21.0/tuned/plugins/plugin_script.py
+
+# SPDX-FileCopyrightText: Copyright (c) 2026 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: Apache-2.0
+
+# NIC queue tuning for the profile this script is deployed with: ring sizes and interrupt
+# coalescing through ethtool, RPS/XPS CPU masks and MTU through sysfs. Profiles link it
+# into their directory next to a nic_tuning.conf:
+#   interfaces=*            interfaces to tune, space separated globs; only physical
+#                           interfaces (with a device link) are considered
+#   rx_ring=max, tx_ring=max
+#                           ring sizes: a count (capped at the driver maximum) or max
+#   adaptive_rx=on, adaptive_tx=, rx_usecs=, tx_usecs=, rx_frames=, tx_frames=
+#                           interrupt coalescing (ethtool -C)
+#   rps=local, xps=local    queue CPU masks: local spreads over the non-isolated CPUs of the
+#                           NIC's NUMA node (XPS maps each TX queue to one of them), or a hex mask
+#   mtu=9001
+# Empty values leave the setting alone. Settings the driver doesn't support are reported
+# and skipped, by start and verify alike.
+#
+# Environment:
+#   SYS_ROOT                 override /sys (testing)
+#   ETHTOOL                  ethtool command (testing)
+#   NIC_TUNING_STATE_FILE    settings before start, restored by stop
+
+set -e
+
+SCRIPT_DIR="$(cd "$(dirname "$0")" && pwd)"
+CONF_FILE="${SCRIPT_DIR}/nic_tuning.conf"
+SYS_ROOT=${SYS_ROOT:-/sys}
+ETHTOOL=${ETHTOOL:-ethtool}
+STATE_FILE=${NIC_TUNING_STATE_FILE:-/run/tuned-nvidia-nic-tuning.state}
+
+INTERFACES="*"
+RX_RING=""
+TX_RING=""
+RPS=""
+XPS=""
+MTU=""
+# ethtool -C parameters, in the order they are applied
+COALESCE_KEYS=""
+declare -A COALESCE=()
+
+read_conf() {
+	local key value
+	[ -f "$CONF_FILE" ] || return 0
+	while IFS='=' read -r key value; do
+		key=$(echo $key)
+		# Quoted so interfaces=* isn't expanded
+		value=$(echo "$value" | sed 's/^[[:space:]]*//; s/[[:space:]]*$//')
+		case "$key" in
+			interfaces) INTERFACES=$value ;;
+			rx_ring) RX_RING=$value ;;
+			tx_ring) TX_RING=$value ;;
+			rps) RPS=$value ;;
+			xps) XPS=$value ;;
+			mtu) MTU=$value ;;
+			adaptive_rx|adaptive_tx|rx_usecs|tx_usecs|rx_frames|tx_frames)
+				[ -n "$value" ] || continue
+				COALESCE[${key//_/-}]=$value
+				COALESCE_KEYS+=" ${key//_/-}"
+				;;
+		esac
+	done < <(grep -v '^[[:space:]]*#' "$CONF_FILE")
+}
+
+# Print the physical interfaces matching INTERFACES
+list_interfaces() {
+	local nic name pattern
+	local -a patterns=()
+	read -ra patterns <<< "$INTERFACES"
+	for nic in "${SYS_ROOT}"/class/net/*; do
+		[ -e "$nic/device" ] || continue
+		name=${nic##*/}
+		for pattern in "${patterns[@]}"; do
+			# shellcheck disable=SC2053
+			if [[ "$name" == $pattern ]]; then
+				echo "$name"
+				break
+			fi
+		done
+	done
+}
+
+# Print a cpulist ("0-3,8,10-11") one CPU per line
+expand_cpulist() {
+	echo "$1" | awk -F, '{
+		for (i = 1; i <= NF; i++) {
+			if ($i == "") continue
+			n = split($i, r, "-")
+			for (c = r[1]; c <= r[n]; c++) print c
+		}
+	}'
+}
+
+# Print the CPUs read on stdin (one per line) as a hex mask in 32 bit groups
+cpus_to_mask() {
+	awk '
+		{ nibble[int($1 / 4)] += 2 ^ ($1 % 4); if ($1 > max) max = $1 }
+		END {
+			if (!NR) { print "0"; exit }
+			for (i = (int(max / 32) + 1) * 8 - 1; i >= 0; i--) {
+				out = out substr("0123456789abcdef", nibble[i] + 1, 1)
+				if (i % 8 == 0 && i) out = out ","
+			}
+			print out
+		}'
+}
+
+# Print a hex mask without group separators and leading zeros, for comparisons
+normalize_mask() {
+	local mask
+	mask=$(echo "$1" | sed 's/,//g; s/^0*//')
+	echo "${mask:-0}"
+}
+
+# Print the non-isolated CPUs of the NIC's NUMA node (every online CPU without NUMA
+# locality), one per line
+local_cpus() {
+	local dev="${SYS_ROOT}/class/net/$1/device" cpus="" node cpu
+	local -A isolated=()
+	if [ -r "${SYS_ROOT}/devices/system/cpu/isolated" ]; then
+		for cpu in $(expand_cpulist "$(cat "${SYS_ROOT}/devices/system/cpu/isolated")"); do
+			isolated[$cpu]=1
+		done
+	fi
+	node=$(cat "$dev/numa_node" 2>/dev/null || echo -1)
+	if [ -r "$dev/local_cpulist" ]; then
+		cpus=$(cat "$dev/local_cpulist")
+	elif [ "$node" -ge 0 ] 2>/dev/null && [ -r "${SYS_ROOT}/devices/system/node/node${node}/cpulist" ]; then
+		cpus=$(cat "${SYS_ROOT}/devices/system/node/node${node}/cpulist")
+	elif [ -r "${SYS_ROOT}/devices/system/cpu/online" ]; then
+		cpus=$(cat "${SYS_ROOT}/devices/system/cpu/online")
+	fi
+	for cpu in $(expand_cpulist "$cpus"); do
+		[ -n "${isolated[$cpu]+set}" ] || echo "$cpu"
+	done
+}
+
+# Print "<max|cur> <rx|tx> <size>" from ethtool -g, fails when the driver has no ring sizes
+ring_params() {
+	local out
+	out=$("$ETHTOOL" -g "$1" 2>/dev/null) || return 1
+	echo "$out" | awk '
+		/^Pre-set maximums/ { s = "max" }
+		/^Current hardware settings/ { s = "cur" }
+		s && $1 == "RX:" { print s, "rx", $2 }
+		s && $1 == "TX:" { print s, "tx", $2 }'
+}
+
+# Print "<parameter> <value>" from ethtool -c, fails when the driver has no coalescing
+coalesce_params() {
+	local out
+	out=$("$ETHTOOL" -c "$1" 2>/dev/null) || return 1
+	echo "$out" | awk '
+		/^Adaptive RX:/ { print "adaptive-rx", $3; print "adaptive-tx", $5; next }
+		/^[a-z-]+:[ \t]/ { sub(":", "", $1); print $1, $2 }'
+}
+
+# Sets REPLY to the ring size to use for a configured value $1 and driver maximum $2
+ring_target() {
+	REPLY=$1
+	if [ "$1" = max ] || { [ -n "$2" ] && [ "$2" != n/a ] && [ "$1" -gt "$2" ] 2>/dev/null; }; then
+		REPLY=$2
+	fi
+}
+
+# Print "<file under the interface> <value>" for the sysfs settings of an interface
+sysfs_settings() {
+	local nic=$1 queue mask i=0
+	local -a cpus=()
+	[ -n "$MTU" ] && echo "mtu $MTU"
+	if [ "$RPS" = local ] || [ "$XPS" = local ]; then
+		mapfile -t cpus < <(local_cpus "$nic")
+		if [ ${#cpus[@]} -eq 0 ]; then
+			echo "WARNING: ${nic}: no local CPUs that aren't isolated, skipping RPS/XPS" >&2
+			return 0
+		fi
+	fi
+	if [ -n "$RPS" ]; then
+		mask=$RPS
+		[ "$RPS" = local ] && mask=$(printf '%s\n' "${cpus[@]}" | cpus_to_mask)
+		for queue in "${SYS_ROOT}/class/net/${nic}"/queues/rx-*; do
+			[ -e "$queue/rps_cpus" ] && echo "queues/${queue##*/}/rps_cpus $mask"
+		done
+	fi
+	if [ -n "$XPS" ]; then
+		while [ -e "${SYS_ROOT}/class/net/${nic}/queues/tx-${i}/xps_cpus" ]; do
+			mask=$XPS
+			[ "$XPS" = local ] && mask=$(echo "${cpus[$((i % ${#cpus[@]}))]}" | cpus_to_mask)
+			echo "queues/tx-${i}/xps_cpus $mask"
+			i=$((i + 1))
+		done
+	fi
+}
+
+# Usage: save_state <interface> <ring|coalesce|sysfs> <key> <value>
+save_state() {
+	[ "$SAVE_STATE" = true ] && echo "$*" >> "$STATE_FILE"
+	return 0
+}
+
+apply_nic() {
+	local nic=$1 params dir want cur max key file value
+	if ! command -v "$ETHTOOL" >/dev/null 2>&1; then
+		echo "WARNING: ${ETHTOOL} not found, skipping ring sizes and coalescing of ${nic}"
+	elif [ -n "$RX_RING$TX_RING" ] && ! params=$(ring_params "$nic"); then
+		echo "WARNING: ${nic}: ring sizes not supported by the driver, skipped"
+	elif [ -n "$RX_RING$TX_RING" ]; then
+		for dir in rx tx; do
+			want=$RX_RING
+			[ "$dir" = tx ] && want=$TX_RING
+			[ -n "$want" ] || continue
+			max=$(echo "$params" | awk -v d="$dir" '$1 == "max" && $2 == d { print $3 }')
+			cur=$(echo "$params" | awk -v d="$dir" '$1 == "cur" && $2 == d { print $3 }')
+			ring_target "$want" "$max"
+			save_state "$nic ring $dir $cur"
+			[ "$cur" != "$REPLY" ] || continue
+			if "$ETHTOOL" -G "$nic" "$dir" "$REPLY" >/dev/null 2>&1; then
+				echo "${nic} ${dir} ring: ${REPLY}"
+			else
+				echo "WARNING: ${nic}: could not set ${dir} ring to ${REPLY}"
+			fi
+		done
+	fi
+
+	if [ -n "$COALESCE_KEYS" ] && command -v "$ETHTOOL" >/dev/null 2>&1; then
+		if ! params=$(coalesce_params "$nic"); then
+			echo "WARNING: ${nic}: interrupt coalescing not supported by the driver, skipped"
+		else
+			for key in $COALESCE_KEYS; do
+				cur=$(echo "$params" | awk -v k="$key" '$1 == k { print $2 }')
+				if [ -z "$cur" ] || [ "$cur" = n/a ]; then
+					echo "WARNING: ${nic}: ${key} not supported by the driver, skipped"
+					continue
+				fi
+				save_state "$nic coalesce $key $cur"
+				[ "$cur" != "${COALESCE[$key]}" ] || continue
+				if "$ETHTOOL" -C "$nic" "$key" "${COALESCE[$key]}" >/dev/null 2>&1; then
+					echo "${nic} ${key}: ${COALESCE[$key]}"
+				else
+					echo "WARNING: ${nic}: could not set ${key} to ${COALESCE[$key]}"
+				fi
+			done
+		fi
+	fi
+
+	while read -r file value; do
+		if [ ! -e "${SYS_ROOT}/class/net/${nic}/${file}" ]; then
+			echo "WARNING: ${nic}: ${file} not found, skipped"
+			continue
+		fi
+		cur=$(cat "${SYS_ROOT}/class/net/${nic}/${file}")
+		save_state "$nic sysfs $file $cur"
+		[ "$(normalize_mask "$cur")" != "$(normalize_mask "$value")" ] || continue
+		if echo "$value" > "${SYS_ROOT}/class/net/${nic}/${file}" 2>/dev/null; then
+			echo "${nic} ${file}: ${value}"
+		else
+			echo "WARNING: ${nic}: could not set ${file} to ${value}"
+		fi
+	done < <(sysfs_settings "$nic")
+}
+
+restore_nics() {
+	local nic kind key value
+	[ -f "$STATE_FILE" ] || return 0
+	while read -r nic kind key value; do
+		case "$kind" in
+			ring) "$ETHTOOL" -G "$nic" "$key" "$value" >/dev/null 2>&1 || true ;;
+			coalesce) "$ETHTOOL" -C "$nic" "$key" "$value" >/dev/null 2>&1 || true ;;
+			sysfs) echo "$value" > "${SYS_ROOT}/class/net/${nic}/${key}" 2>/dev/null || true ;;
+		esac
+	done < "$STATE_FILE"
+	rm -f "$STATE_FILE"
+}
+
+verify_nic() {
+	local nic=$1 params dir want cur max key file value
+	if ! command -v "$ETHTOOL" >/dev/null 2>&1; then
+		echo "${ETHTOOL} not found, ring sizes and coalescing of ${nic} not verified"
+	elif [ -n "$RX_RING$TX_RING" ] && ! params=$(ring_params "$nic"); then
+		echo "${nic}: ring sizes not supported by the driver, skipped"
+	elif [ -n "$RX_RING$TX_RING" ]; then
+		for dir in rx tx; do
+			want=$RX_RING
+			[ "$dir" = tx ] && want=$TX_RING
+			[ -n "$want" ] || continue
+			max=$(echo "$params" | awk -v d="$dir" '$1 == "max" && $2 == d { print $3 }')
+			cur=$(echo "$params" | awk -v d="$dir" '$1 == "cur" && $2 == d { print $3 }')
+			ring_target "$want" "$max"
+			if [ "$cur" != "$REPLY" ]; then
+				echo "${nic} ${dir} ring: expected ${REPLY}, got ${cur}"
+				RC=1
+			fi
+		done
+	fi
+
+	if [ -n "$COALESCE_KEYS" ] && command -v "$ETHTOOL" >/dev/null 2>&1; then
+		if ! params=$(coalesce_params "$nic"); then
+			echo "${nic}: interrupt coalescing not supported by the driver, skipped"
+		else
+			for key in $COALESCE_KEYS; do
+				cur=$(echo "$params" | awk -v k="$key" '$1 == k { print $2 }')
+				if [ -z "$cur" ] || [ "$cur" = n/a ]; then
+					echo "${nic}: ${key} not supported by the driver, skipped"
+				elif [ "$cur" != "${COALESCE[$key]}" ]; then
+					echo "${nic} ${key}: expected ${COALESCE[$key]}, got ${cur}"
+					RC=1
+				fi
+			done
+		fi
+	fi
+
+	while read -r file value; do
+		if [ ! -e "${SYS_ROOT}/class/net/${nic}/${file}" ]; then
+			echo "${nic}: ${file} not found"
+			$IGNORE_MISSING || RC=1
+			continue
+		fi
+		cur=$(cat "${SYS_ROOT}/class/net/${nic}/${file}")
+		if [ "$(normalize_mask "$cur")" != "$(normalize_mask "$value")" ]; then
+			echo "${nic} ${file}: expected ${value}, got ${cur}"
+			RC=1
+		fi
+	done < <(sysfs_settings "$nic")
+}
+
+read_conf
+
+cmd="${1:-}"
+case "$cmd" in
+	start)
+		# Remember the settings tuned found, once, so stop can put them back
+		SAVE_STATE=false
+		if [ ! -f "$STATE_FILE" ]; then
+			: > "$STATE_FILE"
+			SAVE_STATE=true
+		fi
+		for nic in $(list_interfaces); do
+			apply_nic "$nic"
+		done
+		;;
+	stop)
+		restore_nics
+		# full_rollback (arg 2) - same unapply for this script
+		;;
+	verify)
+		RC=0
+		IGNORE_MISSING=false
+		[ "${2:-}" = "ignore_missing" ] && IGNORE_MISSING=true
+		for nic in $(list_interfaces); do
+			verify_nic "$nic"
+		done
+		exit $RC
+		;;
+	*)
+		echo "Usage: $0 start | stop [full_rollback] | verify [ignore_missing]" >&2
+		exit 1
+		;;
+esac
@@ -24,16 +24,15 @@
 set -e
 
 BOOTCMDLINE_FILE="/etc/tuned/bootcmdline"
-GRUB_D_DIR="/etc/default/grub.d"
-GRUB_CONFIG_FILE="${GRUB_D_DIR}/99_tuned.cfg"
+GRUB_CONFIG_NAME="99_tuned.cfg"
 
-# Ensure grub.d directory exists
-mkdir -p "$GRUB_D_DIR"
+# Profile dir (script is in e.g. /etc/tuned/eks-{accelerator}-{intent}/)
+SCRIPT_DIR="$(cd "$(dirname "$0")" && pwd)"
 
 # Write the grub configuration file
 # This file will be sourced by the grub configuration system when update-grub runs
 # It dynamically reads from /etc/tuned/bootcmdline at that time and sets GRUB_CMDLINE_LINUX_DEFAULT
-cat <<EOF > "$GRUB_CONFIG_FILE"
+cat <<EOF | "${SCRIPT_DIR}/grub_coordinator.sh" write "$GRUB_CONFIG_NAME" 755
 # This file is auto-generated by AWS tuned profile bootloader script
 # It sources bootloader settings from /etc/tuned/bootcmdline when grub is configured
 
@@ -44,8 +43,9 @@ if [ -f "$BOOTCMDLINE_FILE" ]; then
 fi
 EOF
 
-chmod a+x "$GRUB_CONFIG_FILE"
-update-grub
+# This runs on every tuned start; the coordinator only regenerates grub.cfg when the
+# drop-in, /etc/tuned/bootcmdline or the other GRUB inputs actually changed
+"${SCRIPT_DIR}/grub_coordinator.sh" update
 
-echo "Created grub configuration: $GRUB_CONFIG_FILE"
-echo "This file will source $BOOTCMDLINE_FILE when grub is configured"
\ No newline at end of file
+echo "Created grub configuration: /etc/default/grub.d/${GRUB_CONFIG_NAME}"
+echo "This file will source $BOOTCMDLINE_FILE when grub is configured"
@@ -0,0 +1 @@
+../../plugins/grub_coordinator.sh
\ No newline at end of file
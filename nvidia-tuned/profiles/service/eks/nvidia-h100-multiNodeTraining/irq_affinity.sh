@@ -0,0 +1 @@
+../../../plugins/irq_affinity.sh
\ No newline at end of file
@@ -0,0 +1 @@
+../../../plugins/nic_tuning.sh
\ No newline at end of file
@@ -0,0 +1,162 @@
+#!/bin/bash
+
+# SPDX-FileCopyrightText: Copyright (c) 2026 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: Apache-2.0
+#
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Derives the isolated/housekeeping CPU split for the low-latency profiles from the
+# node topology, and prints it as tuned variables:
+#   isolated_cores=<cpulist>
+#   housekeeping_cores=<cpulist>
+#
+# NUMA nodes with a GPU (NVIDIA display/3D controller) or a physical NIC attached are
+# where serving threads run; on those the first <count> cores (with their SMT siblings)
+# stay housekeeping and the rest are isolated. Nodes without GPUs or NICs are left to
+# housekeeping entirely. When no device reports its NUMA node (-1, or no PCI info), every
+# node is treated as device local, which gives the same split as tuned's
+# ${f:calc_isolated_cores:<count>} without needing tuned >= 2.19.
+#
+# Usage: derive_cpu_isolation.sh [count]   housekeeping cores per node (default 2)
+#
+# Environment:
+#   SYS_ROOT  override /sys (testing)
+
+set -u
+
+SYS_ROOT=${SYS_ROOT:-/sys}
+CPU_DIR="${SYS_ROOT}/devices/system/cpu"
+NODE_DIR="${SYS_ROOT}/devices/system/node"
+
+# Print a cpulist ("0-3,8,10-11") one CPU per line
+expand_cpulist() {
+    echo "$1" | awk -F, '{
+        for (i = 1; i <= NF; i++) {
+            if ($i == "") continue
+            n = split($i, r, "-")
+            for (c = r[1]; c <= r[n]; c++) print c
+        }
+    }'
+}
+
+# Print the CPUs read on stdin as a cpulist
+compress_cpulist() {
+    sort -n -u | awk '
+        NR == 1 { start = prev = $1; next }
+        $1 == prev + 1 { prev = $1; next }
+        { out = out sep (start == prev ? start : start "-" prev); sep = ","; start = prev = $1 }
+        END { if (NR) print out sep (start == prev ? start : start "-" prev) }'
+}
+
+# Print the NUMA nodes GPUs and NICs are attached to, one per line
+device_nodes() {
+    local dev class vendor nic
+    for dev in "${SYS_ROOT}"/bus/pci/devices/*; do
+        [ -f "$dev/vendor" ] && [ -f "$dev/class" ] || continue
+        read -r vendor < "$dev/vendor"
+        read -r class < "$dev/class"
+        [ "$vendor" = 0x10de ] || continue
+        case "$class" in 0x0300*|0x0302*) ;; *) continue ;; esac
+        cat "$dev/numa_node" 2>/dev/null
+    done
+    for nic in "${SYS_ROOT}"/class/net/*; do
+        # Only physical interfaces have a device link
+        [ -e "$nic/device" ] || continue
+        cat "$nic/device/numa_node" 2>/dev/null
+    done
+}
+
+main() {
+    local count=${1:-2} online node cpus cpu sibling reserved
+    local -a nodes=()
+    local -A node_cpus=() local_nodes=() housekeeping=() is_online=()
+
+    if ! [[ "$count" =~ ^[0-9]+$ ]] || [ "$count" -lt 1 ]; then
+        echo "ERROR: housekeeping core count must be a positive integer, got '$count'" >&2
+        exit 1
+    fi
+    if [ ! -r "${CPU_DIR}/online" ]; then
+        echo "ERROR: ${CPU_DIR}/online not found" >&2
+        exit 1
+    fi
+    read -r online < "${CPU_DIR}/online"
+    for cpu in $(expand_cpulist "$online"); do
+        is_online[$cpu]=1
+    done
+
+    for node in "${NODE_DIR}"/node[0-9]*; do
+        [ -r "$node/cpulist" ] || continue
+        read -r cpus < "$node/cpulist" || true
+        node=${node##*/node}
+        node_cpus[$node]=""
+        for cpu in $(expand_cpulist "$cpus"); do
+            [ -n "${is_online[$cpu]+set}" ] && node_cpus[$node]+=" $cpu"
+        done
+        [ -n "${node_cpus[$node]}" ] && nodes+=("$node")
+    done
+    # No NUMA information: one node with every online CPU
+    if [ ${#nodes[@]} -eq 0 ]; then
+        nodes=(0)
+        node_cpus[0]=" $(expand_cpulist "$online" | xargs)"
+    fi
+
+    for node in $(device_nodes); do
+        [ -n "${node_cpus[$node]+set}" ] && local_nodes[$node]=1
+    done
+    if [ ${#local_nodes[@]} -eq 0 ]; then
+        echo "No GPU or NIC NUMA locality found, isolating on every node" >&2
+        for node in "${nodes[@]}"; do
+            local_nodes[$node]=1
+        done
+    fi
+
+    for node in "${nodes[@]}"; do
+        if [ -z "${local_nodes[$node]+set}" ]; then
+            for cpu in ${node_cpus[$node]}; do
+                housekeeping[$cpu]=1
+            done
+            continue
+        fi
+        # The first <count> cores of the node, each with its SMT siblings
+        reserved=0
+        for cpu in ${node_cpus[$node]}; do
+            [ "$reserved" -lt "$count" ] || break
+            [ -z "${housekeeping[$cpu]+set}" ] || continue
+            housekeeping[$cpu]=1
+            if [ -r "${CPU_DIR}/cpu${cpu}/topology/thread_siblings_list" ]; then
+                read -r cpus < "${CPU_DIR}/cpu${cpu}/topology/thread_siblings_list"
+                for sibling in $(expand_cpulist "$cpus"); do
+                    [ -n "${is_online[$sibling]+set}" ] && housekeeping[$sibling]=1
+                done
+            fi
+            reserved=$((reserved + 1))
+        done
+    done
+
+    local isolated=""
+    for node in "${nodes[@]}"; do
+        for cpu in ${node_cpus[$node]}; do
+            [ -n "${housekeeping[$cpu]+set}" ] || isolated+="$cpu"$'\n'
+        done
+    done
+    if [ -z "$isolated" ]; then
+        echo "ERROR: not enough CPUs to isolate any with $count housekeeping cores per node" >&2
+        exit 1
+    fi
+
+    echo "isolated_cores=$(printf '%s' "$isolated" | compress_cpulist)"
+    echo "housekeeping_cores=$(printf '%s\n' "${!housekeeping[@]}" | compress_cpulist)"
+}
+
+main "$@"
@@ -20,8 +20,10 @@
 # 1. Reading intent, accelerator, and service from configmap
 # 2. Constructing the workload profile name as nvidia-{accelerator}-{intent}
 # 3. Final profile name: {service}-{accelerator}-{intent} when service is set, else workload profile name
-# 4. Copying common base profiles to /usr/lib/tuned/
-# 5. Selecting the appropriate OS-specific workload profiles
+# 4. Deploying only that profile and the profiles it includes, for this OS, from the
+#    index built by scripts/compile_tuned_profiles.py (common base profiles go to
+#    /usr/lib/tuned/, OS-specific and workload profiles to /etc/tuned/)
+# 5. Deriving the isolated CPUs of low-latency profiles from the node topology
 # 6. Setting up the service profile with dynamic include
 
 set -xe
@@ -36,6 +38,12 @@ TUNED_USER_DIR="/etc/tuned"
 INTENT_FILE="$CONFIGMAP_DIR/intent"
 ACCELERATOR_FILE="$CONFIGMAP_DIR/accelerator"
 SERVICE_FILE="$CONFIGMAP_DIR/service"
+HOUSEKEEPING_FILE="$CONFIGMAP_DIR/housekeeping_cores_per_node"
+
+SCRIPT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
+
+# Include closures resolved at build time (make compile-tuned-profiles)
+COMPILED_INDEX="$PROFILES_DIR/compiled/index.tsv"
 
 # Detect OS from /etc/os-release
 detect_os() {
@@ -65,58 +73,63 @@ build_profile_name() {
     echo "nvidia-${accelerator}-${intent}"
 }
 
-# Copy common base profiles to /usr/lib/tuned/
-deploy_common_profiles() {
-    echo "Deploying common profiles to $TUNED_SYSTEM_DIR..."
-
-    if [ -d "$PROFILES_DIR/common" ]; then
-        for profile_dir in "$PROFILES_DIR/common"/*/; do
-            [ -d "$profile_dir" ] || continue
-            profile_name=$(basename "$profile_dir")
-            rm -rf "$TUNED_SYSTEM_DIR/$profile_name"
-            cp -rL "$profile_dir" "$TUNED_SYSTEM_DIR/$profile_name"
-            echo "Deployed common profile: $profile_name"
-        done
+# Pick the OS view of the compiled index: <id>/<version> when the package has
+# OS-specific profiles for this node, else "default" (os/common only)
+select_os_view() {
+    if [ -d "$PROFILES_DIR/os/$OS_ID/$VERSION" ]; then
+        OS_VIEW="$OS_ID/$VERSION"
     else
-        echo "WARNING: No common profiles directory found at $PROFILES_DIR/common"
+        OS_VIEW="default"
     fi
+    echo "Using profiles for OS view: $OS_VIEW"
 }
 
-# Deploy ALL OS-specific workload profiles
-deploy_os_profiles() {
-    echo "Deploying OS profiles to $TUNED_USER_DIR..."
-
-    mkdir -p "$TUNED_USER_DIR"
-
-    # Always deploy from os/common first (provides all profiles)
-    if [ -d "$PROFILES_DIR/os/common" ]; then
-        echo "Deploying common OS profiles from: os/common"
-        for profile_dir in "$PROFILES_DIR/os/common"/*/; do
-            [ -d "$profile_dir" ] || continue
-            profile_name=$(basename "$profile_dir")
-            rm -rf "$TUNED_USER_DIR/$profile_name"
-            cp -rL "$profile_dir" "$TUNED_USER_DIR/$profile_name"
-            echo "Deployed common profile: $profile_name"
-        done
-    else
-        echo "WARNING: No common OS profiles found at $PROFILES_DIR/os/common"
+# Deploy the profile and the profiles it includes, as resolved at build time by
+# scripts/compile_tuned_profiles.py into compiled/index.tsv. Profiles from
+# profiles/common go to /usr/lib/tuned/, the others to /etc/tuned/
+deploy_profile_closure() {
+    local profile=$1
+    local service=${2:--}
+    local os svc name dep source dest found=false
+
+    if [ ! -f "$COMPILED_INDEX" ]; then
+        echo "ERROR: compiled profile index not found at $COMPILED_INDEX"
+        exit 1
     fi
 
-    # Then overlay OS-specific profiles (these override common ones)
-    if [ -d "$PROFILES_DIR/os/$OS_ID/$VERSION" ]; then
-        echo "Overlaying OS-specific profiles from: $OS_ID/$VERSION"
-        for profile_dir in "$PROFILES_DIR/os/$OS_ID/$VERSION"/*/; do
-            [ -d "$profile_dir" ] || continue
-            profile_name=$(basename "$profile_dir")
-            rm -rf "$TUNED_USER_DIR/$profile_name"
-            cp -rL "$profile_dir" "$TUNED_USER_DIR/$profile_name"
-            echo "Deployed OS-specific profile: $profile_name"
-        done
+    # Use the service's own copy of the profile when it has one
+    if [ "$service" != "-" ] && ! grep -q "^${OS_VIEW}	${service}	${profile}	" "$COMPILED_INDEX"; then
+        service="-"
     fi
 
-    # Verify we have at least some profiles
-    if [ ! -d "$TUNED_USER_DIR" ] || [ -z "$(ls -A "$TUNED_USER_DIR" 2>/dev/null)" ]; then
-        echo "ERROR: No OS profiles found in os/$OS_ID/$VERSION/ or os/common/"
+    echo "Deploying $profile and its includes..."
+    mkdir -p "$TUNED_SYSTEM_DIR" "$TUNED_USER_DIR"
+    while IFS=$'\t' read -r os svc name dep source; do
+        [ "$os" = "$OS_VIEW" ] && [ "$svc" = "$service" ] && [ "$name" = "$profile" ] || continue
+        found=true
+        case "$source" in
+            -)
+                echo "Using profile shipped with tuned: $dep"
+                continue
+                ;;
+            common/*) dest="$TUNED_SYSTEM_DIR" ;;
+            *) dest="$TUNED_USER_DIR" ;;
+        esac
+        rm -rf "${dest:?}/$dep"
+        if [[ "$source" == *.conf ]]; then
+            mkdir -p "$dest/$dep"
+            cp "$PROFILES_DIR/$source" "$dest/$dep/tuned.conf"
+        else
+            cp -rL "$PROFILES_DIR/$source" "$dest/$dep"
+        fi
+        echo "Deployed profile: $dep ($source -> $dest)"
+    done < <(grep -v '^#' "$COMPILED_INDEX")
+
+    if [ "$found" = "false" ]; then
+        echo "ERROR: Constructed profile '$profile' not found for $OS_VIEW in $COMPILED_INDEX"
+        echo "  intent=$INTENT, accelerator=$ACCELERATOR -> profile=$profile"
+        echo "Available profiles:"
+        awk -F'\t' -v os="$OS_VIEW" '$1 == os && $2 == "-" { print "  " $3 }' "$COMPILED_INDEX" | sort -u
         exit 1
     fi
 }
@@ -136,6 +149,29 @@ validate_profile() {
     echo "Validated profile exists: $profile"
 }
 
+# Profiles that isolate CPUs (low-latency) ship an isolation.conf with their tuned
+# variables; fill it in from this node's topology
+write_cpu_isolation() {
+    local profile=$1
+    local isolation_file="$TUNED_USER_DIR/$profile/isolation.conf"
+    local per_node=2 variables
+
+    [ -f "$isolation_file" ] || return 0
+
+    if [ -f "$HOUSEKEEPING_FILE" ]; then
+        per_node=$(cat "$HOUSEKEEPING_FILE" | xargs)
+    fi
+    if ! variables=$("$SCRIPT_DIR/derive_cpu_isolation.sh" "${per_node:-2}"); then
+        echo "ERROR: could not derive CPU isolation for $profile"
+        exit 1
+    fi
+    {
+        echo "# Derived by prepare_nvidia_profiles.sh from the node topology, $per_node housekeeping cores per node"
+        echo "$variables"
+    } > "$isolation_file"
+    echo "CPU isolation for $profile: $(echo $variables)"
+}
+
 # Build the final profile name: {service}-{accelerator}-{intent} when service is set
 build_final_profile_name() {
     local service=$1
@@ -250,31 +286,29 @@ main() {
 
     # Detect OS
     detect_os
+    select_os_view
 
-    # Deploy common base profiles to /usr/lib/tuned/
-    deploy_common_profiles
+    # Read the optional service first, it can bring its own copy of the profile
+    SERVICE=""
+    if [ -f "$SERVICE_FILE" ]; then
+        SERVICE=$(cat "$SERVICE_FILE" | xargs)
+    fi
 
-    # Deploy ALL OS-specific profiles to /etc/tuned/
-    deploy_os_profiles
+    # Deploy only the selected profile and what it includes
+    deploy_profile_closure "$PROFILE" "${SERVICE:--}"
 
     # Validate the constructed profile exists
     validate_profile "$PROFILE"
-
-    # Check if service is specified (optional)
-    if [ -f "$SERVICE_FILE" ]; then
-        SERVICE=$(cat "$SERVICE_FILE" | xargs)
-        if [ -n "$SERVICE" ]; then
-            echo "Requested service: $SERVICE"
-            FINAL_PROFILE=$(build_final_profile_name "$SERVICE" "$ACCELERATOR" "$INTENT")
-            echo "Final profile name: $FINAL_PROFILE (service=$SERVICE, accelerator=$ACCELERATOR, intent=$INTENT)"
-            deploy_service_profile "$SERVICE" "$PROFILE" "$FINAL_PROFILE"
-            write_tuned_profile "$FINAL_PROFILE"
-        else
-            # No service, use workload profile directly
-            write_tuned_profile "$PROFILE"
-        fi
+    write_cpu_isolation "$PROFILE"
+
+    if [ -n "$SERVICE" ]; then
+        echo "Requested service: $SERVICE"
+        FINAL_PROFILE=$(build_final_profile_name "$SERVICE" "$ACCELERATOR" "$INTENT")
+        echo "Final profile name: $FINAL_PROFILE (service=$SERVICE, accelerator=$ACCELERATOR, intent=$INTENT)"
+        deploy_service_profile "$SERVICE" "$PROFILE" "$FINAL_PROFILE"
+        write_tuned_profile "$FINAL_PROFILE"
     else
-        # No service file, use workload profile directly
+        # No service, use workload profile directly
         write_tuned_profile "$PROFILE"
     fi
 
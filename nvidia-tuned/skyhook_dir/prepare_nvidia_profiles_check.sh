@@ -30,6 +30,7 @@ INTENT_FILE="$CONFIGMAP_DIR/intent"
 ACCELERATOR_FILE="$CONFIGMAP_DIR/accelerator"
 SERVICE_FILE="$CONFIGMAP_DIR/service"
 TUNED_PROFILE_FILE="$CONFIGMAP_DIR/tuned_profile"
+COMPILED_INDEX="$PROFILES_DIR/compiled/index.tsv"
 
 # Build the workload profile name from configmap fields
 build_profile_name() {
@@ -50,73 +51,56 @@ build_final_profile_name() {
     fi
 }
 
-# Verify common profiles are deployed
-verify_common_profiles() {
-    echo "Verifying common profiles in $TUNED_SYSTEM_DIR..."
-
-    if [ -d "$PROFILES_DIR/common" ]; then
-        for profile_dir in "$PROFILES_DIR/common"/*/; do
-            [ -d "$profile_dir" ] || continue
-            profile_name=$(basename "$profile_dir")
-
-            if [ ! -d "$TUNED_SYSTEM_DIR/$profile_name" ]; then
-                echo "ERROR: Common profile missing: $TUNED_SYSTEM_DIR/$profile_name"
-                exit 1
-            fi
-
-            if [ ! -f "$TUNED_SYSTEM_DIR/$profile_name/tuned.conf" ]; then
-                echo "ERROR: tuned.conf missing for common profile: $profile_name"
-                exit 1
-            fi
-
-            echo "Verified common profile: $profile_name"
-        done
-    fi
-}
-
-# Verify ALL OS profiles are deployed
-verify_os_profiles() {
-    echo "Verifying OS profiles in $TUNED_USER_DIR..."
+# Verify the profile and the profiles it includes are deployed, using the same
+# compiled index and OS view as prepare_nvidia_profiles.sh
+verify_profile_closure() {
+    local profile=$1
+    local service=${2:--}
+    local os_id="unknown" version="unknown" os_view os svc name dep source dest found=false
 
-    # We need to check that profiles were deployed from either OS-specific or common
-    # Read OS info to determine expected source
     if [ -f /etc/os-release ]; then
         # shellcheck source=/dev/null
         . /etc/os-release
-        local os_id="${ID:-unknown}"
-        local version="${VERSION_ID:-unknown}"
+        os_id="${ID:-unknown}"
+        version="${VERSION_ID:-unknown}"
         case "$os_id" in
             rhel|centos|rocky|almalinux|amzn)
                 version=$(echo "$version" | cut -d. -f1)
                 ;;
         esac
     fi
-
-    local os_dir=""
+    os_view="default"
     if [ -d "$PROFILES_DIR/os/$os_id/$version" ]; then
-        os_dir="$PROFILES_DIR/os/$os_id/$version"
-    elif [ -d "$PROFILES_DIR/os/common" ]; then
-        os_dir="$PROFILES_DIR/os/common"
+        os_view="$os_id/$version"
     fi
 
-    if [ -n "$os_dir" ]; then
-        for profile_dir in "$os_dir"/*/; do
-            [ -d "$profile_dir" ] || continue
-            local profile_name
-            profile_name=$(basename "$profile_dir")
-
-            if [ ! -d "$TUNED_USER_DIR/$profile_name" ]; then
-                echo "ERROR: OS profile directory missing: $TUNED_USER_DIR/$profile_name"
-                exit 1
-            fi
+    if [ ! -f "$COMPILED_INDEX" ]; then
+        echo "ERROR: compiled profile index not found at $COMPILED_INDEX"
+        exit 1
+    fi
+    if [ "$service" != "-" ] && ! grep -q "^${os_view}	${service}	${profile}	" "$COMPILED_INDEX"; then
+        service="-"
+    fi
 
-            if [ ! -f "$TUNED_USER_DIR/$profile_name/tuned.conf" ]; then
-                echo "ERROR: tuned.conf missing for OS profile: $profile_name"
-                exit 1
-            fi
+    echo "Verifying $profile and its includes ($os_view)..."
+    while IFS=$'\t' read -r os svc name dep source; do
+        [ "$os" = "$os_view" ] && [ "$svc" = "$service" ] && [ "$name" = "$profile" ] || continue
+        found=true
+        case "$source" in
+            -) continue ;;
+            common/*) dest="$TUNED_SYSTEM_DIR" ;;
+            *) dest="$TUNED_USER_DIR" ;;
+        esac
+        if [ ! -f "$dest/$dep/tuned.conf" ]; then
+            echo "ERROR: Profile missing: $dest/$dep/tuned.conf"
+            exit 1
+        fi
+        echo "Verified profile: $dep"
+    done < <(grep -v '^#' "$COMPILED_INDEX")
 
-            echo "Verified OS profile: $profile_name"
-        done
+    if [ "$found" = "false" ]; then
+        echo "ERROR: Profile $profile not found for $os_view in $COMPILED_INDEX"
+        exit 1
     fi
 }
 
@@ -164,6 +148,21 @@ verify_service_profile() {
     echo "Verified service profile: $final_profile_name includes $expected_workload_profile"
 }
 
+# Verify the isolated CPUs of a low-latency profile were derived
+verify_cpu_isolation() {
+    local profile=$1
+    local isolation_file="$TUNED_USER_DIR/$profile/isolation.conf"
+
+    [ -f "$isolation_file" ] || return 0
+    if ! grep -q '^isolated_cores=[0-9]' "$isolation_file"; then
+        echo "ERROR: isolated_cores not derived in $isolation_file"
+        cat "$isolation_file"
+        exit 1
+    fi
+
+    echo "Verified CPU isolation: $(grep '^isolated_cores=' "$isolation_file")"
+}
+
 # Verify tuned_profile file exists and is correct
 verify_tuned_profile_file() {
     local expected_profile=$1
@@ -205,29 +204,25 @@ main() {
     PROFILE=$(build_profile_name "$INTENT" "$ACCELERATOR")
     echo "Verifying constructed profile: $PROFILE (intent=$INTENT, accelerator=$ACCELERATOR)"
 
-    # Verify common profiles are deployed to /usr/lib/tuned/
-    verify_common_profiles
+    SERVICE=""
+    if [ -f "$SERVICE_FILE" ]; then
+        SERVICE=$(cat "$SERVICE_FILE" | xargs)
+    fi
 
-    # Verify ALL OS profiles are deployed to /etc/tuned/
-    verify_os_profiles
+    # Verify the profile and its includes are deployed
+    verify_profile_closure "$PROFILE" "${SERVICE:--}"
 
     # Verify the constructed profile exists
     verify_constructed_profile "$PROFILE"
+    verify_cpu_isolation "$PROFILE"
 
-    # Check if service is specified
-    if [ -f "$SERVICE_FILE" ]; then
-        SERVICE=$(cat "$SERVICE_FILE" | xargs)
-        if [ -n "$SERVICE" ]; then
-            FINAL_PROFILE=$(build_final_profile_name "$SERVICE" "$ACCELERATOR" "$INTENT")
-            # Verify service profile (final name = {service}-{accelerator}-{intent})
-            verify_service_profile "$FINAL_PROFILE" "$PROFILE"
-            verify_tuned_profile_file "$FINAL_PROFILE"
-        else
-            # No service, active profile is the workload profile
-            verify_tuned_profile_file "$PROFILE"
-        fi
+    if [ -n "$SERVICE" ]; then
+        FINAL_PROFILE=$(build_final_profile_name "$SERVICE" "$ACCELERATOR" "$INTENT")
+        # Verify service profile (final name = {service}-{accelerator}-{intent})
+        verify_service_profile "$FINAL_PROFILE" "$PROFILE"
+        verify_tuned_profile_file "$FINAL_PROFILE"
     else
-        # No service file, active profile is the workload profile
+        # No service, active profile is the workload profile
         verify_tuned_profile_file "$PROFILE"
     fi
 
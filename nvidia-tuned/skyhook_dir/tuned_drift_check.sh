@@ -0,0 +1,321 @@
+#!/bin/bash
+
+# SPDX-FileCopyrightText: Copyright (c) 2026 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: Apache-2.0
+#
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Drift check for the active NVIDIA tuned profile.
+#
+# Compares the effective settings of the selected profile, as flattened at build time by
+# scripts/compile_tuned_profiles.py (profiles/compiled/effective/), against the live node
+# in one pass, without going through tuned-adm verify:
+#   [sysctl]      /proc/sys/<key>
+#   [cpu]         governor against every cpu*/cpufreq/scaling_governor
+#   [bootloader]  every token of each cmdline_* value against /proc/cmdline
+#   [modules]     the module is loaded and its parameters under /sys/module/<module>/parameters
+# [variables] (and the files they include) are substituted first. Other settings are
+# reported as "skipped", as are values tuned only expands at runtime (${f:...}).
+#
+# Each setting gets a status: ok, drift (live value differs), missing (not present on the
+# node: no such sysctl, module not loaded, cmdline token absent) or skipped. The report is
+# printed and written as JSON to ${STATE_ROOT}/<package>/drift.json (DRIFT_REPORT_FILE):
+#   {"profile": "...", "os_view": "...", "drift": <count>, "settings": [
+#     {"plugin": "sysctl", "key": "...", "expected": "...", "actual": "...", "status": "ok"}, ...]}
+# Exits 1 if any setting is drift or missing.
+#
+# Environment:
+#   PROC_ROOT, SYS_ROOT  override /proc and /sys (testing)
+#   STATE_ROOT           state directory (default /var/lib/skyhook-packages)
+#   DRIFT_REPORT_FILE    where to write the report
+
+set -u
+
+if [ ${SET_X:-0} -eq 1 ]; then
+set -x
+fi
+
+CONFIGMAP_DIR="${SKYHOOK_DIR}/configmaps"
+PROFILES_DIR="${SKYHOOK_DIR}/profiles"
+EFFECTIVE_DIR="$PROFILES_DIR/compiled/effective"
+PROC_ROOT=${PROC_ROOT:-/proc}
+SYS_ROOT=${SYS_ROOT:-/sys}
+STATE_ROOT=${STATE_ROOT:-/var/lib/skyhook-packages}
+
+package_name=$(echo ${SKYHOOK_RESOURCE_ID:-} | cut -f 2 -d _)
+report_file=${DRIFT_REPORT_FILE:-${STATE_ROOT}/${package_name:-nvidia_tuned}/drift.json}
+
+# Escape $1 for use inside a JSON string
+# Usage: json_escape "$value"; echo "\"$REPLY\""
+json_escape() {
+    local s=$1
+    s=${s//\\/\\\\}
+    s=${s//\"/\\\"}
+    s=${s//$'\t'/\\t}
+    s=${s//$'\n'/\\n}
+    REPLY=$s
+}
+
+# Collapse every run of whitespace in $1 to a single space and trim the ends,
+# without the pathname expansion an unquoted echo would do
+# Usage: squash "4096	87380   6291456"; echo "$REPLY"
+squash() {
+    local -a fields
+    read -r -a fields <<< "${1//[[:space:]]/ }"
+    REPLY="${fields[*]}"
+}
+
+settings=()
+drift=0
+
+# Usage: record <plugin> <key> <expected> <actual> <status>
+record() {
+    local entry
+    json_escape "$1"; entry="{\"plugin\": \"$REPLY\""
+    json_escape "$2"; entry+=", \"key\": \"$REPLY\""
+    json_escape "$3"; entry+=", \"expected\": \"$REPLY\""
+    json_escape "$4"; entry+=", \"actual\": \"$REPLY\""
+    entry+=", \"status\": \"$5\"}"
+    settings+=("$entry")
+    case "$5" in
+        drift|missing)
+            drift=$((drift + 1))
+            printf '%-8s %-10s %s: expected "%s", got "%s"\n' "${5^^}" "$1" "$2" "$3" "$4"
+            ;;
+    esac
+}
+
+# Sets REPLY to the first line of a file with its whitespace collapsed, returns 1 if unreadable
+read_live() {
+    [ -r "$1" ] || return 1
+    REPLY=$( { head -n 1 "$1"; } 2>/dev/null) || return 1
+    squash "$REPLY"
+}
+
+# Sets OS_VIEW the way prepare_nvidia_profiles.sh picks it: <id>/<version> when the
+# package has OS-specific profiles for this node, else "default"
+select_os_view() {
+    local os_id="unknown" version="unknown"
+    if [ -f /etc/os-release ]; then
+        # shellcheck source=/dev/null
+        os_id=$(. /etc/os-release; echo "${ID:-unknown}")
+        version=$(. /etc/os-release; echo "${VERSION_ID:-unknown}")
+        case "$os_id" in
+            rhel|centos|rocky|almalinux|amzn) version=$(echo "$version" | cut -d. -f1) ;;
+        esac
+    fi
+    if [ -d "$PROFILES_DIR/os/$os_id/$version" ]; then
+        OS_VIEW="$os_id/$version"
+    else
+        OS_VIEW="default"
+    fi
+}
+
+check_sysctl() {
+    local key=$1 expected=$2 path live
+    path="${PROC_ROOT}/sys/${key//.//}"
+    if ! read_live "$path"; then
+        record sysctl "$key" "$expected" "" missing
+        return
+    fi
+    live=$REPLY
+    squash "$expected"
+    if [ "$live" = "$REPLY" ]; then
+        record sysctl "$key" "$expected" "$live" ok
+    else
+        record sysctl "$key" "$expected" "$live" drift
+    fi
+}
+
+# governor may list alternatives (performance|powersave), every CPU must run one of them
+check_governor() {
+    local expected=$1 f actual="" status=ok
+    local -A seen=()
+    for f in "${SYS_ROOT}"/devices/system/cpu/cpu[0-9]*/cpufreq/scaling_governor; do
+        read_live "$f" || continue
+        if [ -z "${seen[$REPLY]+set}" ]; then
+            seen[$REPLY]=1
+            actual+="${actual:+,}$REPLY"
+        fi
+        case "|$expected|" in *"|$REPLY|"*) ;; *) status=drift ;; esac
+    done
+    # No cpufreq (common on VMs): tuned can't set a governor either
+    [ -n "$actual" ] || status=skipped
+    record cpu governor "$expected" "$actual" "$status"
+}
+
+check_cmdline() {
+    local key=$1 expected=$2 cmdline token live actual="" status=ok
+    local -a tokens live_tokens
+    read_live "${PROC_ROOT}/cmdline" || REPLY=""
+    cmdline=" $REPLY "
+    read -r -a live_tokens <<< "$REPLY"
+    read -r -a tokens <<< "$expected"
+    for token in "${tokens[@]}"; do
+        case "$cmdline" in *" $token "*) ;; *) status=missing ;; esac
+        # Report what the node has for the same parameter names
+        for live in "${live_tokens[@]}"; do
+            [ "${live%%=*}" = "${token%%=*}" ] || continue
+            case " $actual " in *" $live "*) ;; *) actual+="${actual:+ }$live" ;; esac
+        done
+    done
+    if [ "$status" = ok ]; then
+        actual="${tokens[*]}"
+    elif [ -n "$actual" ]; then
+        status=drift
+    fi
+    record bootloader "$key" "$expected" "$actual" "$status"
+}
+
+# Like tuned's verify, "+r" is only a load flag and parameters the module doesn't export are skipped
+check_module() {
+    local module=$1 options=$2 option param value
+    local -a option_list
+    if [ ! -d "${SYS_ROOT}/module/${module}" ]; then
+        record modules "$module" loaded "" missing
+        return
+    fi
+    record modules "$module" loaded loaded ok
+    read -r -a option_list <<< "$options"
+    for option in "${option_list[@]}"; do
+        [ "$option" = "+r" ] && continue
+        param=${option%%=*}
+        value=${option#*=}
+        if ! read_live "${SYS_ROOT}/module/${module}/parameters/${param}"; then
+            record modules "${module}.${param}" "$value" "" skipped
+        elif [ "$REPLY" = "$value" ]; then
+            record modules "${module}.${param}" "$value" "$REPLY" ok
+        else
+            record modules "${module}.${param}" "$value" "$REPLY" drift
+        fi
+    done
+}
+
+# Load the profile's [variables] (and the files they include) into VARIABLES, so
+# values like ${isolated_cores} can be checked
+declare -A VARIABLES=()
+load_variables() {
+    local key value line setting
+    while IFS=$'\t' read -r key value; do
+        if [ "$key" != include ]; then
+            VARIABLES[$key]=$value
+            continue
+        fi
+        [ -f "$value" ] || continue
+        while IFS= read -r line; do
+            case "$line" in \#*|'') continue ;; esac
+            [[ "$line" == *=* ]] || continue
+            key=${line%%=*}
+            squash "${line#*=}"
+            setting=$REPLY
+            squash "$key"
+            VARIABLES[$REPLY]=$setting
+        done < "$value"
+    done < <(awk '
+        /^\[/ { section = substr($0, 2, length($0) - 2); next }
+        section == "variables" && (i = index($0, "=")) { print substr($0, 1, i - 1) "\t" substr($0, i + 1) }' "$1")
+}
+
+main() {
+    local intent accelerator service="" profile effective section key value name json sep s
+
+    intent=$(cat "$CONFIGMAP_DIR/intent" 2>/dev/null | xargs)
+    accelerator=$(cat "$CONFIGMAP_DIR/accelerator" 2>/dev/null | xargs)
+    if [ -f "$CONFIGMAP_DIR/service" ]; then
+        service=$(cat "$CONFIGMAP_DIR/service" | xargs)
+    fi
+    if [ -z "$accelerator" ]; then
+        echo "ERROR: accelerator configmap not found at $CONFIGMAP_DIR/accelerator"
+        exit 1
+    fi
+    profile="nvidia-${accelerator}-${intent:-performance}"
+
+    select_os_view
+    effective="$EFFECTIVE_DIR/$OS_VIEW/$profile.conf"
+    if [ -n "$service" ] && [ -f "$EFFECTIVE_DIR/$OS_VIEW/$service/$profile.conf" ]; then
+        effective="$EFFECTIVE_DIR/$OS_VIEW/$service/$profile.conf"
+    fi
+    if [ ! -f "$effective" ]; then
+        echo "ERROR: effective profile not found at $effective"
+        exit 1
+    fi
+    echo "Checking $profile ($OS_VIEW${service:+, service $service}) against the node"
+
+    load_variables "$effective"
+    while IFS=$'\t' read -r section key value; do
+        for name in "${!VARIABLES[@]}"; do
+            [ -n "${VARIABLES[$name]}" ] && value=${value//"\${$name}"/"${VARIABLES[$name]}"}
+        done
+        case "$value" in
+            *'${'*)
+                record "$section" "$key" "$value" "" skipped
+                continue
+                ;;
+        esac
+        case "$section" in
+            sysctl) check_sysctl "$key" "$value" ;;
+            cpu)
+                if [ "$key" = governor ]; then
+                    check_governor "$value"
+                else
+                    record cpu "$key" "$value" "" skipped
+                fi
+                ;;
+            bootloader)
+                if [[ "$key" == cmdline* ]]; then
+                    check_cmdline "$key" "$value"
+                else
+                    record bootloader "$key" "$value" "" skipped
+                fi
+                ;;
+            modules) check_module "$key" "$value" ;;
+            *) record "$section" "$key" "$value" "" skipped ;;
+        esac
+    done < <(awk '
+        /^[ \t]*([#;]|$)/ { next }
+        /^\[/ { section = substr($0, 2, length($0) - 2); next }
+        section == "main" || section == "script" || section == "variables" { next }
+        # Script plugin instances (type=script) verify themselves
+        $0 == "type=script" { scripted[section] = 1 }
+        section in scripted { next }
+        {
+            i = index($0, "=")
+            if (i == 0) next
+            print section "\t" substr($0, 1, i - 1) "\t" substr($0, i + 1)
+        }' "$effective")
+
+    json_escape "$(cat "$CONFIGMAP_DIR/tuned_profile" 2>/dev/null | xargs)"
+    json="{\"profile\": \"${REPLY:-$profile}\", \"os_view\": \"${OS_VIEW}\", \"drift\": ${drift}, \"settings\": ["
+    sep=""
+    for s in "${settings[@]}"; do
+        json+="${sep}${s}"
+        sep=", "
+    done
+    json+="]}"
+
+    echo "-------------------------"
+    echo "Settings checked: ${#settings[@]}, drifted: ${drift}"
+    echo "${json}"
+
+    if mkdir -p "$(dirname "${report_file}")" 2>/dev/null && echo "${json}" > "${report_file}.tmp" 2>/dev/null; then
+        mv -f "${report_file}.tmp" "${report_file}"
+        echo "Drift report written to ${report_file}"
+    else
+        echo "WARNING: could not write drift report to ${report_file}"
+    fi
+
+    [ "$drift" -eq 0 ]
+}
+
+main "$@"
@@ -0,0 +1,302 @@
+#!/usr/bin/env python3
+
+# SPDX-FileCopyrightText: Copyright (c) 2026 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: Apache-2.0
+#
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Profile compiler for nvidia-tuned
+
+Resolves the include= chains of the nvidia-tuned profiles for every OS view the
+package supports (profiles/os/common, overlaid by profiles/os/<id>/<version>,
+on top of profiles/common) and writes into profiles/compiled/:
+
+  index.tsv   one line per profile and dependency, in the order tuned loads them:
+                <os> <service> <profile> <dependency> <source>
+              <os> is "default" (os/common only) or <id>/<version>, <service> is "-"
+              or a service with its own copy of the profile, <source> is the
+              directory (or service .conf file) relative to profiles/, "-" for
+              profiles tuned ships itself. prepare_nvidia_profiles.sh reads it
+              to deploy only what the selected profile needs.
+  effective/<os>[/<service>]/<profile>.conf
+              the profile with its includes merged the way tuned merges them,
+              for review and for comparing against a node.
+
+Hosts have no python, so everything the apply needs is plain text.
+
+Usage:
+  compile_tuned_profiles.py [--profiles-dir nvidia-tuned/profiles] [--check]
+"""
+
+import argparse
+import difflib
+import os
+import sys
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+DEFAULT_OS = "default"
+NO_SERVICE = "-"
+EXTERNAL = "-"
+HEADER = "# Generated by scripts/compile_tuned_profiles.py, do not edit.\n"
+
+# Where tuned looks a profile up, in order: /etc/tuned wins over /usr/lib/tuned
+SYSTEM_DIR = "/usr/lib/tuned"
+USER_DIR = "/etc/tuned"
+
+
+def parse_profile(path: str) -> "OrderedDict[str, OrderedDict[str, str]]":
+    """
+    Parse a tuned.conf into sections of key -> value, in file order.
+
+    Args:
+        path: Path to the tuned.conf
+
+    Returns:
+        Ordered mapping of section name to ordered key/value mapping
+    """
+    sections: "OrderedDict[str, OrderedDict[str, str]]" = OrderedDict()
+    current = None
+    with open(path) as f:
+        for raw in f:
+            line = raw.strip()
+            if not line or line.startswith("#") or line.startswith(";"):
+                continue
+            if line.startswith("[") and line.endswith("]"):
+                current = sections.setdefault(line[1:-1].strip(), OrderedDict())
+                continue
+            if current is None or "=" not in line:
+                continue
+            key, value = line.split("=", 1)
+            current[key.strip()] = value.strip()
+    return sections
+
+
+def includes(sections: "OrderedDict[str, OrderedDict[str, str]]") -> List[str]:
+    """Return the profiles named by include= in [main]."""
+    value = sections.get("main", {}).get("include", "")
+    return [name for name in value.replace(",", " ").split() if name]
+
+
+class ProfileView:
+    """
+    The profiles tuned would see on a node of one OS, name -> (source, destination).
+
+    Args:
+        profiles_dir: The package's profiles/ directory
+        os_key: "default" or "<id>/<version>"
+        service: Optional service whose <profile>.conf files (or <profile>/ directories, for a
+                 profile with more files than its tuned.conf) replace the workload profiles
+    """
+
+    def __init__(self, profiles_dir: str, os_key: str, service: Optional[str] = None):
+        self.profiles_dir = profiles_dir
+        self.sources: Dict[str, Tuple[str, str]] = {}
+        # Lowest precedence first, later entries replace earlier ones
+        layers = [("common", SYSTEM_DIR), ("os/common", USER_DIR)]
+        if os_key != DEFAULT_OS:
+            layers.append((f"os/{os_key}", USER_DIR))
+        for rel, dest in layers:
+            root = os.path.join(profiles_dir, rel)
+            if not os.path.isdir(root):
+                continue
+            for name in sorted(os.listdir(root)):
+                if os.path.isfile(os.path.join(root, name, "tuned.conf")):
+                    self.sources[name] = (f"{rel}/{name}", dest)
+        self.overridden: List[str] = []
+        if service:
+            root = os.path.join(profiles_dir, "service", service)
+            for entry in sorted(os.listdir(root)):
+                name, ext = os.path.splitext(entry)
+                if os.path.isfile(os.path.join(root, entry, "tuned.conf")):
+                    name = entry
+                elif ext != ".conf":
+                    continue
+                if name in self.sources:
+                    self.sources[name] = (f"service/{service}/{entry}", USER_DIR)
+                    self.overridden.append(name)
+
+    def conf_path(self, name: str) -> str:
+        source = self.sources[name][0]
+        path = os.path.join(self.profiles_dir, source)
+        return path if source.endswith(".conf") else os.path.join(path, "tuned.conf")
+
+    def closure(self, name: str, stack: Tuple[str, ...] = ()) -> List[str]:
+        """
+        Return the profile and everything it includes, in the order tuned loads them.
+
+        Raises:
+            ValueError: On an include cycle
+        """
+        if name in stack:
+            raise ValueError(f"include cycle: {' -> '.join(stack + (name,))}")
+        if name not in self.sources:
+            return [name]
+        order: List[str] = []
+        for inc in includes(parse_profile(self.conf_path(name))):
+            for dep in self.closure(inc, stack + (name,)):
+                if dep not in order:
+                    order.append(dep)
+        order.append(name)
+        return order
+
+    def effective(self, name: str) -> "OrderedDict[str, OrderedDict[str, str]]":
+        """
+        Merge a profile with its includes: included profiles first, then the
+        profile's own sections override key by key. A section with replace=1
+        drops what the includes set for it, and [script] scripts accumulate.
+        """
+        merged: "OrderedDict[str, OrderedDict[str, str]]" = OrderedDict()
+        for dep in self.closure(name):
+            if dep not in self.sources:
+                continue
+            profile_dir = f"{self.sources[dep][1]}/{dep}"
+            for section, options in parse_profile(self.conf_path(dep)).items():
+                if section == "main":
+                    continue
+                options = OrderedDict(
+                    (k, v.replace("${i:PROFILE_DIR}", profile_dir)) for k, v in options.items()
+                )
+                if options.get("replace", "").lower() in ("1", "true", "yes") or section not in merged:
+                    merged[section] = OrderedDict()
+                target = merged[section]
+                for key, value in options.items():
+                    if key == "replace":
+                        continue
+                    if key == "script" and key in target:
+                        target[key] = f"{target[key]} {value}"
+                    else:
+                        target[key] = value
+        own = parse_profile(self.conf_path(name)).get("main", {})
+        main: "OrderedDict[str, str]" = OrderedDict()
+        if "summary" in own:
+            main["summary"] = own["summary"]
+        main["closure"] = " ".join(self.closure(name))
+        merged["main"] = main
+        merged.move_to_end("main", last=False)
+        return merged
+
+
+def os_keys(profiles_dir: str) -> List[str]:
+    """Return "default" and every <id>/<version> under profiles/os."""
+    keys = [DEFAULT_OS]
+    os_root = os.path.join(profiles_dir, "os")
+    for os_id in sorted(os.listdir(os_root)):
+        if os_id == "common" or not os.path.isdir(os.path.join(os_root, os_id)):
+            continue
+        for version in sorted(os.listdir(os.path.join(os_root, os_id))):
+            if os.path.isdir(os.path.join(os_root, os_id, version)):
+                keys.append(f"{os_id}/{version}")
+    return keys
+
+
+def services(profiles_dir: str) -> List[str]:
+    root = os.path.join(profiles_dir, "service")
+    if not os.path.isdir(root):
+        return []
+    return sorted(d for d in os.listdir(root) if os.path.isdir(os.path.join(root, d)))
+
+
+def render_effective(sections: "OrderedDict[str, OrderedDict[str, str]]") -> str:
+    lines = [HEADER.rstrip("\n")]
+    for section, options in sections.items():
+        lines.append("")
+        lines.append(f"[{section}]")
+        lines.extend(f"{k}={v}" for k, v in options.items())
+    return "\n".join(lines) + "\n"
+
+
+def compile_profiles(profiles_dir: str) -> Dict[str, str]:
+    """
+    Compile every OS view of the profiles.
+
+    Args:
+        profiles_dir: The package's profiles/ directory
+
+    Returns:
+        Mapping of path relative to profiles/compiled to file content
+    """
+    outputs: Dict[str, str] = {}
+    index = [HEADER + "# os\tservice\tprofile\tdependency\tsource"]
+    for os_key in os_keys(profiles_dir):
+        views = [(NO_SERVICE, ProfileView(profiles_dir, os_key))]
+        views += [(svc, ProfileView(profiles_dir, os_key, svc)) for svc in services(profiles_dir)]
+        for service, view in views:
+            names = sorted(view.sources) if service == NO_SERVICE else view.overridden
+            for name in names:
+                for dep in view.closure(name):
+                    source = view.sources[dep][0] if dep in view.sources else EXTERNAL
+                    index.append(f"{os_key}\t{service}\t{name}\t{dep}\t{source}")
+                rel = os.path.join("effective", os_key, "" if service == NO_SERVICE else service, f"{name}.conf")
+                outputs[os.path.normpath(rel)] = render_effective(view.effective(name))
+    outputs["index.tsv"] = "\n".join(index) + "\n"
+    return outputs
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Resolve nvidia-tuned profile includes into profiles/compiled")
+    parser.add_argument("--profiles-dir", default="nvidia-tuned/profiles", help="Profiles directory of the package")
+    parser.add_argument("--check", action="store_true",
+                        help="Only check that profiles/compiled is up to date, exit 1 if not")
+    args = parser.parse_args()
+
+    compiled_dir = os.path.join(args.profiles_dir, "compiled")
+    try:
+        outputs = compile_profiles(args.profiles_dir)
+    except ValueError as e:
+        print(f"ERROR: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    existing = set()
+    if os.path.isdir(compiled_dir):
+        for root, _, files in os.walk(compiled_dir):
+            for name in files:
+                existing.add(os.path.relpath(os.path.join(root, name), compiled_dir))
+
+    stale = False
+    for rel, content in sorted(outputs.items()):
+        path = os.path.join(compiled_dir, rel)
+        current = None
+        if os.path.isfile(path):
+            with open(path) as f:
+                current = f.read()
+        if current == content:
+            continue
+        stale = True
+        if args.check:
+            print(f"ERROR: {path} is out of date")
+            sys.stdout.writelines(difflib.unified_diff(
+                (current or "").splitlines(keepends=True), content.splitlines(keepends=True), path, "compiled"))
+            continue
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(content)
+        print(f"Wrote {path}")
+    for rel in sorted(existing - set(outputs)):
+        stale = True
+        path = os.path.join(compiled_dir, rel)
+        if args.check:
+            print(f"ERROR: {path} is no longer generated")
+            continue
+        os.remove(path)
+        print(f"Removed {path}")
+
+    if args.check and stale:
+        print("Run: make compile-tuned-profiles")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
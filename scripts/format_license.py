@@ -30,9 +30,11 @@ Key Features:
 - Normalizes license content for accurate comparison
 - Ignores vendor directories and other unwanted files
 - Uses SPDX headers for modern license identification
+- Optionally limits the run to files changed relative to a git ref (or the staged
+  set), falling back to a persistent mtime/size/hash cache outside of git
 
 Workflow:
-1. Scan directories for supported file types
+1. Scan directories for supported file types (or collect the changed files)
 2. For each file, check if it has a license header
 3. If no header exists, add one
 4. If header exists but is outdated, replace it
@@ -41,8 +43,11 @@ Workflow:
 
 import os
 import argparse
+import hashlib
+import json
 import re
-from typing import List, Tuple
+import subprocess
+from typing import Dict, List, Optional, Tuple
 import fnmatch
 
 # Comment style definitions for different file types
@@ -83,6 +88,13 @@ BUILT_IN_IGNORE_PATTERNS = [
     'chart/*'        # Anything inside chart directory
 ]
 
+# Default location of the incremental cache, relative to --root-dir
+# Only used when incremental mode is requested and git is not available
+DEFAULT_CACHE_FILE = '.license-fmt-cache.json'
+
+# Bump when the cache layout changes so stale caches are discarded
+CACHE_VERSION = 1
+
 def is_block_comment(comment_prefix: str) -> bool:
     """
     Check if the comment style uses block comments (/* */) vs line comments (#).
@@ -279,6 +291,181 @@ def find_files(root_dir: str, patterns: List[str], ignore_patterns: List[str]) -
                     
     return matches
 
+def filter_files(root_dir: str, candidates: List[str], patterns: List[str], ignore_patterns: List[str]) -> List[str]:
+    """
+    Apply the same filtering as find_files to an explicit list of candidate files.
+    
+    Args:
+        root_dir: Root directory the candidates are relative to
+        candidates: List of file paths relative to root_dir (e.g., from git diff)
+        patterns: List of regex patterns to match against filenames
+        ignore_patterns: List of fnmatch patterns for files/directories to ignore
+        
+    Returns:
+        List of absolute file paths that match the patterns and aren't ignored
+        
+    This lets incremental runs skip the directory walk entirely, so the cost is
+    proportional to the number of changed files rather than the size of the tree.
+    """
+    matches = []
+    
+    for rel_path in candidates:
+        # Normalize separators so ignore patterns behave like they do in find_files
+        rel_path = os.path.normpath(rel_path)
+        
+        # Deleted or renamed-away files show up in diffs but have nothing to format
+        abs_path = os.path.join(root_dir, rel_path)
+        if not os.path.isfile(abs_path):
+            continue
+        
+        # Check both the containing directory and the file itself, like find_files
+        if should_ignore(os.path.dirname(rel_path) or '.', ignore_patterns):
+            continue
+        if should_ignore(rel_path, ignore_patterns):
+            continue
+        
+        filename = os.path.basename(rel_path)
+        for pattern in patterns:
+            if re.match(pattern, filename):
+                matches.append(abs_path)
+                break  # No need to check other patterns once we have a match
+    
+    return matches
+
+def git_changed_files(root_dir: str, base_ref: Optional[str], staged: bool) -> Optional[List[str]]:
+    """
+    List files changed relative to a git ref, or the files in the staged set.
+    
+    Args:
+        root_dir: Directory inside the git work tree to run git from
+        base_ref: Ref to diff the work tree against (e.g., 'origin/main')
+        staged: When True, only list files staged in the index
+        
+    Returns:
+        List of paths relative to root_dir, or None when git is not installed
+        or root_dir is not inside a work tree (callers fall back to the cache)
+        
+    Untracked files are included when diffing against a ref, since new files are
+    exactly the ones most likely to be missing a header.
+    """
+    # Only added, copied, modified and renamed files can need a header
+    # --relative keeps paths relative to root_dir even when it's a subdirectory
+    if staged:
+        commands = [['git', 'diff', '--cached', '--name-only', '--relative', '--diff-filter=ACMR']]
+    else:
+        commands = [
+            ['git', 'diff', '--name-only', '--relative', '--diff-filter=ACMR', base_ref],
+            ['git', 'ls-files', '--others', '--exclude-standard'],
+        ]
+    
+    changed = []
+    for command in commands:
+        try:
+            result = subprocess.run(command, cwd=root_dir, capture_output=True, text=True, check=True)
+        except (OSError, subprocess.CalledProcessError):
+            # git missing, not a work tree, or unknown ref
+            return None
+        changed.extend(line for line in result.stdout.splitlines() if line)
+    
+    # Preserve order while dropping duplicates
+    return list(dict.fromkeys(changed))
+
+def file_digest(file_path: str) -> str:
+    """
+    Compute the sha256 digest of a file's content.
+    
+    Args:
+        file_path: Path to the file to hash
+        
+    Returns:
+        Hex encoded sha256 digest
+    """
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(65536), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def load_cache(cache_path: str, license_digest: str) -> Dict[str, dict]:
+    """
+    Load the incremental cache, discarding it if it was built for another license.
+    
+    Args:
+        cache_path: Path to the JSON cache file
+        license_digest: Digest of the formatted license headers for this run
+        
+    Returns:
+        Mapping of relative file path to its recorded mtime_ns, size and sha256
+        
+    A change to the LICENSE file or --year changes the expected header for every
+    file, so a cache recorded for a different header is ignored entirely.
+    """
+    try:
+        with open(cache_path, 'r') as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    
+    if cache.get('version') != CACHE_VERSION or cache.get('license') != license_digest:
+        return {}
+    return cache.get('files', {})
+
+def save_cache(cache_path: str, license_digest: str, entries: Dict[str, dict]) -> None:
+    """
+    Persist the incremental cache atomically.
+    
+    Args:
+        cache_path: Path to the JSON cache file
+        license_digest: Digest of the formatted license headers for this run
+        entries: Mapping of relative file path to its recorded stat and digest
+    """
+    tmp_path = cache_path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump({'version': CACHE_VERSION, 'license': license_digest, 'files': entries}, f, indent=1, sort_keys=True)
+    os.replace(tmp_path, cache_path)
+
+def is_unchanged(file_path: str, entry: Optional[dict]) -> bool:
+    """
+    Check a file against its cache entry, cheapest test first.
+    
+    Args:
+        file_path: Path to the file to check
+        entry: Cache entry recorded after the file was last processed, if any
+        
+    Returns:
+        True if the file content is the same as when it was last processed
+        
+    Matching mtime and size is trusted without reading the file. When only the
+    mtime moved (e.g., a fresh checkout or touch), the content hash decides and
+    the entry is refreshed so the next run takes the fast path again.
+    """
+    if not entry:
+        return False
+    
+    stat = os.stat(file_path)
+    if stat.st_mtime_ns == entry.get('mtime_ns') and stat.st_size == entry.get('size'):
+        return True
+    if stat.st_size != entry.get('size'):
+        return False
+    
+    if file_digest(file_path) == entry.get('sha256'):
+        entry['mtime_ns'] = stat.st_mtime_ns
+        return True
+    return False
+
+def cache_entry(file_path: str) -> dict:
+    """
+    Build a cache entry for a file in its current (already formatted) state.
+    
+    Args:
+        file_path: Path to the file to record
+        
+    Returns:
+        Dictionary with the file's mtime_ns, size and sha256
+    """
+    stat = os.stat(file_path)
+    return {'mtime_ns': stat.st_mtime_ns, 'size': stat.st_size, 'sha256': file_digest(file_path)}
+
 def find_existing_license(content: str) -> Tuple[int, int]:
     """
     Find the start and end positions of an existing license header in file content.
@@ -468,12 +655,17 @@ def main():
 
     Usage:
         ./format_license.py [--license-file PATH] [--root-dir PATH] [--year YEAR] [--verbose]
+                            [--base-ref REF | --staged] [--cache-file PATH]
 
     Arguments:
         --license-file : Path to the Apache 2.0 license file (default: LICENSE)
         --root-dir     : Root directory to search for files (default: current directory)
         --year         : Year to use in SPDX copyright header (default: current year)
         --verbose      : Show detailed messages, including when licenses are already formatted
+        --base-ref     : Only process files changed relative to this git ref (plus untracked files)
+        --staged       : Only process files in the git staged set
+        --cache-file   : Cache used by --base-ref/--staged when git is unavailable
+                         (default: <root-dir>/.license-fmt-cache.json)
 
     Example:
         # Format all supported files in the current directory
@@ -485,16 +677,31 @@ def main():
         # Format files with a specific year in the SPDX header
         ./format_license.py --year 2024
 
+        # Format only what changed on this branch
+        ./format_license.py --base-ref origin/main
+
+        # Format only what is about to be committed (e.g., from a pre-commit hook)
+        ./format_license.py --staged
+
     Note:
         The script automatically ignores common vendor directories.
         The chart/ directory is also ignored by default. See BUILT_IN_IGNORE_PATTERNS for more details.
+
+        When --base-ref or --staged is given but git can't be used (not installed, not a
+        work tree, unknown ref), the script walks the tree as usual but skips files whose
+        mtime/size/sha256 match the cache entry recorded the last time they were processed.
     """
     parser = argparse.ArgumentParser(description='Format and apply license headers to source files')
     parser.add_argument('--license-file', default='LICENSE',  help='Path to the license template file')
     parser.add_argument('--root-dir', default='.',  help='Root directory to search for files')
     parser.add_argument('--year', help='Year to use in SPDX copyright header (default: current year)')
     parser.add_argument('--verbose', action='store_true', help='Show detailed messages, including when licenses are already formatted')
+    changed = parser.add_mutually_exclusive_group()
+    changed.add_argument('--base-ref', help='Only process files changed relative to this git ref (plus untracked files)')
+    changed.add_argument('--staged', action='store_true', help='Only process files in the git staged set')
+    parser.add_argument('--cache-file', help=f'Cache used when git is unavailable (default: <root-dir>/{DEFAULT_CACHE_FILE})')
     args = parser.parse_args()
+    incremental = args.staged or args.base_ref is not None
 
     # Step 1: Read and extract the license boilerplate from the LICENSE file
     # This automatically extracts just the part needed for source file headers
@@ -504,19 +711,54 @@ def main():
     # Use built-in patterns to ignore vendor directories, etc.
     ignore_patterns = BUILT_IN_IGNORE_PATTERNS
 
-    # Step 3: Process each supported file type
+    # Format the license text for each file type up front
+    # This adds appropriate comment characters and SPDX headers
+    formatted_licenses = {
+        pattern: format_license(license_text, comment_prefix, args.year)
+        for pattern, comment_prefix in COMMENT_STYLES.items()
+    }
+
+    # Step 3: Work out which files to look at
+    # Full runs walk the whole tree; incremental runs ask git for the changed set
+    changed_files = None
+    cache_path = None
+    cache = {}
+    if incremental:
+        changed_files = git_changed_files(args.root_dir, args.base_ref, args.staged)
+        if changed_files is None:
+            # No usable git: walk the tree but skip files that match the cache
+            cache_path = args.cache_file or os.path.join(args.root_dir, DEFAULT_CACHE_FILE)
+            license_digest = hashlib.sha256('\0'.join(formatted_licenses.values()).encode()).hexdigest()
+            cache = load_cache(cache_path, license_digest)
+            print(f"git is not available, using cache {cache_path}")
+
+    # Step 4: Process each supported file type
     # Each file type has its own regex pattern and comment prefix
-    for pattern, comment_prefix in COMMENT_STYLES.items():
-        # Format the license text for this specific file type
-        # This adds appropriate comment characters and SPDX headers
-        formatted_license = format_license(license_text, comment_prefix, args.year)
-        
-        # Find all files matching this pattern in the directory tree
-        files = find_files(args.root_dir, [pattern], ignore_patterns)
+    seen = {}
+    for pattern, formatted_license in formatted_licenses.items():
+        if changed_files is not None:
+            # Only the changed files that match this pattern
+            files = filter_files(args.root_dir, changed_files, [pattern], ignore_patterns)
+        else:
+            # Find all files matching this pattern in the directory tree
+            files = find_files(args.root_dir, [pattern], ignore_patterns)
         
         # Process each file: add, update, or skip license as needed
         for file_path in files:
+            if cache_path is not None:
+                rel_path = os.path.relpath(file_path, args.root_dir)
+                entry = cache.get(rel_path)
+                if is_unchanged(file_path, entry):
+                    seen[rel_path] = entry
+                    continue
             insert_license(file_path, formatted_license, args.verbose)
+            if cache_path is not None:
+                # Record the post-formatting state so the next run can skip it
+                seen[rel_path] = cache_entry(file_path)
+
+    # Step 5: Persist the cache; files that no longer exist simply drop out
+    if cache_path is not None:
+        save_cache(cache_path, license_digest, seen)
 
 if __name__ == '__main__':
     main()
\ No newline at end of file
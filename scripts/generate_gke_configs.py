@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+
+# SPDX-FileCopyrightText: Copyright (c) 2026 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: Apache-2.0
+#
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+GKE config generator for nvidia-tuning-gke
+
+Flattens the nvidia-tuned profiles (os/common view, includes merged the way
+compile_tuned_profiles.py merges them) into the layout nvidia-tuning-gke bakes
+in, for every profiles/<accelerator>/<intent>/ directory of that package:
+
+  sysctl.conf          the [sysctl] section of nvidia-<accelerator>-<intent>
+  service_<name>.conf  systemd drop-ins the profile's script plugins install
+                       (scripts with DROPIN_DIR=/etc/systemd/system/<name>.service.d
+                       and EXPECTED_CONTENT='...', like containerd_service.sh)
+  not_applied.txt      the settings GKE can't express (kernel command line, CPU,
+                       modules, other plugins and scripts, values tuned expands at
+                       runtime), so a change to a tuned profile shows what GKE misses
+
+Adding a GKE profile is creating its directory and running the generator.
+
+Usage:
+  generate_gke_configs.py [--tuned-profiles-dir nvidia-tuned/profiles]
+                          [--gke-profiles-dir nvidia-tuning-gke/profiles] [--check]
+"""
+
+import argparse
+import difflib
+import os
+import re
+import sys
+from typing import Dict, List, Optional, Tuple
+
+from compile_tuned_profiles import DEFAULT_OS, ProfileView
+
+HEADER = "# Generated by scripts/generate_gke_configs.py from {profile}, do not edit.\n"
+
+# Why a tuned plugin has no GKE equivalent, other plugins get DEFAULT_REASON
+REASONS = {
+    "bootloader": "kernel command line, GKE nodes don't boot through grub",
+    "cpu": "CPU governor and PM QoS aren't available on Container-Optimized OS",
+    "modules": "kernel modules can't be loaded on Container-Optimized OS",
+    "scheduler": "needs tuned's scheduler plugin at runtime",
+    "script": "script plugin",
+}
+DEFAULT_REASON = "no GKE equivalent for the tuned {plugin} plugin"
+RUNTIME_REASON = "value expanded by tuned at runtime"
+
+DROPIN_DIR = re.compile(r"^DROPIN_DIR=/etc/systemd/system/([\w@.-]+)\.service\.d\s*$", re.MULTILINE)
+EXPECTED_CONTENT = re.compile(r"^EXPECTED_CONTENT='(.*?)'\s*$", re.MULTILINE | re.DOTALL)
+
+
+def script_source(view: ProfileView, tuned_profiles_dir: str, path: str) -> Optional[str]:
+    """
+    Map a deployed script path (/etc/tuned/<profile>/x.sh) back to the file in the package.
+
+    Returns:
+        Path of the script under the tuned profiles directory, None if it isn't one of ours
+    """
+    profile, name = os.path.basename(os.path.dirname(path)), os.path.basename(path)
+    if profile not in view.sources or view.sources[profile][0].endswith(".conf"):
+        return None
+    return os.path.join(tuned_profiles_dir, view.sources[profile][0], name)
+
+
+def dropin(script: str) -> Optional[Tuple[str, str]]:
+    """
+    Return (service, content) of the systemd drop-in a script plugin installs, if it
+    only installs a fixed drop-in.
+    """
+    with open(script) as f:
+        text = f.read()
+    service, content = DROPIN_DIR.search(text), EXPECTED_CONTENT.search(text)
+    if not service or not content:
+        return None
+    return service.group(1), content.group(1)
+
+
+def generate(tuned_profiles_dir: str, accelerator: str, intent: str) -> Dict[str, str]:
+    """
+    Generate the GKE files of one profile.
+
+    Args:
+        tuned_profiles_dir: The nvidia-tuned profiles/ directory
+        accelerator: GKE accelerator directory name (e.g. h100)
+        intent: GKE intent directory name (e.g. inference)
+
+    Returns:
+        Mapping of file name to content
+
+    Raises:
+        ValueError: When nvidia-tuned has no such profile
+    """
+    profile = f"nvidia-{accelerator}-{intent}"
+    view = ProfileView(tuned_profiles_dir, DEFAULT_OS)
+    if profile not in view.sources:
+        raise ValueError(f"nvidia-tuned has no profile {profile}")
+    header = HEADER.format(profile=profile)
+
+    sysctl: List[str] = []
+    services: Dict[str, str] = {}
+    not_applied: List[str] = []
+    for section, options in view.effective(profile).items():
+        if section == "main":
+            continue
+        if section == "sysctl":
+            for key, value in options.items():
+                if "${" in value:
+                    not_applied.append(f"[sysctl] {key}={value}: {RUNTIME_REASON}")
+                else:
+                    sysctl.append(f"{key}={value}")
+            continue
+        if section == "script" or options.get("type") == "script":
+            for path in options.get("script", "").split():
+                source = script_source(view, tuned_profiles_dir, path)
+                found = dropin(source) if source and os.path.isfile(source) else None
+                if found:
+                    services[found[0]] = found[1]
+                else:
+                    not_applied.append(f"[{section}] script={os.path.basename(path)}: {REASONS['script']}")
+            continue
+        plugin = options.get("type", section)
+        reason = REASONS.get(plugin, DEFAULT_REASON.format(plugin=plugin))
+        for key, value in options.items():
+            if key != "type":
+                not_applied.append(f"[{section}] {key}={value}: {reason}")
+
+    outputs = {"sysctl.conf": header + "".join(f"{line}\n" for line in sysctl)}
+    for service, content in sorted(services.items()):
+        outputs[f"service_{service}.conf"] = header + content
+    outputs["not_applied.txt"] = header + "".join(f"{line}\n" for line in not_applied)
+    return outputs
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate nvidia-tuning-gke configs from the nvidia-tuned profiles")
+    parser.add_argument("--tuned-profiles-dir", default="nvidia-tuned/profiles",
+                        help="Profiles directory of nvidia-tuned")
+    parser.add_argument("--gke-profiles-dir", default="nvidia-tuning-gke/profiles",
+                        help="Profiles directory of nvidia-tuning-gke")
+    parser.add_argument("--check", action="store_true",
+                        help="Only check that the GKE configs are up to date, exit 1 if not")
+    args = parser.parse_args()
+
+    stale = False
+    for accelerator in sorted(os.listdir(args.gke_profiles_dir)):
+        acc_dir = os.path.join(args.gke_profiles_dir, accelerator)
+        if not os.path.isdir(acc_dir):
+            continue
+        for intent in sorted(os.listdir(acc_dir)):
+            profile_dir = os.path.join(acc_dir, intent)
+            if not os.path.isdir(profile_dir):
+                continue
+            try:
+                outputs = generate(args.tuned_profiles_dir, accelerator, intent)
+            except ValueError as e:
+                print(f"ERROR: {profile_dir}: {e}", file=sys.stderr)
+                sys.exit(1)
+
+            # Drop-ins the profile no longer installs
+            existing = {n for n in os.listdir(profile_dir) if n.startswith("service_") and n.endswith(".conf")}
+            for name in sorted(existing - set(outputs)):
+                stale = True
+                path = os.path.join(profile_dir, name)
+                if args.check:
+                    print(f"ERROR: {path} is no longer generated")
+                    continue
+                os.remove(path)
+                print(f"Removed {path}")
+
+            for name, content in sorted(outputs.items()):
+                path = os.path.join(profile_dir, name)
+                current = None
+                if os.path.isfile(path):
+                    with open(path) as f:
+                        current = f.read()
+                if current == content:
+                    continue
+                stale = True
+                if args.check:
+                    print(f"ERROR: {path} is out of date")
+                    sys.stdout.writelines(difflib.unified_diff(
+                        (current or "").splitlines(keepends=True), content.splitlines(keepends=True), path, "generated"))
+                    continue
+                with open(path, "w") as f:
+                    f.write(content)
+                print(f"Wrote {path}")
+
+            skipped = outputs["not_applied.txt"].splitlines()[1:]
+            if skipped and not args.check:
+                print(f"{accelerator}/{intent}: {len(skipped)} settings not applied on GKE, see {profile_dir}/not_applied.txt")
+
+    if args.check and stale:
+        print("Run: make generate-gke-configs")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
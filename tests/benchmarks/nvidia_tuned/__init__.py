@@ -0,0 +1,21 @@
+# nvidia-tuned profile benchmarks
+
+"""
+Benchmark configuration for nvidia-tuned profiles.
+
+The benchmarks measure the host kernel through a privileged container, so a
+single base image is enough; BENCH_IMAGE overrides it.
+"""
+
+import os
+
+BENCH_IMAGE = os.environ.get("BENCH_IMAGE", "ubuntu:24.04")
+
+# Profiles to benchmark, one report each
+BENCH_PROFILES = [
+    "nvidia-h100-performance",
+    "nvidia-h100-inference",
+    "nvidia-h100-multiNodeTraining",
+    "nvidia-h100-storage",
+    "nvidia-h100-low-latency",
+]
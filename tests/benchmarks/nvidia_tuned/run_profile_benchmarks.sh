@@ -0,0 +1,176 @@
+#!/bin/bash
+# Profile efficacy benchmarks. Runs local micro-benchmarks, applies the [sysctl] settings
+# of a compiled nvidia-tuned profile, runs them again and reports the deltas:
+#   tcp_loopback_mbps    iperf3 over loopback (socket buffers, congestion control, qdisc)
+#   anon_alloc_ops       stress-ng vm: map, first touch and unmap 256M (page fault cost)
+#   loop_read_mbps       buffered read of a loop device with a cold page cache
+#   loop_write_mbps      buffered write of a loop device, synced (dirty page writeback)
+# Each benchmark runs BENCH_RUNS times (default 3) for BENCH_SECONDS (default 5) and the
+# median is kept. Results are printed as a table and as "BENCH<TAB>name<TAB>baseline<TAB>
+# tuned<TAB>delta" lines.
+#
+# Needs a privileged container: /proc/sys is written directly and most sysctls are not
+# namespaced, so they change the host kernel until the script exits and restores them.
+# Settings outside [sysctl] (kernel command line, CPU, modules, script plugins) can't be
+# applied in a container and are listed as not measured.
+#
+# Usage: run_profile_benchmarks.sh <profile> [os view, default "default"]
+set -e
+
+[ -n "${SKYHOOK_DIR:-}" ] || { echo "SKYHOOK_DIR must be set" >&2; exit 1; }
+
+profile=${1:?usage: $0 <profile> [os view]}
+os_view=${2:-default}
+conf="${SKYHOOK_DIR}/profiles/compiled/effective/${os_view}/${profile}.conf"
+BENCH_RUNS=${BENCH_RUNS:-3}
+BENCH_SECONDS=${BENCH_SECONDS:-5}
+BENCH_FILE_MB=${BENCH_FILE_MB:-512}
+
+[ -f "$conf" ] || { echo "ERROR: compiled profile not found: $conf" >&2; exit 1; }
+work=$(mktemp -d /var/tmp/bench.XXXXXX)
+
+# "<path> <value>" of every sysctl changed, restored on exit
+restore=()
+loopdev=""
+
+cleanup() {
+    local entry
+    for entry in "${restore[@]}"; do
+        echo "${entry#* }" > "${entry%% *}" 2>/dev/null || true
+    done
+    [ -n "$loopdev" ] && losetup -d "$loopdev" 2>/dev/null || true
+    pkill -x iperf3 2>/dev/null || true
+    rm -rf "$work"
+}
+trap cleanup EXIT
+
+install_tools() {
+    command -v iperf3 >/dev/null && command -v stress-ng >/dev/null && return 0
+    if command -v apt-get >/dev/null; then
+        apt-get update -qq >/dev/null
+        DEBIAN_FRONTEND=noninteractive apt-get install -y -qq iperf3 stress-ng procps util-linux >/dev/null
+    elif command -v dnf >/dev/null; then
+        dnf install -y -q epel-release >/dev/null 2>&1 || true
+        dnf install -y -q iperf3 stress-ng procps-ng util-linux >/dev/null
+    else
+        echo "ERROR: no apt-get or dnf to install iperf3 and stress-ng" >&2
+        exit 1
+    fi
+}
+
+# Print the median of the numbers read on stdin
+median() {
+    sort -g | awk '{ v[NR] = $1 } END { if (NR) print (NR % 2 ? v[(NR + 1) / 2] : (v[NR / 2] + v[NR / 2 + 1]) / 2) }'
+}
+
+bench_tcp_loopback_mbps() {
+    iperf3 -c 127.0.0.1 -t "$BENCH_SECONDS" -f m 2>/dev/null | awk '/receiver/ { print $(NF - 2) }'
+}
+
+bench_anon_alloc_ops() {
+    stress-ng --vm 1 --vm-bytes 256M --vm-method write64 --timeout "${BENCH_SECONDS}s" --metrics-brief 2>&1 |
+        awk '$4 == "vm" && $5 ~ /^[0-9]+$/ { print $(NF - 1) }'
+}
+
+# Usage: dd_mbps <dd arguments>...; prints the MB/s dd reports
+dd_mbps() {
+    dd "$@" 2>&1 | awk '/copied/ { for (i = 1; i <= NF; i++) if ($i == "copied,") printf "%.1f\n", $1 / $(i + 1) / 1000000 }'
+}
+
+bench_loop_read_mbps() {
+    sync
+    echo 3 > /proc/sys/vm/drop_caches
+    dd_mbps if="$target" of=/dev/null bs=1M
+}
+
+bench_loop_write_mbps() {
+    dd_mbps if=/dev/zero of="$target" bs=1M count="$BENCH_FILE_MB" conv=fdatasync
+}
+
+BENCHMARKS="tcp_loopback_mbps anon_alloc_ops loop_read_mbps loop_write_mbps"
+
+# Usage: run_benchmarks <phase>; sets RESULT[<phase>.<benchmark>]
+declare -A RESULT=()
+run_benchmarks() {
+    local phase=$1 name run
+    for name in $BENCHMARKS; do
+        RESULT[$phase.$name]=$(for run in $(seq "$BENCH_RUNS"); do "bench_$name"; done | median)
+        echo "  ${phase} ${name}: ${RESULT[$phase.$name]:-n/a}"
+    done
+}
+
+# Print "<key> <value>" for the [sysctl] settings of the profile
+profile_sysctls() {
+    awk '
+        /^\[/ { section = $0; next }
+        section == "[sysctl]" && /^[^#;].*=/ {
+            key = substr($0, 1, index($0, "=") - 1); value = substr($0, index($0, "=") + 1)
+            gsub(/^[ \t]+|[ \t]+$/, "", key); gsub(/^[ \t]+|[ \t]+$/, "", value)
+            print key, value
+        }' "$conf"
+}
+
+applied=0
+not_applied=()
+apply_sysctls() {
+    local key value path
+    while read -r key value; do
+        path="/proc/sys/${key//.//}"
+        if [[ "$value" == *'${'* ]] || [ ! -w "$path" ]; then
+            not_applied+=("sysctl ${key}")
+            continue
+        fi
+        restore+=("$path $(cat "$path")")
+        if echo "$value" > "$path" 2>/dev/null; then
+            applied=$((applied + 1))
+        else
+            not_applied+=("sysctl ${key}=${value}")
+        fi
+    done < <(profile_sysctls)
+}
+
+install_tools
+if [ ! -w /proc/sys/vm/drop_caches ]; then
+    echo "ERROR: /proc/sys is read-only, run the benchmarks in a privileged container" >&2
+    exit 1
+fi
+
+iperf3 -s -D -B 127.0.0.1
+truncate -s "${BENCH_FILE_MB}M" "$work/disk.img"
+dd if=/dev/urandom of="$work/disk.img" bs=1M count="$BENCH_FILE_MB" conv=notrunc status=none
+# The loop device node may not show up in a container without udev; fall back to the file
+target="$work/disk.img"
+loopdev=$(losetup -f --show "$target" 2>/dev/null) || true
+if [ -b "$loopdev" ]; then
+    target=$loopdev
+else
+    echo "WARNING: no loop device available, reading and writing $target instead"
+fi
+
+echo "Benchmarking ${profile} (${os_view}), ${BENCH_RUNS} runs of ${BENCH_SECONDS}s"
+run_benchmarks baseline
+apply_sysctls
+run_benchmarks tuned
+
+echo
+echo "Profile efficacy: ${profile} (${os_view})"
+printf '%-20s %14s %14s %9s\n' benchmark baseline tuned delta
+for name in $BENCHMARKS; do
+    base=${RESULT[baseline.$name]}
+    tuned=${RESULT[tuned.$name]}
+    delta=$(awk -v b="$base" -v t="$tuned" 'BEGIN { if (b > 0 && t != "") printf "%+.1f%%", (t - b) * 100 / b; else print "n/a" }')
+    printf '%-20s %14s %14s %9s\n' "$name" "${base:-n/a}" "${tuned:-n/a}" "$delta"
+    printf 'BENCH\t%s\t%s\t%s\t%s\n' "$name" "${base:-n/a}" "${tuned:-n/a}" "$delta"
+done
+echo
+echo "Applied ${applied} sysctl settings"
+for entry in "${not_applied[@]}"; do
+    echo "Not applied: ${entry}"
+done
+for section in $(awk '/^\[/ { gsub(/[][]/, ""); print }' "$conf"); do
+    case "$section" in
+        main|sysctl|variables) ;;
+        *) echo "Not measured in a container: [${section}]" ;;
+    esac
+done
+grep -o 'init_on_alloc=[0-9]' /proc/cmdline | sed 's/^/Host kernel command line: /' || echo "Host kernel command line: init_on_alloc not set"
@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+Profile efficacy benchmarks for nvidia-tuned (run_profile_benchmarks.sh).
+
+Each profile's [sysctl] settings are applied in a privileged container between
+two runs of local micro-benchmarks (loopback TCP, anonymous memory allocation,
+loop device reads and writes). The deltas are printed and written to
+BENCH_RESULTS_DIR (default bench-results/) as <profile>.tsv; they are data to
+justify or drop settings with, so only the run itself is asserted.
+"""
+
+import os
+from pathlib import Path
+
+import pytest
+
+from tests.benchmarks.nvidia_tuned import BENCH_IMAGE, BENCH_PROFILES
+from tests.helpers.assertions import assert_exit_code
+from tests.helpers.docker_test import DockerTestRunner
+
+_BENCH_SOURCE = Path(__file__).parent / "run_profile_benchmarks.sh"
+_BENCH_DEST = "skyhook_dir/run_profile_benchmarks.sh"
+_RESULTS_DIR = Path(os.environ.get("BENCH_RESULTS_DIR", "bench-results"))
+
+# Passed on to the script when set
+_BENCH_ENV = ("BENCH_RUNS", "BENCH_SECONDS", "BENCH_FILE_MB")
+
+
+@pytest.mark.parametrize("profile", BENCH_PROFILES)
+def test_profile_efficacy(profile):
+    """Benchmark a profile's sysctl settings against the host defaults."""
+    runner = DockerTestRunner(package="nvidia-tuned", base_image=BENCH_IMAGE, privileged=True)
+    try:
+        result = runner.run_script(
+            script="run_profile_benchmarks.sh",
+            env_vars={name: os.environ[name] for name in _BENCH_ENV if name in os.environ},
+            script_args=[profile],
+            extra_files=[(_BENCH_SOURCE, _BENCH_DEST)],
+        )
+        print(result.stdout)
+        assert_exit_code(result, 0)
+
+        rows = [line.split("\t")[1:] for line in result.stdout.splitlines() if line.startswith("BENCH\t")]
+        assert rows, "no benchmark results reported"
+        _RESULTS_DIR.mkdir(parents=True, exist_ok=True)
+        (_RESULTS_DIR / f"{profile}.tsv").write_text(
+            "benchmark\tbaseline\ttuned\tdelta\n" + "".join("\t".join(row) + "\n" for row in rows)
+        )
+    finally:
+        runner.cleanup()
@@ -28,16 +28,19 @@ class TestResult:
 class DockerTestRunner:
     """Manages Docker containers for testing skyhook packages."""
     
-    def __init__(self, package: str, base_image: str = "ubuntu:24.04"):
+    def __init__(self, package: str, base_image: str = "ubuntu:24.04", privileged: bool = False):
         """
         Initialize the Docker test runner.
         
         Args:
             package: Name of the package to test (e.g., "nvidia-setup")
             base_image: Docker base image to use (default: ubuntu:24.04)
+            privileged: Run the container privileged, with a writable /proc/sys and the
+                        host devices (benchmarks only: settings reach the host kernel)
         """
         self.package = package
         self.base_image = base_image
+        self.privileged = privileged
         self.client = docker.from_env()
         self.container = None
         self.temp_dir = None
@@ -173,6 +176,7 @@ class DockerTestRunner:
                     }
                 },
                 remove=False,
+                privileged=self.privileged,
                 tty=False,
                 stdin_open=False
             )
@@ -0,0 +1,64 @@
+#!/bin/bash
+# Stub of ethtool for the NIC tuning plugin tests, implementing -g/-G (ring sizes) and
+# -c/-C (coalescing) with the output format of ethtool 6.x. Every interface starts with
+# 4096 entry rings set to 1024, adaptive coalescing off, rx-usecs 20 and tx-usecs 64; the
+# current values are kept under FAKE_ETHTOOL_DIR.
+# FAKE_ETHTOOL_UNSUPPORTED lists the operations (ring, coalesce) that fail like a driver
+# without them.
+set -e
+
+state=${FAKE_ETHTOOL_DIR:-/tmp/fake_ethtool}
+op=$1
+nic=$2
+shift 2 || { echo "usage: $0 -g|-G|-c|-C <devname> [<param> <value>]..." >&2; exit 1; }
+
+case "$op" in
+    -g|-G) kind=ring ;;
+    -c|-C) kind=coalesce ;;
+    *) echo "$0: $op not implemented" >&2; exit 1 ;;
+esac
+if [[ " ${FAKE_ETHTOOL_UNSUPPORTED:-} " == *" $kind "* ]]; then
+    echo "netlink error: Operation not supported" >&2
+    exit 76
+fi
+
+dir="${state}/${nic}"
+if [ ! -d "$dir" ]; then
+    mkdir -p "$dir"
+    printf '%s\n' "rx_max 4096" "tx_max 4096" "rx 1024" "tx 1024" \
+        "adaptive-rx off" "adaptive-tx off" "rx-usecs 20" "tx-usecs 64" > "${dir}/values"
+fi
+get() { awk -v k="$1" '$1 == k { print $2 }' "${dir}/values"; }
+set_value() {
+    awk -v k="$1" -v v="$2" '$1 == k { $2 = v } { print }' "${dir}/values" > "${dir}/values.tmp"
+    mv "${dir}/values.tmp" "${dir}/values"
+}
+
+case "$op" in
+    -g)
+        printf 'Ring parameters for %s:\nPre-set maximums:\nRX:\t\t\t%s\nRX Mini:\t\tn/a\nRX Jumbo:\t\tn/a\nTX:\t\t\t%s\n' \
+            "$nic" "$(get rx_max)" "$(get tx_max)"
+        printf 'Current hardware settings:\nRX:\t\t\t%s\nRX Mini:\t\tn/a\nRX Jumbo:\t\tn/a\nTX:\t\t\t%s\n' \
+            "$(get rx)" "$(get tx)"
+        ;;
+    -c)
+        printf 'Coalesce parameters for %s:\nAdaptive RX: %s  TX: %s\nstats-block-usecs:\tn/a\n' \
+            "$nic" "$(get adaptive-rx)" "$(get adaptive-tx)"
+        printf 'rx-usecs:\t%s\nrx-frames:\tn/a\ntx-usecs:\t%s\ntx-frames:\tn/a\n' \
+            "$(get rx-usecs)" "$(get tx-usecs)"
+        ;;
+    -G|-C)
+        while [ $# -ge 2 ]; do
+            if [ -z "$(get "$1")" ]; then
+                echo "netlink error: Operation not supported" >&2
+                exit 76
+            fi
+            if [ "$op" = -G ] && [ "$2" -gt "$(get "${1}_max")" ]; then
+                echo "netlink error: requested ring size exceeds maximum" >&2
+                exit 1
+            fi
+            set_value "$1" "$2"
+            shift 2
+        done
+        ;;
+esac
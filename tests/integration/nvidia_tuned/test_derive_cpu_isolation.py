@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Tests for the low-latency intent's CPU isolation (derive_cpu_isolation.sh).
+
+The isolated CPUs are derived from a synthetic /sys/devices/system/cpu, NUMA
+node and PCI tree built by the tuning package's fake kernel harness.
+"""
+
+from pathlib import Path
+
+from tests.helpers.assertions import (
+    assert_exit_code,
+    assert_output_contains,
+)
+from tests.helpers.docker_test import DockerTestRunner
+
+# The harness is shared with the tuning tests and copied into the package at run time
+_HARNESS_SOURCE = Path(__file__).parent.parent / "tuning" / "run_with_fake_kernel.sh"
+_HARNESS_DEST = "skyhook_dir/run_with_fake_kernel.sh"
+
+# Two NUMA nodes of 4 CPUs, CPUs 4 and 5 are SMT siblings
+FAKE_TOPOLOGY = (
+    "devices/system/cpu/online=0-7\n"
+    "devices/system/node/node0/cpulist=0-3\n"
+    "devices/system/node/node1/cpulist=4-7\n"
+    "devices/system/cpu/cpu4/topology/thread_siblings_list=4-5\n"
+    "devices/system/cpu/cpu5/topology/thread_siblings_list=4-5\n"
+)
+# An H100 on node 1
+FAKE_GPU = (
+    "bus/pci/devices/0000:1b:00.0/vendor=0x10de\n"
+    "bus/pci/devices/0000:1b:00.0/class=0x030200\n"
+    "bus/pci/devices/0000:1b:00.0/numa_node=1\n"
+)
+
+
+def _run(runner: DockerTestRunner, script: str, fake_sysfs: str, configmaps: dict = None, args: list = None):
+    return runner.run_script(
+        script="run_with_fake_kernel.sh",
+        configmaps={"accelerator": "h100", "fake_sysfs": fake_sysfs, **(configmaps or {})},
+        script_args=[script] + (args or []),
+        extra_files=[(_HARNESS_SOURCE, _HARNESS_DEST)],
+    )
+
+
+def test_isolates_cpus_local_to_gpus(base_image):
+    """Only the GPU's node is isolated, keeping its first core and that core's siblings."""
+    runner = DockerTestRunner(package="nvidia-tuned", base_image=base_image)
+    try:
+        result = _run(runner, "derive_cpu_isolation.sh", FAKE_TOPOLOGY + FAKE_GPU, args=["1"])
+        assert_exit_code(result, 0)
+        assert_output_contains(result.stdout, "isolated_cores=6-7")
+        assert_output_contains(result.stdout, "housekeeping_cores=0-5")
+    finally:
+        runner.cleanup()
+
+
+def test_falls_back_to_every_node_without_device_locality(base_image):
+    """Without GPU or NIC NUMA information every node keeps its first cores, like calc_isolated_cores."""
+    runner = DockerTestRunner(package="nvidia-tuned", base_image=base_image)
+    try:
+        result = _run(runner, "derive_cpu_isolation.sh", FAKE_TOPOLOGY, args=["1"])
+        assert_exit_code(result, 0)
+        assert_output_contains(result.stdout, "No GPU or NIC NUMA locality found")
+        assert_output_contains(result.stdout, "isolated_cores=1-3,6-7")
+        assert_output_contains(result.stdout, "housekeeping_cores=0,4-5")
+    finally:
+        runner.cleanup()
+
+
+def test_fails_when_nothing_is_left_to_isolate(base_image):
+    """Asking for more housekeeping cores than the nodes have is an error."""
+    runner = DockerTestRunner(package="nvidia-tuned", base_image=base_image)
+    try:
+        result = _run(runner, "derive_cpu_isolation.sh", FAKE_TOPOLOGY + FAKE_GPU, args=["4"])
+        assert_exit_code(result, 1)
+        assert_output_contains(result.stdout, "not enough CPUs to isolate")
+    finally:
+        runner.cleanup()
+
+
+def test_prepare_low_latency_writes_isolation_variables(base_image):
+    """prepare_nvidia_profiles.sh fills in the low-latency profile's isolation.conf."""
+    runner = DockerTestRunner(package="nvidia-tuned", base_image=base_image)
+    try:
+        result = _run(
+            runner,
+            "prepare_nvidia_profiles.sh",
+            FAKE_TOPOLOGY + FAKE_GPU,
+            configmaps={"intent": "low-latency", "housekeeping_cores_per_node": "1"},
+        )
+        assert_exit_code(result, 0)
+        assert_output_contains(
+            result.stdout,
+            "CPU isolation for nvidia-h100-low-latency: isolated_cores=6-7 housekeeping_cores=0-5",
+        )
+        isolation = runner.get_file_contents("/etc/tuned/nvidia-h100-low-latency/isolation.conf")
+        assert "isolated_cores=6-7" in isolation
+        profile = runner.get_file_contents("/etc/tuned/nvidia-h100-low-latency/tuned.conf")
+        assert "include=/etc/tuned/nvidia-h100-low-latency/isolation.conf" in profile
+    finally:
+        runner.cleanup()
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Tests for the hugepages tuned script plugin (profiles/plugins/hugepages.sh).
+
+The plugin is run the way tuned runs it, from the low-latency profile that links
+it, against a synthetic NUMA and transparent hugepage sysfs built by the tuning
+package's fake kernel harness.
+"""
+
+from pathlib import Path
+
+import pytest
+
+from tests.helpers.assertions import (
+    assert_exit_code,
+    assert_output_contains,
+)
+from tests.helpers.docker_test import DockerTestRunner
+
+# The harness is shared with the tuning tests and copied into the package at run time
+_HARNESS_SOURCE = Path(__file__).parent.parent / "tuning" / "run_with_fake_kernel.sh"
+_HARNESS_DEST = "skyhook_dir/run_with_fake_kernel.sh"
+
+_PLUGIN = "../profiles/os/common/nvidia-h100-low-latency/hugepages.sh"
+_NODE = "devices/system/node/node{n}"
+_NR_HUGEPAGES = _NODE + "/hugepages/hugepages-2048kB/nr_hugepages"
+
+# Two 4 GiB NUMA nodes, 10% of each is 204 2M pages
+FAKE_SYSFS = "".join(
+    f"{_NODE.format(n=n)}/meminfo=Node {n} MemTotal:       4194304 kB\n"
+    f"{_NR_HUGEPAGES.format(n=n)}=0\n"
+    for n in (0, 1)
+) + (
+    "kernel/mm/transparent_hugepage/enabled=[always] madvise never\n"
+    "kernel/mm/transparent_hugepage/defrag=[always] defer defer+madvise madvise never\n"
+    "kernel/mm/transparent_hugepage/khugepaged/defrag=1\n"
+)
+
+
+def _run_plugin(runner: DockerTestRunner, *args: str):
+    return runner.run_script(
+        script="run_with_fake_kernel.sh",
+        configmaps={"fake_sysfs": FAKE_SYSFS},
+        script_args=[_PLUGIN, *args],
+        extra_files=[(_HARNESS_SOURCE, _HARNESS_DEST)],
+    )
+
+
+def _read_fake(runner: DockerTestRunner, path: str) -> str:
+    """Read a file of the fake sysfs the harness left in the container."""
+    result = runner.container.exec_run(["sh", "-c", f"cat /tmp/tmp.*/sys/{path}"])
+    return result.output.decode("utf-8", errors="replace").strip()
+
+
+def test_verify_fails_before_start(base_image):
+    """Without the reservation and THP settings, verify reports each one and fails."""
+    runner = DockerTestRunner(package="nvidia-tuned", base_image=base_image)
+    try:
+        result = _run_plugin(runner, "verify")
+        assert_exit_code(result, 1)
+        assert_output_contains(result.stdout, "Hugepages on node 0: expected 204 2M pages, reserved 0")
+        assert_output_contains(result.stdout, "Transparent hugepages enabled: expected madvise, got always")
+        assert_output_contains(result.stdout, "Transparent hugepages khugepaged_defrag: expected 0, got 1")
+    finally:
+        runner.cleanup()
+
+
+def test_start_reserves_per_node_and_sets_thp(base_image):
+    """start reserves the node fraction on every node at runtime and sets THP."""
+    runner = DockerTestRunner(package="nvidia-tuned", base_image=base_image)
+    try:
+        result = _run_plugin(runner, "start")
+        assert_exit_code(result, 0)
+        assert "Hugepages will be reserved at the next boot" not in result.stdout
+
+        for n in (0, 1):
+            assert _read_fake(runner, _NR_HUGEPAGES.format(n=n)) == "204"
+        assert _read_fake(runner, "kernel/mm/transparent_hugepage/enabled") == "madvise"
+        assert _read_fake(runner, "kernel/mm/transparent_hugepage/defrag") == "defer+madvise"
+    finally:
+        runner.cleanup()
+
+
+def test_stop_restores_the_pages_found_at_start(base_image):
+    """stop puts back each node's reservation and the THP settings start found, not 0."""
+    runner = DockerTestRunner(package="nvidia-tuned", base_image=base_image)
+    try:
+        fake_sysfs = FAKE_SYSFS.replace(f"{_NR_HUGEPAGES.format(n=0)}=0", f"{_NR_HUGEPAGES.format(n=0)}=16")
+        result = runner.run_script(
+            script="run_with_fake_kernel.sh",
+            configmaps={"fake_sysfs": fake_sysfs},
+            script_args=[_PLUGIN, "start"],
+            extra_files=[(_HARNESS_SOURCE, _HARNESS_DEST)],
+        )
+        assert_exit_code(result, 0)
+        assert _read_fake(runner, _NR_HUGEPAGES.format(n=0)) == "204"
+
+        plugin = f"/skyhook-package/skyhook_dir/{_PLUGIN}"
+        stop = runner.container.exec_run(
+            ["bash", "-c", f"d=$(ls -d /tmp/tmp.*); SYS_ROOT=$d/sys PROC_ROOT=$d/proc {plugin} stop 2>&1"]
+        )
+        assert stop.exit_code == 0, stop.output.decode("utf-8", errors="replace")
+        assert _read_fake(runner, _NR_HUGEPAGES.format(n=0)) == "16"
+        assert _read_fake(runner, _NR_HUGEPAGES.format(n=1)) == "0"
+        assert _read_fake(runner, "kernel/mm/transparent_hugepage/enabled") == "always"
+    finally:
+        runner.cleanup()
+
+
+@pytest.mark.parametrize(
+    "kernel,boot_pages",
+    [("5.15.0-1056-aws", "hugepages=408"), ("6.8.0-1021-aws", "hugepages=0:204,1:204")],
+)
+def test_boot_reservation_per_node_only_from_kernel_5_16(base_image, tmp_path, kernel, boot_pages):
+    """A short node falls back to the command line, per node where the kernel supports it."""
+    runner = DockerTestRunner(package="nvidia-tuned", base_image=base_image)
+    try:
+        update_grub = tmp_path / "update-grub"
+        update_grub.write_text("#!/bin/sh\necho update-grub\n")
+        update_grub.chmod(0o755)
+        # Node 1 can't take a reservation: writing nr_hugepages fails and nothing is reserved
+        fake_sysfs = FAKE_SYSFS.replace(f"{_NR_HUGEPAGES.format(n=1)}=0", f"{_NR_HUGEPAGES.format(n=1)}/refused=1")
+        result = runner.run_script(
+            script="run_with_fake_kernel.sh",
+            configmaps={"fake_sysfs": fake_sysfs},
+            env_vars={
+                "FAKE_KERNEL": kernel,
+                "GRUB_D_DIR": "/tmp/grub.d",
+                "PATH": "/skyhook-package/bin:/usr/local/sbin:/usr/local/bin:/usr/sbin:/usr/bin:/sbin:/bin",
+            },
+            script_args=[_PLUGIN, "start"],
+            extra_files=[(_HARNESS_SOURCE, _HARNESS_DEST), (update_grub, "bin/update-grub")],
+        )
+        assert_exit_code(result, 0)
+        assert_output_contains(result.stdout, "WARNING: reserved 0 of 204 2M hugepages on node 1")
+        assert_output_contains(result.stdout, f"Hugepages will be reserved at the next boot: hugepagesz=2M {boot_pages}")
+        dropin = runner.get_file_contents("/tmp/grub.d/99_nvidia_hugepages.cfg")
+        assert f"hugepagesz=2M {boot_pages}\"" in dropin
+    finally:
+        runner.cleanup()
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Tests for the IRQ affinity tuned script plugin (profiles/plugins/irq_affinity.sh).
+
+The plugin is run the way tuned runs it, from the multiNodeTraining profile that
+links it, against a synthetic NIC, NVMe and /proc/irq tree built by the tuning
+package's fake kernel harness.
+"""
+
+from pathlib import Path
+
+from tests.helpers.assertions import (
+    assert_exit_code,
+    assert_output_contains,
+)
+from tests.helpers.docker_test import DockerTestRunner
+
+# The harness is shared with the tuning tests and copied into the package at run time
+_HARNESS_SOURCE = Path(__file__).parent.parent / "tuning" / "run_with_fake_kernel.sh"
+_HARNESS_DEST = "skyhook_dir/run_with_fake_kernel.sh"
+
+_PLUGIN = "../profiles/os/common/nvidia-h100-multiNodeTraining/irq_affinity.sh"
+_DROPIN = "/etc/systemd/system/irqbalance.service.d/nvidia-irq-affinity.conf"
+
+# A NIC with two queues on node 1 (CPUs 4-7, 7 isolated) and an NVMe controller on node 0
+FAKE_SYSFS = (
+    "devices/system/cpu/isolated=7\n"
+    "devices/system/node/node0/cpulist=0-3\n"
+    "devices/system/node/node1/cpulist=4-7\n"
+    "class/net/eth0/device/numa_node=1\n"
+    "class/net/eth0/device/local_cpulist=4-7\n"
+    "class/net/eth0/device/msi_irqs/130=msix\n"
+    "class/net/eth0/device/msi_irqs/131=msix\n"
+    "class/nvme/nvme0/device/numa_node=0\n"
+    "class/nvme/nvme0/device/msi_irqs/140=msix\n"
+)
+FAKE_PROC = "".join(f"irq/{irq}/smp_affinity_list=0-7\n" for irq in (130, 131, 140))
+
+
+def _run_plugin(runner: DockerTestRunner, *args: str, fake_sysfs: str = FAKE_SYSFS):
+    return runner.run_script(
+        script="run_with_fake_kernel.sh",
+        configmaps={"fake_sysfs": fake_sysfs, "fake_proc": FAKE_PROC},
+        script_args=[_PLUGIN, *args],
+        extra_files=[(_HARNESS_SOURCE, _HARNESS_DEST)],
+    )
+
+
+def _read_fake(runner: DockerTestRunner, path: str) -> str:
+    """Read a file of the fake procfs the harness left in the container."""
+    result = runner.container.exec_run(["sh", "-c", f"cat /tmp/tmp.*/proc/{path}"])
+    return result.output.decode("utf-8", errors="replace").strip()
+
+
+def test_verify_fails_before_start(base_image):
+    """IRQs spread over every CPU and no irqbalance drop-in are each reported."""
+    runner = DockerTestRunner(package="nvidia-tuned", base_image=base_image)
+    try:
+        result = _run_plugin(runner, "verify")
+        assert_exit_code(result, 1)
+        assert_output_contains(result.stdout, "IRQ 130 (eth0): expected CPUs 4-6, got 0-7")
+        assert_output_contains(result.stdout, "IRQ 140 (nvme0): expected CPUs 0-3, got 0-7")
+        assert_output_contains(result.stdout, "irqbalance drop-in doesn't exist")
+    finally:
+        runner.cleanup()
+
+
+def test_start_pins_irqs_to_local_node_and_bans_them(base_image):
+    """start pins each device's IRQs to its node without the isolated CPU and bans them from irqbalance."""
+    runner = DockerTestRunner(package="nvidia-tuned", base_image=base_image)
+    try:
+        result = _run_plugin(runner, "start")
+        assert_exit_code(result, 0)
+        assert_output_contains(result.stdout, "IRQ 131 (eth0) -> CPUs 4-6")
+
+        assert _read_fake(runner, "irq/130/smp_affinity_list") == "4-6"
+        assert _read_fake(runner, "irq/131/smp_affinity_list") == "4-6"
+        assert _read_fake(runner, "irq/140/smp_affinity_list") == "0-3"
+        dropin = runner.get_file_contents(_DROPIN)
+        assert 'IRQBALANCE_ARGS=--banirq=130 --banirq=131 --banirq=140"' in dropin
+    finally:
+        runner.cleanup()
+
+
+def test_devices_without_numa_locality_are_left_to_irqbalance(base_image):
+    """A device reporting NUMA node -1 is neither pinned nor banned."""
+    runner = DockerTestRunner(package="nvidia-tuned", base_image=base_image)
+    try:
+        fake_sysfs = FAKE_SYSFS.replace("class/net/eth0/device/numa_node=1", "class/net/eth0/device/numa_node=-1")
+        result = _run_plugin(runner, "start", fake_sysfs=fake_sysfs)
+        assert_exit_code(result, 0)
+        assert "eth0" not in result.stdout
+
+        assert _read_fake(runner, "irq/130/smp_affinity_list") == "0-7"
+        dropin = runner.get_file_contents(_DROPIN)
+        assert 'IRQBALANCE_ARGS=--banirq=140"' in dropin
+    finally:
+        runner.cleanup()
+
+
+def _verify_after_start(runner: DockerTestRunner):
+    """Run verify against the fake trees start left in the container."""
+    plugin = f"/skyhook-package/skyhook_dir/{_PLUGIN}"
+    result = runner.container.exec_run(
+        ["bash", "-c", f'd=$(ls -d /tmp/tmp.*); SYS_ROOT=$d/sys PROC_ROOT=$d/proc {plugin} verify 2>&1']
+    )
+    return result.exit_code, result.output.decode("utf-8", errors="replace")
+
+
+def test_verify_skips_irqs_the_kernel_refused_to_move(base_image):
+    """A managed IRQ start couldn't move is neither banned nor expected on its node by verify."""
+    runner = DockerTestRunner(package="nvidia-tuned", base_image=base_image)
+    try:
+        # Writing the affinity of IRQ 140 fails, like for a managed NVMe interrupt
+        fake_proc = FAKE_PROC.replace("irq/140/smp_affinity_list=0-7", "irq/140/smp_affinity_list/managed=1")
+        result = runner.run_script(
+            script="run_with_fake_kernel.sh",
+            configmaps={"fake_sysfs": FAKE_SYSFS, "fake_proc": fake_proc},
+            script_args=[_PLUGIN, "start"],
+            extra_files=[(_HARNESS_SOURCE, _HARNESS_DEST)],
+        )
+        assert_exit_code(result, 0)
+        assert_output_contains(result.stdout, "WARNING: could not set affinity of IRQ 140 (nvme0)")
+        assert 'IRQBALANCE_ARGS=--banirq=130 --banirq=131"' in runner.get_file_contents(_DROPIN)
+
+        exit_code, output = _verify_after_start(runner)
+        assert exit_code == 0, output
+        assert_output_contains(output, "IRQ 140 (nvme0): not pinned by start (managed by the driver), skipped")
+
+        # A pinned IRQ that moved is still reported
+        runner.container.exec_run(["bash", "-c", "echo 0-7 > /tmp/tmp.*/proc/irq/131/smp_affinity_list"])
+        exit_code, output = _verify_after_start(runner)
+        assert exit_code == 1, output
+        assert_output_contains(output, "IRQ 131 (eth0): expected CPUs 4-6, got 0-7")
+    finally:
+        runner.cleanup()
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Tests for the NIC tuning tuned script plugin (profiles/plugins/nic_tuning.sh).
+
+The plugin is run the way tuned runs it, from the multiNodeTraining profile that
+links it (the EKS copy, which also sets the MTU), against a synthetic interface sysfs built by the tuning package's fake
+kernel harness and a stubbed ethtool (fake_ethtool.sh).
+"""
+
+from pathlib import Path
+
+from tests.helpers.assertions import (
+    assert_exit_code,
+    assert_output_contains,
+)
+from tests.helpers.docker_test import DockerTestRunner
+
+# The harness is shared with the tuning tests and copied into the package at run time
+_HARNESS_SOURCE = Path(__file__).parent.parent / "tuning" / "run_with_fake_kernel.sh"
+_HARNESS_DEST = "skyhook_dir/run_with_fake_kernel.sh"
+_ETHTOOL_SOURCE = Path(__file__).parent / "fake_ethtool.sh"
+_ETHTOOL_DEST = "skyhook_dir/fake_ethtool.sh"
+
+_PLUGIN = "../profiles/service/eks/nvidia-h100-multiNodeTraining/nic_tuning.sh"
+_COMMON_PLUGIN = "../profiles/os/common/nvidia-h100-multiNodeTraining/nic_tuning.sh"
+
+# eth0 on node 1 (CPUs 4-7, 6 isolated) with two RX and three TX queues; lo isn't physical
+FAKE_SYSFS = (
+    "devices/system/cpu/isolated=6\n"
+    "class/net/eth0/device/numa_node=1\n"
+    "class/net/eth0/device/local_cpulist=4-7\n"
+    "class/net/eth0/mtu=1500\n"
+    "class/net/eth0/queues/rx-0/rps_cpus=00000000\n"
+    "class/net/eth0/queues/rx-1/rps_cpus=00000000\n"
+    "class/net/eth0/queues/tx-0/xps_cpus=00000000\n"
+    "class/net/eth0/queues/tx-1/xps_cpus=00000000\n"
+    "class/net/eth0/queues/tx-2/xps_cpus=00000000\n"
+    "class/net/lo/mtu=65536\n"
+)
+
+
+def _run_plugin(runner: DockerTestRunner, *args: str, unsupported: str = "", plugin: str = _PLUGIN):
+    return runner.run_script(
+        script="run_with_fake_kernel.sh",
+        configmaps={"fake_sysfs": FAKE_SYSFS},
+        env_vars={
+            "ETHTOOL": f"/skyhook-package/{_ETHTOOL_DEST}",
+            "FAKE_ETHTOOL_UNSUPPORTED": unsupported,
+        },
+        script_args=[plugin, *args],
+        extra_files=[(_HARNESS_SOURCE, _HARNESS_DEST), (_ETHTOOL_SOURCE, _ETHTOOL_DEST)],
+    )
+
+
+def _read_fake(runner: DockerTestRunner, path: str) -> str:
+    """Read a file of the fake sysfs the harness left in the container."""
+    result = runner.container.exec_run(["sh", "-c", f"cat /tmp/tmp.*/sys/{path}"])
+    return result.output.decode("utf-8", errors="replace").strip()
+
+
+def test_verify_fails_before_start(base_image):
+    """Every setting still at its default is reported."""
+    runner = DockerTestRunner(package="nvidia-tuned", base_image=base_image)
+    try:
+        result = _run_plugin(runner, "verify")
+        assert_exit_code(result, 1)
+        assert_output_contains(result.stdout, "eth0 rx ring: expected 4096, got 1024")
+        assert_output_contains(result.stdout, "eth0 adaptive-rx: expected on, got off")
+        assert_output_contains(result.stdout, "eth0 mtu: expected 9001, got 1500")
+        assert_output_contains(result.stdout, "eth0 queues/rx-0/rps_cpus: expected 000000b0, got 00000000")
+        assert "lo" not in result.stdout
+    finally:
+        runner.cleanup()
+
+
+def test_start_sets_rings_coalescing_queues_and_mtu(base_image):
+    """start sets the rings to the driver maximum, coalescing, the local RPS/XPS masks and the MTU."""
+    runner = DockerTestRunner(package="nvidia-tuned", base_image=base_image)
+    try:
+        result = _run_plugin(runner, "start")
+        assert_exit_code(result, 0)
+        assert_output_contains(result.stdout, "eth0 rx ring: 4096")
+        assert_output_contains(result.stdout, "eth0 adaptive-rx: on")
+
+        ring = runner.container.exec_run([f"/skyhook-package/{_ETHTOOL_DEST}", "-g", "eth0"])
+        assert "TX:\t\t\t4096" in ring.output.decode("utf-8").split("Current hardware settings:")[1]
+        assert _read_fake(runner, "class/net/eth0/mtu") == "9001"
+        # CPUs 4, 5 and 7 for RPS, one of them per TX queue for XPS
+        assert _read_fake(runner, "class/net/eth0/queues/rx-1/rps_cpus") == "000000b0"
+        assert _read_fake(runner, "class/net/eth0/queues/tx-0/xps_cpus") == "00000010"
+        assert _read_fake(runner, "class/net/eth0/queues/tx-2/xps_cpus") == "00000080"
+        assert _read_fake(runner, "class/net/lo/mtu") == "65536"
+    finally:
+        runner.cleanup()
+
+
+def test_unsupported_driver_options_are_skipped(base_image):
+    """A driver without ring or coalescing support is reported; the sysfs settings still apply."""
+    runner = DockerTestRunner(package="nvidia-tuned", base_image=base_image)
+    try:
+        result = _run_plugin(runner, "start", unsupported="ring coalesce")
+        assert_exit_code(result, 0)
+        assert_output_contains(result.stdout, "eth0: ring sizes not supported by the driver, skipped")
+        assert_output_contains(result.stdout, "eth0: interrupt coalescing not supported by the driver, skipped")
+        assert _read_fake(runner, "class/net/eth0/mtu") == "9001"
+    finally:
+        runner.cleanup()
+
+
+def test_common_profile_leaves_mtu_alone(base_image):
+    """Jumbo frames depend on the network: only the EKS copy of the profile sets the MTU."""
+    runner = DockerTestRunner(package="nvidia-tuned", base_image=base_image)
+    try:
+        result = _run_plugin(runner, "start", plugin=_COMMON_PLUGIN)
+        assert_exit_code(result, 0)
+        assert_output_contains(result.stdout, "eth0 rx ring: 4096")
+        assert "mtu" not in result.stdout
+        assert _read_fake(runner, "class/net/eth0/mtu") == "1500"
+    finally:
+        runner.cleanup()
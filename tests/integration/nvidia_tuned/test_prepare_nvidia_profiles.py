@@ -6,7 +6,7 @@ Tests verify:
 - Tuned version meets OS-specific requirements (>= 2.15 for Ubuntu 22.04/Debian 11, >= 2.19 for others)
 - prepare_nvidia_profiles does the right thing for all combinations of:
   - accelerator (h100, gb200)
-  - intent (performance, inference, multiNodeTraining)
+  - intent (performance, inference, multiNodeTraining, storage)
   - service (eks, none)
 - For AWS service, verifies grub config file is created correctly
 """
@@ -218,7 +218,7 @@ def test_tuned_version_requirement(base_image):
 
 
 @pytest.mark.parametrize("accelerator", ["h100", "gb200"])
-@pytest.mark.parametrize("intent", ["performance", "inference", "multiNodeTraining"])
+@pytest.mark.parametrize("intent", ["performance", "inference", "multiNodeTraining", "storage"])
 def test_prepare_nvidia_profiles_no_service(base_image, accelerator, intent):
     """Test prepare_nvidia_profiles with all accelerator/intent combinations without service."""
     runner = DockerTestRunner(package="nvidia-tuned", base_image=base_image)
@@ -260,7 +260,7 @@ def test_prepare_nvidia_profiles_no_service(base_image, accelerator, intent):
 
 
 @pytest.mark.parametrize("accelerator", ["h100", "gb200"])
-@pytest.mark.parametrize("intent", ["performance", "inference", "multiNodeTraining"])
+@pytest.mark.parametrize("intent", ["performance", "inference", "multiNodeTraining", "storage"])
 def test_prepare_nvidia_profiles_with_eks_service(base_image, accelerator, intent):
     """Test prepare_nvidia_profiles with EKS service for all combinations."""
     runner = DockerTestRunner(package="nvidia-tuned", base_image=base_image)
@@ -492,6 +492,50 @@ def test_prepare_nvidia_profiles_eks_service_specific_profile(base_image):
         runner.cleanup()
 
 
+def test_prepare_nvidia_profiles_eks_multi_node_training_sets_mtu(base_image):
+    """The EKS copy of multiNodeTraining is a directory: its nic_tuning.conf adds the AWS MTU."""
+    runner = DockerTestRunner(package="nvidia-tuned", base_image=base_image)
+    try:
+        configmaps = {
+            "accelerator": "h100",
+            "intent": "multiNodeTraining",
+            "service": "eks",
+        }
+
+        create_container_for_testing(runner, configmaps)
+        install_tuned_in_container(runner, base_image)
+        result = run_script_in_container(runner, "prepare_nvidia_profiles.sh", configmaps)
+
+        assert_exit_code(result, 0)
+        profile_dir = "/etc/tuned/nvidia-h100-multiNodeTraining"
+        assert "mtu=9001" in runner.get_file_contents(f"{profile_dir}/nic_tuning.conf")
+        assert runner.file_exists(f"{profile_dir}/nic_tuning.sh")
+        assert runner.file_exists(f"{profile_dir}/irq_affinity.sh")
+        assert "[nic_tuning]" in runner.get_file_contents(f"{profile_dir}/tuned.conf")
+    finally:
+        runner.cleanup()
+
+
+def test_prepare_nvidia_profiles_multi_node_training_leaves_mtu_alone(base_image):
+    """Without a service the multiNodeTraining profile doesn't set an MTU."""
+    runner = DockerTestRunner(package="nvidia-tuned", base_image=base_image)
+    try:
+        configmaps = {
+            "accelerator": "gb200",
+            "intent": "multiNodeTraining",
+        }
+
+        create_container_for_testing(runner, configmaps)
+        install_tuned_in_container(runner, base_image)
+        result = run_script_in_container(runner, "prepare_nvidia_profiles.sh", configmaps)
+
+        assert_exit_code(result, 0)
+        conf = runner.get_file_contents("/etc/tuned/nvidia-gb200-multiNodeTraining/nic_tuning.conf")
+        assert "\nmtu=\n" in conf
+    finally:
+        runner.cleanup()
+
+
 def test_prepare_nvidia_profiles_common_profiles_deployed(base_image):
     """Test that common base profiles are deployed to /usr/lib/tuned/."""
     runner = DockerTestRunner(package="nvidia-tuned", base_image=base_image)
@@ -521,3 +565,68 @@ def test_prepare_nvidia_profiles_common_profiles_deployed(base_image):
         
     finally:
         runner.cleanup()
+
+
+def test_prepare_nvidia_profiles_deploys_only_closure(base_image):
+    """Test that only the selected profile and the profiles it includes are deployed."""
+    runner = DockerTestRunner(package="nvidia-tuned", base_image=base_image)
+    try:
+        configmaps = {
+            "accelerator": "gb200",
+            "intent": "multiNodeTraining",
+        }
+
+        # Create container directly
+        create_container_for_testing(runner, configmaps)
+
+        # Install tuned in the container
+        install_tuned_in_container(runner, base_image)
+
+        # Run the script in the same container
+        result = run_script_in_container(runner, "prepare_nvidia_profiles.sh", configmaps)
+
+        assert_exit_code(result, 0)
+        # gb200-multiNodeTraining -> gb200-performance -> base
+        assert runner.file_exists("/etc/tuned/nvidia-gb200-multiNodeTraining/tuned.conf")
+        assert runner.file_exists("/etc/tuned/nvidia-gb200-performance/tuned.conf")
+        assert runner.file_exists("/usr/lib/tuned/nvidia-base/tuned.conf")
+        # Nothing from other accelerators or intents
+        assert not runner.file_exists("/etc/tuned/nvidia-h100-performance/tuned.conf")
+        assert not runner.file_exists("/etc/tuned/nvidia-gb200-inference/tuned.conf")
+        assert not runner.file_exists("/usr/lib/tuned/nvidia-acs-disable/tuned.conf")
+
+    finally:
+        runner.cleanup()
+
+
+@pytest.mark.parametrize("accelerator", ["h100", "gb200"])
+def test_prepare_nvidia_profiles_storage_intent(base_image, accelerator):
+    """Test that the storage intent deploys its writeback and NVMe settings on top of performance."""
+    runner = DockerTestRunner(package="nvidia-tuned", base_image=base_image)
+    try:
+        configmaps = {
+            "accelerator": accelerator,
+            "intent": "storage",
+        }
+
+        # Create container directly
+        create_container_for_testing(runner, configmaps)
+
+        # Install tuned in the container
+        install_tuned_in_container(runner, base_image)
+
+        # Run the script in the same container
+        result = run_script_in_container(runner, "prepare_nvidia_profiles.sh", configmaps)
+
+        assert_exit_code(result, 0)
+        assert runner.file_exists(f"/etc/tuned/nvidia-{accelerator}-performance/tuned.conf")
+
+        profile_content = runner.get_file_contents(f"/etc/tuned/nvidia-{accelerator}-storage/tuned.conf")
+        assert f"include=nvidia-{accelerator}-performance" in profile_content
+        assert "vm.dirty_background_ratio=5" in profile_content
+        assert "vm.vfs_cache_pressure=50" in profile_content
+        assert "devices=nvme*" in profile_content
+        assert "elevator=none" in profile_content
+
+    finally:
+        runner.cleanup()
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Tests for the nvidia-tuned drift check (tuned_drift_check.sh).
+
+The compiled effective profile is compared against a fake /proc and /sys built
+by the tuning package's fake kernel harness, so no tuned has to run.
+"""
+
+from pathlib import Path
+
+from tests.helpers.assertions import (
+    assert_exit_code,
+    assert_output_contains,
+)
+from tests.helpers.docker_test import DockerTestRunner
+
+# The harness is shared with the tuning tests and copied into the package at run time
+_HARNESS_SOURCE = Path(__file__).parent.parent / "tuning" / "run_with_fake_kernel.sh"
+_HARNESS_DEST = "skyhook_dir/run_with_fake_kernel.sh"
+
+# Node state matching nvidia-h100-performance (the same for every OS view)
+FAKE_PROC = (
+    "cmdline=BOOT_IMAGE=/vmlinuz init_on_alloc=0 pci=disable_acs_redir=pci:0:0 iommu=pt "
+    "console=tty0 console=ttyS0,115200n8 pci=realloc=off\n"
+    "sys/net/ipv4/conf/all/arp_announce=2\n"
+    "sys/net/ipv4/conf/default/arp_announce=2\n"
+    "sys/net/ipv4/conf/all/arp_ignore=1\n"
+    "sys/net/ipv4/conf/default/arp_ignore=1\n"
+)
+FAKE_SYSFS = (
+    "devices/system/cpu/cpu0/cpufreq/scaling_governor=performance\n"
+    "devices/system/cpu/cpu1/cpufreq/scaling_governor=performance\n"
+    "module/ib_umad/refcnt=0\n"
+)
+
+
+def _run_drift_check(runner: DockerTestRunner, fake_proc: str, fake_sysfs: str):
+    return runner.run_script(
+        script="run_with_fake_kernel.sh",
+        configmaps={
+            "accelerator": "h100",
+            "intent": "performance",
+            "fake_proc": fake_proc,
+            "fake_sysfs": fake_sysfs,
+        },
+        env_vars={"SKYHOOK_RESOURCE_ID": "1_nvidia-tuned_0.2.3", "STATE_ROOT": "/tmp/state"},
+        script_args=["tuned_drift_check.sh"],
+        extra_files=[(_HARNESS_SOURCE, _HARNESS_DEST)],
+    )
+
+
+def test_drift_check_passes_on_tuned_node(base_image):
+    """A node with every setting applied reports no drift."""
+    runner = DockerTestRunner(package="nvidia-tuned", base_image=base_image)
+    try:
+        result = _run_drift_check(runner, FAKE_PROC, FAKE_SYSFS)
+        assert_exit_code(result, 0)
+        assert_output_contains(result.stdout, '"drift": 0')
+        assert_output_contains(
+            result.stdout,
+            '{"plugin": "sysctl", "key": "net.ipv4.conf.all.arp_ignore", "expected": "1", "actual": "1", "status": "ok"}',
+        )
+        assert_output_contains(result.stdout, "Drift report written to /tmp/state/nvidia-tuned/drift.json")
+    finally:
+        runner.cleanup()
+
+
+def test_drift_check_reports_each_drifted_setting(base_image):
+    """Changed sysctls, governors and cmdline tokens, and unloaded modules, are reported per setting."""
+    runner = DockerTestRunner(package="nvidia-tuned", base_image=base_image)
+    try:
+        fake_proc = (
+            FAKE_PROC.replace("iommu=pt", "iommu=on")
+            .replace("all/arp_ignore=1", "all/arp_ignore=0")
+        )
+        fake_sysfs = "devices/system/cpu/cpu0/cpufreq/scaling_governor=powersave\n"
+        result = _run_drift_check(runner, fake_proc, fake_sysfs)
+        assert_exit_code(result, 1)
+        assert_output_contains(result.stdout, '"drift": 4')
+        assert_output_contains(
+            result.stdout,
+            '{"plugin": "sysctl", "key": "net.ipv4.conf.all.arp_ignore", "expected": "1", "actual": "0", "status": "drift"}',
+        )
+        assert_output_contains(
+            result.stdout,
+            '{"plugin": "bootloader", "key": "cmdline_iommu", "expected": "iommu=pt", "actual": "iommu=on", "status": "drift"}',
+        )
+        assert_output_contains(
+            result.stdout,
+            '{"plugin": "cpu", "key": "governor", "expected": "performance", "actual": "powersave", "status": "drift"}',
+        )
+        assert_output_contains(
+            result.stdout,
+            '{"plugin": "modules", "key": "ib_umad", "expected": "loaded", "actual": "", "status": "missing"}',
+        )
+    finally:
+        runner.cleanup()
@@ -0,0 +1,9 @@
+# tuned package tests
+
+"""
+Test matrix configuration for tuned package.
+"""
+
+TEST_MATRIX = [
+    "ubuntu:24.04",
+]
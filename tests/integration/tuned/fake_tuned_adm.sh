@@ -0,0 +1,48 @@
+#!/bin/bash
+# Stub of tuned-adm for the tuned package tests, implementing list, active, profile and
+# verify. The active profile(s) are kept in FAKE_TUNED_DIR/active (and /etc/tuned/active_profile
+# like tuned does) and every call of profile is appended to FAKE_TUNED_DIR/calls.
+# verify appends the file FAKE_TUNED_VERIFY_LOG to TUNED_LOG, as if tuned had logged it,
+# and exits with FAKE_TUNED_VERIFY_RC.
+set -e
+
+state=${FAKE_TUNED_DIR:-/tmp/fake_tuned}
+mkdir -p "$state"
+
+case "${1:-}" in
+    list)
+        echo "Available profiles:"
+        for dir in /usr/lib/tuned/* /usr/lib/tuned/profiles/* /etc/tuned/* /etc/tuned/profiles/*; do
+            [ -f "${dir}/tuned.conf" ] && echo "- $(basename "$dir")"
+        done | sort -u
+        echo "Current active profile: $(cat "${state}/active" 2>/dev/null)"
+        ;;
+    active)
+        if [ -s "${state}/active" ]; then
+            echo "Current active profile: $(cat "${state}/active")"
+        else
+            echo "No current active profile."
+        fi
+        ;;
+    profile)
+        shift
+        echo "$*" > "${state}/active"
+        mkdir -p /etc/tuned
+        echo "$*" > /etc/tuned/active_profile
+        echo "profile $*" >> "${state}/calls"
+        ;;
+    verify)
+        if [ -n "${FAKE_TUNED_VERIFY_LOG:-}" ] && [ -n "${TUNED_LOG:-}" ]; then
+            cat "$FAKE_TUNED_VERIFY_LOG" >> "$TUNED_LOG"
+        fi
+        if [ "${FAKE_TUNED_VERIFY_RC:-0}" -ne 0 ]; then
+            echo "Verification failed, current system settings differ from the preset profile."
+            exit "$FAKE_TUNED_VERIFY_RC"
+        fi
+        echo "Verification succeeded, current system settings match the preset profile."
+        ;;
+    *)
+        echo "$0: ${1:-} not implemented" >&2
+        exit 1
+        ;;
+esac
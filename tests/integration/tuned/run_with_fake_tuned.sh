@@ -0,0 +1,49 @@
+#!/bin/bash
+# Test harness for the tuned package. Runs the script given as $1 (or, for a name without
+# .sh, that function of utils.sh) with the stubbed tuned-adm (fake_tuned_adm.sh) and a
+# systemctl that reports every service active on PATH, against a fake /proc/sys and sysfs.
+# The fake trees are built from FAKE_PROC and FAKE_SYSFS, one <path under the mount>=<value>
+# per line (not from configmaps: every configmap becomes a tuned profile).
+# Everything lives under FAKE_TUNED_DIR and is only created by the first run, so runs in
+# the same container see what earlier ones applied.
+set -e
+
+[ -n "${SKYHOOK_DIR:-}" ] || { echo "SKYHOOK_DIR must be set" >&2; exit 1; }
+
+export FAKE_TUNED_DIR=${FAKE_TUNED_DIR:-/tmp/fake_tuned}
+
+populate() {
+    local root=$1 path value
+    while IFS='=' read -r path value; do
+        [ -n "$path" ] || continue
+        mkdir -p "$(dirname "${root}/${path}")"
+        echo "$value" > "${root}/${path}"
+    done
+}
+if [ ! -d "$FAKE_TUNED_DIR" ]; then
+    mkdir -p "${FAKE_TUNED_DIR}"/{bin,proc/sys,sys,state,run,log}
+    populate "${FAKE_TUNED_DIR}/proc" <<< "${FAKE_PROC:-}"
+    populate "${FAKE_TUNED_DIR}/sys" <<< "${FAKE_SYSFS:-}"
+    cp "${SKYHOOK_DIR}/skyhook_dir/fake_tuned_adm.sh" "${FAKE_TUNED_DIR}/bin/tuned-adm"
+    printf '#!/bin/sh\nexit 0\n' > "${FAKE_TUNED_DIR}/bin/systemctl"
+    chmod +x "${FAKE_TUNED_DIR}/bin/tuned-adm" "${FAKE_TUNED_DIR}/bin/systemctl"
+    touch "${FAKE_TUNED_DIR}/log/tuned.log"
+fi
+
+export PATH="${FAKE_TUNED_DIR}/bin:${PATH}"
+export PROC_ROOT="${FAKE_TUNED_DIR}/proc"
+export SYS_ROOT="${FAKE_TUNED_DIR}/sys"
+export STATE_ROOT="${FAKE_TUNED_DIR}/state"
+export RUN_STATE_ROOT="${FAKE_TUNED_DIR}/run"
+export TUNED_LOG="${FAKE_TUNED_DIR}/log/tuned.log"
+
+case "$1" in
+    *.sh)
+        exec "${SKYHOOK_DIR}/skyhook_dir/$1" "${@:2}"
+        ;;
+    *)
+        # shellcheck source=/dev/null
+        source "${SKYHOOK_DIR}/skyhook_dir/utils.sh"
+        "$@"
+        ;;
+esac
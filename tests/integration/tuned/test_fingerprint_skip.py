@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Tests for skipping tuned-adm profile when the deployed profiles are unchanged.
+
+apply_tuned_profile.sh fingerprints the files of the profiles and the shared
+scripts; a re-apply with the same fingerprint and the same active profile(s)
+leaves tuned alone. tuned-adm is stubbed (fake_tuned_adm.sh), which records
+every tuned-adm profile call.
+"""
+
+import json
+from pathlib import Path
+
+from tests.helpers.assertions import (
+    assert_exit_code,
+    assert_output_contains,
+)
+from tests.helpers.docker_test import DockerTestRunner
+
+_HERE = Path(__file__).parent
+EXTRA_FILES = [
+    (_HERE / "run_with_fake_tuned.sh", "skyhook_dir/run_with_fake_tuned.sh"),
+    (_HERE / "fake_tuned_adm.sh", "skyhook_dir/fake_tuned_adm.sh"),
+]
+ENV = {"SKYHOOK_RESOURCE_ID": "1_tuned_1.3.0"}
+FAKE = "/tmp/fake_tuned"
+PLAN_FILE = f"{FAKE}/state/tuned/interrupt_plan.json"
+
+CONFIGMAPS = {
+    "tuned_profile": "test-profile\n",
+    "test-profile": "[main]\nsummary=Test profile\n\n[script]\nscript=/etc/tuned/scripts/test_script\n",
+    "test_script": "#!/bin/sh\nexit 0\n",
+}
+
+
+def _exec(runner: DockerTestRunner, cmd: str, env: dict = None) -> tuple:
+    """Run a command in the container the first apply left running."""
+    result = runner.container.exec_run(
+        ["/bin/bash", "-c", f"{cmd} 2>&1"], workdir="/skyhook-package", environment=env or {}
+    )
+    return result.exit_code, result.output.decode("utf-8", errors="replace")
+
+
+def _first_apply(runner: DockerTestRunner):
+    result = runner.run_script(
+        script="run_with_fake_tuned.sh",
+        configmaps=CONFIGMAPS,
+        env_vars=ENV,
+        script_args=["apply_tuned_profile.sh"],
+        extra_files=EXTRA_FILES,
+    )
+    assert_exit_code(result, 0)
+    assert_output_contains(result.stdout, "no fingerprint of a previous apply")
+
+
+def _reapply(runner: DockerTestRunner, env: dict = None) -> str:
+    exit_code, output = _exec(runner, "skyhook_dir/run_with_fake_tuned.sh apply_tuned_profile.sh", env)
+    assert exit_code == 0, output
+    return output
+
+
+def _tuned_adm_profile_calls(runner: DockerTestRunner) -> int:
+    return len(runner.get_file_contents(f"{FAKE}/calls").splitlines())
+
+
+def _applied(runner: DockerTestRunner) -> str:
+    return json.loads(runner.get_file_contents(PLAN_FILE))["apply"]
+
+
+def test_unchanged_profile_is_skipped(base_image):
+    """Nothing changed and the profile is active: tuned-adm profile isn't run again."""
+    runner = DockerTestRunner(package="tuned", base_image=base_image)
+    try:
+        _first_apply(runner)
+        output = _reapply(runner)
+        assert_output_contains(output, "tuned profile(s) test-profile already active and unchanged, nothing to apply")
+        assert _applied(runner) == "unchanged"
+        assert _tuned_adm_profile_calls(runner) == 1
+    finally:
+        runner.cleanup()
+
+
+def test_changed_script_is_applied(base_image):
+    """A changed shared script changes the fingerprint and the profile is applied again."""
+    runner = DockerTestRunner(package="tuned", base_image=base_image)
+    try:
+        _first_apply(runner)
+        script = Path(runner.temp_dir) / "skyhook-package" / "configmaps" / "test_script"
+        script.write_text("#!/bin/sh\necho changed\n")
+        output = _reapply(runner)
+        assert_output_contains(output, "changed since the last apply:")
+        assert_output_contains(output, "changed /etc/tuned/scripts/test_script")
+        assert _applied(runner) == "full"
+        assert _tuned_adm_profile_calls(runner) == 2
+    finally:
+        runner.cleanup()
+
+
+def test_different_active_profile_is_applied(base_image):
+    """Another active profile (e.g. switched by hand) is replaced even though the files are unchanged."""
+    runner = DockerTestRunner(package="tuned", base_image=base_image)
+    try:
+        _first_apply(runner)
+        _exec(runner, f"echo balanced > {FAKE}/active")
+        output = _reapply(runner)
+        assert_output_contains(output, "active profile(s) 'balanced' differ from 'test-profile'")
+        assert _applied(runner) == "full"
+        assert _tuned_adm_profile_calls(runner) == 2
+        assert runner.get_file_contents(f"{FAKE}/active").strip() == "test-profile"
+    finally:
+        runner.cleanup()
+
+
+def test_force_apply(base_image):
+    """TUNED_FORCE_APPLY=true runs tuned-adm profile for an unchanged profile."""
+    runner = DockerTestRunner(package="tuned", base_image=base_image)
+    try:
+        _first_apply(runner)
+        output = _reapply(runner, {"TUNED_FORCE_APPLY": "true"})
+        assert_output_contains(output, "TUNED_FORCE_APPLY=true, applying unchanged profile(s)")
+        assert _applied(runner) == "full"
+        assert _tuned_adm_profile_calls(runner) == 2
+    finally:
+        runner.cleanup()
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Tests for applying changed tuned settings live.
+
+apply_tuned_profile.sh classifies every changed setting of the profile and only
+skips tuned-adm profile when all of them are changed values it can write itself;
+the checks verify those directly and ignore their tuned-adm verify failures.
+tuned-adm is stubbed (fake_tuned_adm.sh) and the sysctls live in a fake /proc/sys.
+"""
+
+import json
+from pathlib import Path
+
+import pytest
+
+from tests.helpers.assertions import (
+    assert_exit_code,
+    assert_output_contains,
+)
+from tests.helpers.docker_test import DockerTestRunner
+
+_HERE = Path(__file__).parent
+EXTRA_FILES = [
+    (_HERE / "run_with_fake_tuned.sh", "skyhook_dir/run_with_fake_tuned.sh"),
+    (_HERE / "fake_tuned_adm.sh", "skyhook_dir/fake_tuned_adm.sh"),
+]
+ENV = {
+    "SKYHOOK_RESOURCE_ID": "1_tuned_1.3.0",
+    "FAKE_PROC": "sys/vm/swappiness=60\nsys/kernel/numa_balancing=1\nsys/vm/dirty_ratio=20\n",
+    "FAKE_TUNED_VERIFY_LOG": "/skyhook-package/verify.log",
+}
+FAKE = "/tmp/fake_tuned"
+PLAN_FILE = f"{FAKE}/state/tuned/interrupt_plan.json"
+HOT_APPLIED_FILE = f"{FAKE}/run/tuned/tuned_hot_applied"
+
+PROFILE = "[sysctl]\nvm.swappiness=10\nkernel.numa_balancing=0\n"
+VERIFY_LOG = (
+    "2026-03-02 10:15:01,100 INFO     tuned.daemon.daemon: verifying profile(s): test-profile\n"
+    "2026-03-02 10:15:01,120 ERROR    tuned.plugins.base: verify: failed: 'vm.swappiness' = '20', expected '10'\n"
+    "2026-03-02 10:15:01,130 {numa}\n"
+)
+NUMA_PASSED = "INFO     tuned.plugins.base: verify: passed: 'kernel.numa_balancing' = '0'"
+NUMA_FAILED = "ERROR    tuned.plugins.base: verify: failed: 'kernel.numa_balancing' = '1', expected '0'"
+
+
+def _package(runner: DockerTestRunner) -> Path:
+    """The package directory bind-mounted into the container."""
+    return Path(runner.temp_dir) / "skyhook-package"
+
+
+def _exec(runner: DockerTestRunner, cmd: str, env: dict = None) -> tuple:
+    """Run a command in the container the first apply left running."""
+    result = runner.container.exec_run(
+        ["/bin/bash", "-c", f"{cmd} 2>&1"], workdir="/skyhook-package", environment=env or {}
+    )
+    return result.exit_code, result.output.decode("utf-8", errors="replace")
+
+
+def _first_apply(runner: DockerTestRunner):
+    result = runner.run_script(
+        script="run_with_fake_tuned.sh",
+        configmaps={"tuned_profile": "test-profile\n", "test-profile": PROFILE},
+        env_vars=ENV,
+        script_args=["apply_tuned_profile.sh"],
+        extra_files=EXTRA_FILES,
+    )
+    assert_exit_code(result, 0)
+
+
+def _reapply(runner: DockerTestRunner, profile: str) -> str:
+    (_package(runner) / "configmaps" / "test-profile").write_text(profile)
+    exit_code, output = _exec(runner, "skyhook_dir/run_with_fake_tuned.sh apply_tuned_profile.sh")
+    assert exit_code == 0, output
+    return output
+
+
+def _tuned_adm_profile_calls(runner: DockerTestRunner) -> int:
+    return len(runner.get_file_contents(f"{FAKE}/calls").splitlines())
+
+
+def test_changed_sysctl_is_applied_live(base_image):
+    """A changed sysctl value is written to /proc/sys without tuned-adm profile."""
+    runner = DockerTestRunner(package="tuned", base_image=base_image)
+    try:
+        _first_apply(runner)
+        output = _reapply(runner, PROFILE.replace("swappiness=10", "swappiness=20"))
+        assert_output_contains(output, "live     [sysctl] vm.swappiness: 10 -> 20")
+        assert_output_contains(output, "skipped tuned-adm profile")
+        plan = json.loads(runner.get_file_contents(PLAN_FILE))
+        assert plan["apply"] == "hot"
+        assert plan["interrupt"] == "none"
+        assert runner.get_file_contents(f"{FAKE}/proc/sys/vm/swappiness").strip() == "20"
+        assert runner.get_file_contents(HOT_APPLIED_FILE) == "sysctl\tsysctl\tvm.swappiness\t20\n"
+        assert _tuned_adm_profile_calls(runner) == 1
+    finally:
+        runner.cleanup()
+
+
+@pytest.mark.parametrize(
+    "profile,key",
+    [
+        (PROFILE + "vm.dirty_ratio=5\n", "vm.dirty_ratio"),
+        ("[sysctl]\nvm.swappiness=10\n", "kernel.numa_balancing"),
+    ],
+    ids=["added", "removed"],
+)
+def test_added_or_removed_option_needs_tuned(base_image, profile, key):
+    """tuned only restores what it applied, so added and removed options go through tuned-adm profile."""
+    runner = DockerTestRunner(package="tuned", base_image=base_image)
+    try:
+        _first_apply(runner)
+        output = _reapply(runner, profile)
+        assert_output_contains(output, f"full     [sysctl] {key}:")
+        plan = json.loads(runner.get_file_contents(PLAN_FILE))
+        assert plan["apply"] == "full"
+        assert [c["action"] for c in plan["changes"]] == ["full"]
+        assert _tuned_adm_profile_calls(runner) == 2
+        assert not runner.file_exists(HOT_APPLIED_FILE)
+        # The fake /proc/sys is only written by the live path
+        assert runner.get_file_contents(f"{FAKE}/proc/sys/vm/dirty_ratio").strip() == "20"
+    finally:
+        runner.cleanup()
+
+
+@pytest.mark.parametrize("check", ["apply_tuned_profile_check.sh", "post_interrupt_tuned_check.sh"])
+def test_checks_ignore_verify_failures_of_live_settings_only(base_image, check):
+    """tuned-adm verify still runs; only its failures for settings applied live are ignored."""
+    runner = DockerTestRunner(package="tuned", base_image=base_image)
+    try:
+        _first_apply(runner)
+        _reapply(runner, PROFILE.replace("swappiness=10", "swappiness=20"))
+        verify_log = _package(runner) / "verify.log"
+        failing = {"FAKE_TUNED_VERIFY_RC": "1"}
+
+        verify_log.write_text(VERIFY_LOG.format(numa=NUMA_PASSED))
+        exit_code, output = _exec(runner, f"skyhook_dir/run_with_fake_tuned.sh {check}", failing)
+        assert exit_code == 0, output
+        assert_output_contains(output, "verified live setting: [sysctl] vm.swappiness=20")
+        assert_output_contains(output, "'vm.swappiness' = '20', expected '10' (applied live, ignored)")
+        assert_output_contains(output, "tuned-adm verify passed")
+
+        verify_log.write_text(VERIFY_LOG.format(numa=NUMA_FAILED))
+        exit_code, output = _exec(runner, f"skyhook_dir/run_with_fake_tuned.sh {check}", failing)
+        assert exit_code == 1, output
+        assert_output_contains(output, "sysctl failed: 'kernel.numa_balancing' = '1', expected '0'")
+        assert_output_contains(output, "ERROR: tuned-adm verify failed")
+
+        # A live setting that no longer holds fails even though tuned-adm verify passes
+        _exec(runner, f"echo 60 > {FAKE}/proc/sys/vm/swappiness")
+        exit_code, output = _exec(runner, f"skyhook_dir/run_with_fake_tuned.sh {check}")
+        assert exit_code == 1, output
+        assert_output_contains(output, "vm.swappiness (")
+        assert_output_contains(output, "ERROR: settings applied live are not in effect")
+    finally:
+        runner.cleanup()
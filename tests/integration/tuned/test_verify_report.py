@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Tests for the tuned-adm verify report of the tuned checks.
+
+tuned-adm is stubbed (fake_tuned_adm.sh): verify appends a captured tuned log
+(tuned_verify.log) to the log the report parses. Most of its verify lines come
+from tuned.plugins.base and have to be attributed to the plugin of the profile
+section that sets the option.
+"""
+
+import json
+from pathlib import Path
+
+from tests.helpers.assertions import (
+    assert_exit_code,
+    assert_output_contains,
+)
+from tests.helpers.docker_test import DockerTestRunner
+
+_HERE = Path(__file__).parent
+EXTRA_FILES = [
+    (_HERE / "run_with_fake_tuned.sh", "skyhook_dir/run_with_fake_tuned.sh"),
+    (_HERE / "fake_tuned_adm.sh", "skyhook_dir/fake_tuned_adm.sh"),
+    (_HERE / "tuned_verify.log", "skyhook_dir/tuned_verify.log"),
+]
+ENV = {
+    "SKYHOOK_RESOURCE_ID": "1_tuned_1.3.0",
+    "FAKE_TUNED_VERIFY_LOG": "/skyhook-package/skyhook_dir/tuned_verify.log",
+}
+REPORT_FILE = "/tmp/fake_tuned/state/tuned/tuned_verify.json"
+
+PROFILE = """[main]
+summary=Test profile
+
+[sysctl]
+vm.swappiness=10
+kernel.numa_balancing=0
+
+[vm]
+transparent_hugepages=never
+
+[my_cpu]
+type=cpu
+governor=performance
+
+[script]
+script=${i:PROFILE_DIR}/test.sh
+"""
+CONFIGMAPS = {"tuned_profile": "test-profile\n", "test-profile": PROFILE}
+
+
+def _exec(runner: DockerTestRunner, cmd: str, env: dict = None) -> tuple:
+    """Run a command in the container the first script left running."""
+    result = runner.container.exec_run(
+        ["/bin/bash", "-c", f"{cmd} 2>&1"], workdir="/skyhook-package", environment=env or {}
+    )
+    return result.exit_code, result.output.decode("utf-8", errors="replace")
+
+
+def _apply(runner: DockerTestRunner):
+    result = runner.run_script(
+        script="run_with_fake_tuned.sh",
+        configmaps=CONFIGMAPS,
+        env_vars=ENV,
+        script_args=["apply_tuned_profile.sh"],
+        extra_files=EXTRA_FILES,
+    )
+    assert_exit_code(result, 0)
+
+
+def test_verify_lines_are_attributed_to_profile_plugins(base_image):
+    """tuned.plugins.base lines count for the plugin of the section setting the option."""
+    runner = DockerTestRunner(package="tuned", base_image=base_image)
+    try:
+        _apply(runner)
+        exit_code, output = _exec(
+            runner,
+            "skyhook_dir/run_with_fake_tuned.sh apply_tuned_profile_check.sh",
+            {"FAKE_TUNED_VERIFY_RC": "1"},
+        )
+        assert exit_code == 1, output
+        assert_output_contains(output, "vm failed: 'transparent_hugepages' = 'madvise', expected 'never'")
+        report = json.loads(runner.get_file_contents(REPORT_FILE))
+        assert report["result"] == "failed"
+        plugins = {p["plugin"]: p for p in report["plugins"]}
+        assert "base" not in plugins
+        assert plugins["sysctl"] == {"plugin": "sysctl", "passed": 2, "failed": 0, "elapsed_ms": 30}
+        assert plugins["vm"] == {"plugin": "vm", "passed": 0, "failed": 1, "elapsed_ms": 50}
+        # [my_cpu] is a cpu plugin section, the script is matched by its file name
+        assert plugins["cpu"] == {"plugin": "cpu", "passed": 2, "failed": 0, "elapsed_ms": 60}
+        assert plugins["script"]["passed"] == 1
+        # Options the profile doesn't set fall back to the logger
+        assert plugins["disk"]["passed"] == 1
+        assert report["failures"] == [{
+            "plugin": "vm",
+            "option": "transparent_hugepages",
+            "message": "'transparent_hugepages' = 'madvise', expected 'never'",
+        }]
+    finally:
+        runner.cleanup()
+
+
+def test_verify_passes_with_report(base_image):
+    """A passing verify writes the report and doesn't print the tuned log."""
+    runner = DockerTestRunner(package="tuned", base_image=base_image)
+    try:
+        _apply(runner)
+        exit_code, output = _exec(runner, "skyhook_dir/run_with_fake_tuned.sh apply_tuned_profile_check.sh")
+        assert exit_code == 0, output
+        assert_output_contains(output, "tuned-adm verify passed")
+        assert "tuned log since the last profile apply" not in output
+        assert json.loads(runner.get_file_contents(REPORT_FILE))["result"] == "passed"
+    finally:
+        runner.cleanup()
+
+
+def test_elapsed_without_verify_header(base_image):
+    """A log cut off after the "verifying profile" line starts the clock at the first verify line."""
+    runner = DockerTestRunner(package="tuned", base_image=base_image)
+    try:
+        _apply(runner)
+        exit_code, output = _exec(
+            runner,
+            "skyhook_dir/run_with_fake_tuned.sh tuned_effective_profile test-profile > /tmp/effective && "
+            "tail -n +2 skyhook_dir/tuned_verify.log | "
+            "skyhook_dir/run_with_fake_tuned.sh tuned_verify_results /tmp/effective",
+        )
+        assert exit_code == 0, output
+        results = [line.split("\t") for line in output.splitlines()]
+        assert ["sysctl", "2", "0", "10"] in results
+        assert ["vm", "0", "1", "50"] in results
+    finally:
+        runner.cleanup()
@@ -0,0 +1,9 @@
+# tuning package tests
+
+"""
+Test matrix configuration for tuning package.
+"""
+
+TEST_MATRIX = [
+    "ubuntu:24.04",
+]
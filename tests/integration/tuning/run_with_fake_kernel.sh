@@ -0,0 +1,31 @@
+#!/bin/bash
+# Test harness for kernel-dependent settings. Builds a fake /proc/sys, debugfs and sysfs
+# for the kernel release in FAKE_KERNEL, then runs the script given as $1 against them,
+# passing on the remaining arguments.
+# Files are created from configmaps named fake_proc, fake_debugfs and fake_sysfs (ignored
+# by the scripts), one <path under the mount>=<value> per line.
+set -e
+
+[ -n "${SKYHOOK_DIR:-}" ] || { echo "SKYHOOK_DIR must be set" >&2; exit 1; }
+
+fake=$(mktemp -d)
+mkdir -p "${fake}/proc/sys/kernel" "${fake}/debug" "${fake}/sys"
+echo "${FAKE_KERNEL:-6.8.0}" > "${fake}/proc/sys/kernel/osrelease"
+
+populate() {
+    local configmap=$1 root=$2 path value
+    [ -f "${SKYHOOK_DIR}/configmaps/${configmap}" ] || return 0
+    while IFS='=' read -r path value; do
+        [ -n "$path" ] || continue
+        mkdir -p "$(dirname "${root}/${path}")"
+        echo "$value" > "${root}/${path}"
+    done < "${SKYHOOK_DIR}/configmaps/${configmap}"
+}
+populate fake_proc "${fake}/proc"
+populate fake_debugfs "${fake}/debug"
+populate fake_sysfs "${fake}/sys"
+
+export PROC_ROOT="${fake}/proc"
+export DEBUGFS_ROOT="${fake}/debug"
+export SYS_ROOT="${fake}/sys"
+exec "${SKYHOOK_DIR}/skyhook_dir/$1" "${@:2}"
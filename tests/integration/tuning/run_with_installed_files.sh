@@ -0,0 +1,46 @@
+#!/bin/bash
+# Test harness for the tuning checks. Installs drop-in files as if a previous apply
+# had written them, then runs the script given as $1 from skyhook_dir.
+# Installed content comes from configmaps named installed_<name> (ignored by the scripts):
+#   installed_sysctl.conf -> /etc/sysctl.d/999-<pkg>-tuning.conf
+#   installed_ulimit.conf -> /etc/security/limits.d/999-<pkg>-tuning.conf
+#   installed_containerd_config.toml -> /etc/containerd/conf.d/999-<pkg>-tuning.toml
+#   installed_containerd_main.toml -> /etc/containerd/config.toml
+#   installed_etc_sysctl.conf -> /etc/sysctl.conf
+#   installed_tuned.conf -> /etc/tuned/skyhook-test/tuned.conf, made the active tuned profile
+#   installed_tuned_main.conf -> /etc/tuned/tuned-main.conf
+set -e
+
+[ -n "${SKYHOOK_DIR:-}" ] || { echo "SKYHOOK_DIR must be set" >&2; exit 1; }
+package_name=$(echo ${SKYHOOK_RESOURCE_ID} | cut -f 2 -d _)
+
+if [ -f "${SKYHOOK_DIR}/configmaps/installed_sysctl.conf" ]; then
+    mkdir -p /etc/sysctl.d
+    cp "${SKYHOOK_DIR}/configmaps/installed_sysctl.conf" "/etc/sysctl.d/999-${package_name}-tuning.conf"
+fi
+if [ -f "${SKYHOOK_DIR}/configmaps/installed_ulimit.conf" ]; then
+    mkdir -p /etc/security/limits.d
+    cp "${SKYHOOK_DIR}/configmaps/installed_ulimit.conf" "/etc/security/limits.d/999-${package_name}-tuning.conf"
+fi
+if [ -f "${SKYHOOK_DIR}/configmaps/installed_containerd_config.toml" ]; then
+    mkdir -p /etc/containerd/conf.d
+    cp "${SKYHOOK_DIR}/configmaps/installed_containerd_config.toml" "/etc/containerd/conf.d/999-${package_name}-tuning.toml"
+fi
+if [ -f "${SKYHOOK_DIR}/configmaps/installed_containerd_main.toml" ]; then
+    mkdir -p /etc/containerd
+    cp "${SKYHOOK_DIR}/configmaps/installed_containerd_main.toml" /etc/containerd/config.toml
+fi
+if [ -f "${SKYHOOK_DIR}/configmaps/installed_etc_sysctl.conf" ]; then
+    cp "${SKYHOOK_DIR}/configmaps/installed_etc_sysctl.conf" /etc/sysctl.conf
+fi
+if [ -f "${SKYHOOK_DIR}/configmaps/installed_tuned.conf" ]; then
+    mkdir -p /etc/tuned/skyhook-test
+    cp "${SKYHOOK_DIR}/configmaps/installed_tuned.conf" /etc/tuned/skyhook-test/tuned.conf
+    echo skyhook-test > /etc/tuned/active_profile
+fi
+if [ -f "${SKYHOOK_DIR}/configmaps/installed_tuned_main.conf" ]; then
+    mkdir -p /etc/tuned
+    cp "${SKYHOOK_DIR}/configmaps/installed_tuned_main.conf" /etc/tuned/tuned-main.conf
+fi
+
+exec "${SKYHOOK_DIR}/skyhook_dir/$1"
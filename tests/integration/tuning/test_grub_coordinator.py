@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Tests for the shared grub_coordinator.sh (tuning is the source of truth for the copies).
+
+update-grub is replaced by a stub that records each call, so the tests can tell a
+regeneration from a skip without touching the container's boot files.
+"""
+
+from pathlib import Path
+
+from tests.helpers.assertions import (
+    assert_exit_code,
+    assert_output_contains,
+)
+from tests.helpers.docker_test import DockerTestRunner
+
+_COORDINATOR = "/skyhook-package/skyhook_dir/grub_coordinator.sh"
+_CALLS = "/tmp/update-grub.calls"
+_DROPIN = "99_skyhook_test.cfg"
+
+# Writes a grub.cfg (the coordinator regenerates when it is missing) and counts calls
+_UPDATE_GRUB = f"""#!/bin/sh
+mkdir -p /boot/grub
+echo "# generated" > /boot/grub/grub.cfg
+echo call >> {_CALLS}
+"""
+_ENV = {
+    "GRUB_D_DIR": "/tmp/grub.d",
+    "PATH": "/skyhook-package/bin:/usr/local/sbin:/usr/local/bin:/usr/sbin:/usr/bin:/sbin:/bin",
+}
+
+
+def _start(runner: DockerTestRunner, tmp_path: Path):
+    """Run a first update, which regenerates since there is no grub.cfg or stamp yet."""
+    update_grub = tmp_path / "update-grub"
+    update_grub.write_text(_UPDATE_GRUB)
+    update_grub.chmod(0o755)
+    return runner.run_script(
+        script="grub_coordinator.sh",
+        env_vars=_ENV,
+        script_args=["update"],
+        extra_files=[(update_grub, "bin/update-grub")],
+    )
+
+
+def _coordinator(runner: DockerTestRunner, command: str):
+    result = runner.container.exec_run(["bash", "-c", f"{command} 2>&1"], environment=_ENV)
+    return result.exit_code, result.output.decode("utf-8", errors="replace")
+
+
+def _calls(runner: DockerTestRunner) -> int:
+    _, output = _coordinator(runner, f"cat {_CALLS} 2>/dev/null || true")
+    return len(output.split())
+
+
+def test_update_skips_when_inputs_unchanged(base_image, tmp_path):
+    """The stamp keeps a second update from regenerating; a new drop-in makes it regenerate once."""
+    runner = DockerTestRunner(package="tuning", base_image=base_image)
+    try:
+        result = _start(runner, tmp_path)
+        assert_exit_code(result, 0)
+        assert_output_contains(result.stdout, "Regenerating /boot/grub/grub.cfg")
+        assert _calls(runner) == 1
+
+        rc, output = _coordinator(runner, f"{_COORDINATOR} update")
+        assert rc == 0, output
+        assert "GRUB inputs unchanged since last regeneration, skipping update-grub" in output
+        assert _calls(runner) == 1
+        rc, _ = _coordinator(runner, f"{_COORDINATOR} pending")
+        assert rc == 1
+
+        rc, output = _coordinator(runner, f"echo 'GRUB_CMDLINE_LINUX_DEFAULT=\"quiet\"' | {_COORDINATOR} write {_DROPIN}")
+        assert rc == 0, output
+        rc, _ = _coordinator(runner, f"{_COORDINATOR} pending")
+        assert rc == 0
+        for _ in range(2):
+            rc, output = _coordinator(runner, f"{_COORDINATOR} update")
+            assert rc == 0, output
+        assert _calls(runner) == 2
+
+        # Writing the same content leaves the drop-in and the stamp alone
+        rc, output = _coordinator(runner, f"echo 'GRUB_CMDLINE_LINUX_DEFAULT=\"quiet\"' | {_COORDINATOR} write {_DROPIN}")
+        assert "GRUB drop-in unchanged" in output
+        rc, output = _coordinator(runner, f"{_COORDINATOR} update")
+        assert "skipping update-grub" in output
+        assert _calls(runner) == 2
+
+        rc, output = _coordinator(runner, f"{_COORDINATOR} update --force")
+        assert rc == 0, output
+        assert _calls(runner) == 3
+    finally:
+        runner.cleanup()
+
+
+def test_remove_drops_the_file_and_regenerates_once(base_image, tmp_path):
+    """remove deletes the drop-in, the next update regenerates, and removing it again is a no-op."""
+    runner = DockerTestRunner(package="tuning", base_image=base_image)
+    try:
+        assert_exit_code(_start(runner, tmp_path), 0)
+        rc, output = _coordinator(runner, f"echo 'GRUB_CMDLINE_LINUX_DEFAULT=\"quiet\"' | {_COORDINATOR} write {_DROPIN}")
+        assert rc == 0, output
+        _coordinator(runner, f"{_COORDINATOR} update")
+        assert _calls(runner) == 2
+
+        rc, output = _coordinator(runner, f"{_COORDINATOR} remove {_DROPIN}")
+        assert rc == 0, output
+        assert f"Removed GRUB drop-in: /tmp/grub.d/{_DROPIN}" in output
+        rc, _ = _coordinator(runner, f"test -e /tmp/grub.d/{_DROPIN}")
+        assert rc == 1
+
+        rc, output = _coordinator(runner, f"{_COORDINATOR} update")
+        assert rc == 0, output
+        assert _calls(runner) == 3
+
+        rc, output = _coordinator(runner, f"{_COORDINATOR} remove {_DROPIN}")
+        assert rc == 0, output
+        assert "Removed" not in output
+        _coordinator(runner, f"{_COORDINATOR} update")
+        assert _calls(runner) == 3
+    finally:
+        runner.cleanup()
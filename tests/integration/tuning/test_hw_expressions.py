@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Tests for {{ expression }} values in the tuning configmaps.
+
+Expressions are evaluated against the hardware of the node, a fake /proc and
+/sys built by the harness here.
+"""
+
+from pathlib import Path
+
+import pytest
+
+from tests.helpers.assertions import (
+    assert_exit_code,
+    assert_output_contains,
+)
+from tests.helpers.docker_test import DockerTestRunner
+
+# Test script lives with tests and is copied into the package at run time
+_HARNESS_SOURCE = Path(__file__).parent / "run_with_fake_kernel.sh"
+_HARNESS_DEST = "skyhook_dir/run_with_fake_kernel.sh"
+
+# 2 TB of memory, 224 CPUs, a 400 Gb/s NIC and a virtual interface that doesn't count
+FAKE_PROC = (
+    "meminfo=MemTotal:       2113438720 kB\n"
+    "sys/vm/min_free_kbytes=2113438\n"
+    "sys/net/core/netdev_max_backlog=100000\n"
+    "sys/kernel/threads-max=917504\n"
+)
+FAKE_SYSFS = (
+    "devices/system/cpu/online=0-111,112-223\n"
+    "devices/system/node/online=0-1\n"
+    "class/net/eth0/speed=400000\n"
+    "class/net/eth0/device/vendor=0x15b3\n"
+    "class/net/veth0/speed=10000000\n"
+)
+
+
+def _run_post_check(runner: DockerTestRunner, sysctl_conf: str):
+    return runner.run_script(
+        script="run_with_fake_kernel.sh",
+        configmaps={"sysctl.conf": sysctl_conf, "fake_proc": FAKE_PROC, "fake_sysfs": FAKE_SYSFS},
+        env_vars={"SKYHOOK_RESOURCE_ID": "1_tuning_1.2.0"},
+        script_args=["update_settings_post_check.sh"],
+        extra_files=[(_HARNESS_SOURCE, _HARNESS_DEST)],
+    )
+
+
+def test_post_check_evaluates_expressions(base_image):
+    """Memory, CPU and NIC speed expressions evaluate to the node's values."""
+    runner = DockerTestRunner(package="tuning", base_image=base_image)
+    try:
+        result = _run_post_check(
+            runner,
+            "vm.min_free_kbytes = {{ clamp(mem_kb / 1000, 65536, 4194304) }}\n"
+            "net.core.netdev_max_backlog = {{ max(10000, nic_speed_mbps / 4) }}\n"
+            "kernel.threads-max = {{ cpus * 4096 }}\n",
+        )
+        assert_exit_code(result, 0)
+        assert_output_contains(result.stdout, "PASS    sysctl   vm.min_free_kbytes                       2113438")
+        assert_output_contains(result.stdout, "PASS    sysctl   net.core.netdev_max_backlog              100000")
+        assert_output_contains(result.stdout, "PASS    sysctl   kernel.threads-max                       917504")
+    finally:
+        runner.cleanup()
+
+
+def test_post_check_rejects_unknown_names(base_image):
+    """Anything but numbers, facts and min/max/clamp is refused before awk sees it."""
+    runner = DockerTestRunner(package="tuning", base_image=base_image)
+    try:
+        result = _run_post_check(runner, "vm.min_free_kbytes = {{ system(\"id\") }}\n")
+        assert_exit_code(result, 1)
+        assert_output_contains(result.stdout, "invalid character")
+    finally:
+        runner.cleanup()
+
+
+@pytest.mark.parametrize(
+    "expression,error",
+    [
+        ("mem_kb / (cpus - 224)", "division by zero"),
+        ("mem_kb % (cpus - 224)", "division by zero"),
+        ("mem_kb" + " * mem_kb" * 40, "is not a finite number"),
+    ],
+)
+def test_post_check_rejects_non_finite_results(base_image, expression, error):
+    """A zero divisor or an overflow fails the evaluation instead of writing inf."""
+    runner = DockerTestRunner(package="tuning", base_image=base_image)
+    try:
+        result = _run_post_check(runner, f"vm.min_free_kbytes = {{{{ {expression} }}}}\n")
+        assert_exit_code(result, 1)
+        assert_output_contains(result.stdout, error)
+    finally:
+        runner.cleanup()
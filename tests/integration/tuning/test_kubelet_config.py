@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Tests for the tuning kubelet_config.yaml config type.
+
+The config check compares the configmap against what kubelet would load. The
+main kubelet config is pointed at a configmap with KUBELET_CONFIG so no kubelet
+has to run in the container.
+"""
+
+from pathlib import Path
+
+from tests.helpers.assertions import (
+    assert_exit_code,
+    assert_output_contains,
+)
+from tests.helpers.docker_test import DockerTestRunner
+
+_HARNESS_SOURCE = Path(__file__).parent / "run_with_fake_kernel.sh"
+_HARNESS_DEST = "skyhook_dir/run_with_fake_kernel.sh"
+
+KUBELET_CONFIG = (
+    "apiVersion: kubelet.config.k8s.io/v1beta1\n"
+    "kind: KubeletConfiguration\n"
+    "cpuManagerPolicy: static\n"
+    "maxPods: 200\n"
+    "reservedSystemCPUs: \"0-1\"\n"
+    "evictionHard:\n"
+    "  memory.available: 500Mi\n"
+)
+
+
+def _run_check(runner: DockerTestRunner, installed: str):
+    return runner.run_script(
+        script="update_settings_check.sh",
+        configmaps={"kubelet_config.yaml": KUBELET_CONFIG, "installed_kubelet_config.yaml": installed},
+        env_vars={
+            "SKYHOOK_RESOURCE_ID": "1_tuning_1.2.0",
+            "KUBELET_CONFIG": "/skyhook-package/configmaps/installed_kubelet_config.yaml",
+            "KUBELET_CONFIG_DIR": "",
+        },
+    )
+
+
+def test_check_passes_when_effective_config_matches(base_image):
+    """Nested maps and quoted scalars compare equal to the kubelet config."""
+    runner = DockerTestRunner(package="tuning", base_image=base_image)
+    try:
+        result = _run_check(
+            runner,
+            "apiVersion: kubelet.config.k8s.io/v1beta1\n"
+            "kind: KubeletConfiguration\n"
+            "maxPods: 200\n"
+            "cpuManagerPolicy: static\n"
+            "reservedSystemCPUs: 0-1\n"
+            "evictionHard:\n"
+            "  memory.available: \"500Mi\"\n"
+            "  nodefs.available: 10%\n",
+        )
+        assert_exit_code(result, 0)
+        assert_output_contains(result.stdout, "PASS    kubelet  cpuManagerPolicy")
+        assert_output_contains(result.stdout, "PASS    kubelet  evictionHard.memory.available")
+    finally:
+        runner.cleanup()
+
+
+def test_check_reports_changed_and_missing_keys(base_image):
+    """Keys kubelet would load with another value, or not at all, fail the check."""
+    runner = DockerTestRunner(package="tuning", base_image=base_image)
+    try:
+        result = _run_check(
+            runner,
+            "apiVersion: kubelet.config.k8s.io/v1beta1\n"
+            "kind: KubeletConfiguration\n"
+            "maxPods: 110\n"
+            "cpuManagerPolicy: none\n",
+        )
+        assert_exit_code(result, 1)
+        assert_output_contains(result.stdout, "CHANGED kubelet  maxPods")
+        assert_output_contains(result.stdout, "MISSING kubelet  evictionHard.memory.available")
+    finally:
+        runner.cleanup()
+
+
+def _run_utils(runner: DockerTestRunner, tmp_path: Path, commands: str, **kwargs):
+    """Run commands against utils.sh from a script in skyhook_dir, under the fake kernel harness."""
+    script = tmp_path / "run_utils.sh"
+    script.write_text(f'#!/bin/bash\nset -e\nsource "${{SKYHOOK_DIR}}/skyhook_dir/utils.sh"\n{commands}\n')
+    return runner.run_script(
+        script="run_with_fake_kernel.sh",
+        script_args=["run_utils.sh"],
+        extra_files=[(_HARNESS_SOURCE, _HARNESS_DEST), (script, "skyhook_dir/run_utils.sh")],
+        **kwargs,
+    )
+
+
+def test_merge_writes_the_configmap_line_as_is(base_image, tmp_path):
+    """A merged line with "&", "\\" or "|" lands in the main config unchanged."""
+    runner = DockerTestRunner(package="tuning", base_image=base_image)
+    try:
+        line = r'providerID: "aws:///a&b|c\\d"'
+        result = _run_utils(
+            runner,
+            tmp_path,
+            f"yaml_replace_line ${{SKYHOOK_DIR}}/configmaps/installed_kubelet_config.yaml providerID '{line}'\n"
+            "cat ${SKYHOOK_DIR}/configmaps/installed_kubelet_config.yaml",
+            configmaps={"installed_kubelet_config.yaml": "maxPods: 110\nproviderID: old\ncpuManagerPolicy: none\n"},
+        )
+        assert_exit_code(result, 0)
+        assert result.stdout.splitlines() == ["maxPods: 110", line, "cpuManagerPolicy: none"]
+    finally:
+        runner.cleanup()
+
+
+def test_process_start_time_uses_proc_stat(base_image, tmp_path):
+    """The start time is starttime (field 22, in clock ticks) past the boot time, even with spaces in comm."""
+    runner = DockerTestRunner(package="tuning", base_image=base_image)
+    try:
+        result = _run_utils(
+            runner,
+            tmp_path,
+            'process_start_time 42\necho "started=$REPLY"',
+            configmaps={
+                "fake_proc": (
+                    "42/stat=42 (kube let) S 1 42 42 0 -1 4194560 1 0 0 0 0 0 0 0 20 0 1 0 12300 0 0\n"
+                    "stat=btime 1700000000\n"
+                ),
+            },
+        )
+        assert_exit_code(result, 0)
+        assert_output_contains(result.stdout, "started=1700000123")
+    finally:
+        runner.cleanup()
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Tests for the tuning modprobe.conf config type.
+
+Module state comes from a fake /sys/module built by the harness, so loaded,
+in-use and absent modules can be checked without loading anything.
+"""
+
+from pathlib import Path
+
+from tests.helpers.assertions import (
+    assert_exit_code,
+    assert_output_contains,
+)
+from tests.helpers.docker_test import DockerTestRunner
+
+# Test script lives with tests and is copied into the package at run time
+_HARNESS_SOURCE = Path(__file__).parent / "run_with_fake_kernel.sh"
+_HARNESS_DEST = "skyhook_dir/run_with_fake_kernel.sh"
+
+MODPROBE_CONF = "options nvme poll_queues=4\noptions mlx5-core probe_vf=0\nblacklist nouveau\n"
+
+FAKE_MODULES = (
+    "module/nvme/initstate=live\n"
+    "module/nvme/refcnt=3\n"
+    "module/nvme/parameters/poll_queues=0\n"
+    "module/mlx5_core/initstate=live\n"
+    "module/mlx5_core/refcnt=0\n"
+    "module/mlx5_core/parameters/probe_vf=N\n"
+)
+
+
+def test_post_check_module_parameters(base_image):
+    """Loaded modules are compared by parameter, booleans read back as Y/N."""
+    runner = DockerTestRunner(package="tuning", base_image=base_image)
+    try:
+        result = runner.run_script(
+            script="run_with_fake_kernel.sh",
+            configmaps={"modprobe.conf": MODPROBE_CONF, "fake_sysfs": FAKE_MODULES},
+            env_vars={"SKYHOOK_RESOURCE_ID": "1_tuning_1.2.0"},
+            script_args=["update_settings_post_check.sh"],
+            extra_files=[(_HARNESS_SOURCE, _HARNESS_DEST)],
+        )
+        assert_exit_code(result, 1)
+        assert_output_contains(result.stdout, "PASS    module   mlx5_core.probe_vf")
+        assert_output_contains(result.stdout, "module nvme.poll_queues: 4 != 0")
+        assert_output_contains(result.stdout, "2 checks, 1 failed")
+    finally:
+        runner.cleanup()
+
+
+def test_plan_module_reload_and_reboot(base_image):
+    """An in-use module needs a reboot, an unused one can be reloaded."""
+    runner = DockerTestRunner(package="tuning", base_image=base_image)
+    try:
+        result = runner.run_script(
+            script="run_with_fake_kernel.sh",
+            configmaps={
+                "modprobe.conf": "options nvme poll_queues=4\noptions mlx5_core prof_sel=2\n",
+                "fake_sysfs": FAKE_MODULES + "module/mlx5_core/parameters/prof_sel=1\n",
+            },
+            env_vars={"SKYHOOK_RESOURCE_ID": "1_tuning_1.2.0"},
+            script_args=["plan_interrupt.sh"],
+            extra_files=[(_HARNESS_SOURCE, _HARNESS_DEST)],
+        )
+        assert_exit_code(result, 0)
+        assert_output_contains(result.stdout, '"key": "nvme.poll_queues", "desired": "4", "live": "0", "action": "reboot"')
+        assert_output_contains(result.stdout, '"key": "mlx5_core.prof_sel", "desired": "2", "live": "1", "action": "reload"')
+        assert_output_contains(result.stdout, "Required interrupt: reboot")
+    finally:
+        runner.cleanup()
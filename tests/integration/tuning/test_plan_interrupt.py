@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Tests for tuning plan_interrupt.sh.
+
+The planner compares configmaps with the live node and reports the cheapest
+interrupt as JSON; it must never fail the apply.
+"""
+
+import json
+
+from tests.helpers.assertions import (
+    assert_exit_code,
+    assert_output_contains,
+)
+from tests.helpers.docker_test import DockerTestRunner
+
+ENV = {"SKYHOOK_RESOURCE_ID": "1_tuning_1.2.0"}
+PLAN_FILE = "/var/lib/skyhook-packages/tuning/interrupt_plan.json"
+
+
+def _plan(runner: DockerTestRunner) -> dict:
+    return json.loads(runner.get_file_contents(PLAN_FILE))
+
+
+def test_plan_none_when_live_state_matches(base_image):
+    """Sysctls that already match need no interrupt."""
+    runner = DockerTestRunner(package="tuning", base_image=base_image)
+    try:
+        result = runner.run_script(
+            script="plan_interrupt.sh",
+            configmaps={"sysctl.conf": "kernel.ostype = Linux\n"},
+            env_vars=ENV,
+        )
+        assert_exit_code(result, 0)
+        assert_output_contains(result.stdout, "Required interrupt: none")
+        plan = _plan(runner)
+        assert plan["interrupt"] == "none"
+        assert plan["changes"] == []
+    finally:
+        runner.cleanup()
+
+
+def test_plan_service_for_new_dropin(base_image):
+    """A service drop-in that isn't installed yet needs a restart of that service only."""
+    runner = DockerTestRunner(package="tuning", base_image=base_image)
+    try:
+        result = runner.run_script(
+            script="plan_interrupt.sh",
+            configmaps={"service_containerd.conf": "[Service]\nLimitSTACK=67108864\n"},
+            env_vars=ENV,
+        )
+        assert_exit_code(result, 0)
+        plan = _plan(runner)
+        assert plan["interrupt"] == "service"
+        assert plan["services"] == ["containerd"]
+    finally:
+        runner.cleanup()
+
+
+def test_plan_reboot_for_missing_kernel_args(base_image):
+    """A grub.conf argument that isn't on the kernel command line needs a reboot."""
+    runner = DockerTestRunner(package="tuning", base_image=base_image)
+    try:
+        result = runner.run_script(
+            script="plan_interrupt.sh",
+            configmaps={
+                "grub.conf": "skyhook_test_arg=1\n",
+                "service_containerd.conf": "[Service]\nLimitSTACK=67108864\n",
+            },
+            env_vars=ENV,
+        )
+        assert_exit_code(result, 0)
+        plan = _plan(runner)
+        assert plan["interrupt"] == "reboot"
+        assert plan["services"] == []
+        assert {"config": "grub.conf", "key": "skyhook_test_arg=1", "desired": "present",
+                "live": "missing", "action": "reboot"} in plan["changes"]
+    finally:
+        runner.cleanup()
+
+
+def test_plan_service_for_containerd_fragment(base_image):
+    """A containerd fragment that isn't installed yet asks the interrupt to restart containerd."""
+    runner = DockerTestRunner(package="tuning", base_image=base_image)
+    try:
+        result = runner.run_script(
+            script="plan_interrupt.sh",
+            configmaps={"containerd_config.toml": 'version = 2\n[plugins."io.containerd.grpc.v1.cri"]\nmax_concurrent_downloads = 10\n'},
+            env_vars=ENV,
+        )
+        assert_exit_code(result, 0)
+        assert_output_contains(result.stdout, "Required interrupt: service (containerd)")
+        plan = _plan(runner)
+        assert plan["interrupt"] == "service"
+        assert plan["services"] == ["containerd"]
+        assert all(c["action"] == "service" for c in plan["changes"])
+    finally:
+        runner.cleanup()
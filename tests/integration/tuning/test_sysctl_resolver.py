@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Tests for sysctl_resolver.sh through the tuning config check.
+
+The check warns, without failing, about sysctls of the tuning drop-in that a
+later sysctl file or tuned profile sets to another value.
+"""
+
+from pathlib import Path
+
+from tests.helpers.assertions import (
+    assert_exit_code,
+    assert_output_contains,
+)
+from tests.helpers.docker_test import DockerTestRunner
+
+# Test script lives with tests and is copied into the package at run time
+_HARNESS_SOURCE = Path(__file__).parent / "run_with_installed_files.sh"
+_HARNESS_DEST = "skyhook_dir/run_with_installed_files.sh"
+
+SYSCTL_CONF = "vm.swappiness=1\nvm.max_map_count=262144\n"
+TUNED_CONF = "[main]\nsummary=test\n\n[sysctl]\nvm.swappiness=10\n"
+
+
+def _run_check(runner: DockerTestRunner, configmaps: dict):
+    return runner.run_script(
+        script="run_with_installed_files.sh",
+        configmaps={"sysctl.conf": SYSCTL_CONF, "installed_sysctl.conf": SYSCTL_CONF, **configmaps},
+        env_vars={"SKYHOOK_RESOURCE_ID": "1_tuning_1.2.0"},
+        script_args=["update_settings_check.sh"],
+        extra_files=[(_HARNESS_SOURCE, _HARNESS_DEST)],
+    )
+
+
+def test_check_warns_when_tuned_profile_wins(base_image):
+    """With reapply_sysctl = 0 the tuned profile is applied last and wins."""
+    runner = DockerTestRunner(package="tuning", base_image=base_image)
+    try:
+        result = _run_check(
+            runner,
+            {"installed_tuned.conf": TUNED_CONF, "installed_tuned_main.conf": "reapply_sysctl = 0\n"},
+        )
+        assert_exit_code(result, 0)
+        assert_output_contains(
+            result.stdout,
+            "WARNING: sysctl vm.swappiness = 1 from /etc/sysctl.d/999-tuning-tuning.conf "
+            "is overridden by tuned:skyhook-test (10)",
+        )
+    finally:
+        runner.cleanup()
+
+
+def test_check_warns_when_sysctl_conf_is_reapplied(base_image):
+    """tuned re-applies the system files after its profile, /etc/sysctl.conf last."""
+    runner = DockerTestRunner(package="tuning", base_image=base_image)
+    try:
+        result = _run_check(
+            runner,
+            {"installed_tuned.conf": TUNED_CONF, "installed_etc_sysctl.conf": "vm.max_map_count = 65530\n"},
+        )
+        assert_exit_code(result, 0)
+        assert_output_contains(
+            result.stdout,
+            "WARNING: sysctl vm.max_map_count = 262144 from /etc/sysctl.d/999-tuning-tuning.conf "
+            "is overridden by /etc/sysctl.conf (65530)",
+        )
+        assert "vm.swappiness = 1" not in result.stdout
+    finally:
+        runner.cleanup()
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Tests for the kernel-version sysctl translation table (sysctl_translations.conf).
+
+The scheduler tunables depend on the kernel, so these run the post-interrupt check
+against a fake /proc/sys/kernel/osrelease and debugfs built by the harness.
+"""
+
+from pathlib import Path
+
+from tests.helpers.assertions import (
+    assert_exit_code,
+    assert_output_contains,
+)
+from tests.helpers.docker_test import DockerTestRunner
+
+# Test script lives with tests and is copied into the package at run time
+_HARNESS_SOURCE = Path(__file__).parent / "run_with_fake_kernel.sh"
+_HARNESS_DEST = "skyhook_dir/run_with_fake_kernel.sh"
+
+SCHED_SYSCTL = "kernel.sched_latency_ns=1000000\nkernel.sched_min_granularity_ns=100000\n"
+
+
+def _run_post_check(runner: DockerTestRunner, kernel: str, debugfs: str):
+    return runner.run_script(
+        script="run_with_fake_kernel.sh",
+        configmaps={"sysctl.conf": SCHED_SYSCTL, "fake_debugfs": debugfs},
+        env_vars={"SKYHOOK_RESOURCE_ID": "1_tuning_1.2.0", "FAKE_KERNEL": kernel},
+        script_args=["update_settings_post_check.sh"],
+        extra_files=[(_HARNESS_SOURCE, _HARNESS_DEST)],
+    )
+
+
+def test_eevdf_kernel_translates_and_skips(base_image):
+    """On 6.6+ min_granularity maps to base_slice_ns and latency_ns is reported unsupported."""
+    runner = DockerTestRunner(package="tuning", base_image=base_image)
+    try:
+        result = _run_post_check(runner, "6.8.0-1015-gcp", "sched/base_slice_ns=100000\n")
+        assert_exit_code(result, 0)
+        assert_output_contains(result.stdout, "kernel.sched_min_granularity_ns is debugfs:sched/base_slice_ns")
+        assert_output_contains(result.stdout, "SKIP    sysctl   kernel.sched_latency_ns")
+        assert_output_contains(result.stdout, "<unsupported on 6.8.0-1015-gcp>")
+        assert_output_contains(result.stdout, "1 checks, 0 failed")
+    finally:
+        runner.cleanup()
+
+
+def test_debugfs_kernel_checks_moved_knobs(base_image):
+    """Between 5.13 and 6.6 both knobs are read from debugfs under their own names."""
+    runner = DockerTestRunner(package="tuning", base_image=base_image)
+    try:
+        result = _run_post_check(
+            runner,
+            "5.15.0-105-generic",
+            "sched/latency_ns=1000000\nsched/min_granularity_ns=3000000\n",
+        )
+        assert_exit_code(result, 1)
+        assert_output_contains(result.stdout, "PASS    sysctl   kernel.sched_latency_ns")
+        assert_output_contains(result.stdout, "sysctl kernel.sched_min_granularity_ns: 100000 != 3000000")
+    finally:
+        runner.cleanup()
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Tests for the tuning sysfs.conf config type.
+
+The post-interrupt check runs against a fake sysfs built by the harness so the
+glob expansion and value normalization can be checked without real devices.
+"""
+
+from pathlib import Path
+
+from tests.helpers.assertions import (
+    assert_exit_code,
+    assert_output_contains,
+)
+from tests.helpers.docker_test import DockerTestRunner
+
+# Test script lives with tests and is copied into the package at run time
+_HARNESS_SOURCE = Path(__file__).parent / "run_with_fake_kernel.sh"
+_HARNESS_DEST = "skyhook_dir/run_with_fake_kernel.sh"
+
+SYSFS_CONF = (
+    "block/nvme*n1/queue/scheduler = none\n"
+    "kernel/mm/transparent_hugepage/enabled = never\n"
+    "class/net/eth*/queues/rx-*/rps_cpus = ff\n"
+    "class/net/ib*/mtu = 4092\n"
+)
+
+
+def _run_post_check(runner: DockerTestRunner, sysfs: str):
+    return runner.run_script(
+        script="run_with_fake_kernel.sh",
+        configmaps={"sysfs.conf": SYSFS_CONF, "fake_sysfs": sysfs},
+        env_vars={"SKYHOOK_RESOURCE_ID": "1_tuning_1.2.0"},
+        script_args=["update_settings_post_check.sh"],
+        extra_files=[(_HARNESS_SOURCE, _HARNESS_DEST)],
+    )
+
+
+def test_post_check_normalizes_sysfs_values(base_image):
+    """Bracketed choices and comma separated masks compare equal to the configured value."""
+    runner = DockerTestRunner(package="tuning", base_image=base_image)
+    try:
+        result = _run_post_check(
+            runner,
+            "block/nvme0n1/queue/scheduler=mq-deadline kyber [none]\n"
+            "block/nvme1n1/queue/scheduler=mq-deadline kyber [none]\n"
+            "kernel/mm/transparent_hugepage/enabled=always madvise [never]\n"
+            "class/net/eth0/queues/rx-0/rps_cpus=00000000,000000ff\n",
+        )
+        assert_exit_code(result, 0)
+        assert_output_contains(result.stdout, "PASS    sysfs    block/nvme1n1/queue/scheduler")
+        assert_output_contains(result.stdout, "PASS    sysfs    class/net/eth0/queues/rx-0/rps_cpus")
+        assert_output_contains(result.stdout, "SKIP    sysfs    class/net/ib*/mtu")
+        assert_output_contains(result.stdout, "4 checks, 0 failed")
+    finally:
+        runner.cleanup()
+
+
+def test_post_check_reports_each_matched_file(base_image):
+    """Every file a glob matches is checked on its own."""
+    runner = DockerTestRunner(package="tuning", base_image=base_image)
+    try:
+        result = _run_post_check(
+            runner,
+            "block/nvme0n1/queue/scheduler=mq-deadline kyber [none]\n"
+            "block/nvme1n1/queue/scheduler=[mq-deadline] kyber none\n"
+            "kernel/mm/transparent_hugepage/enabled=always madvise [never]\n",
+        )
+        assert_exit_code(result, 1)
+        assert_output_contains(result.stdout, "sysfs block/nvme1n1/queue/scheduler: none != mq-deadline")
+        assert_output_contains(result.stdout, "3 checks, 1 failed")
+    finally:
+        runner.cleanup()
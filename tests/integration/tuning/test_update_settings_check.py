@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Tests for tuning update_settings_check.sh.
+
+The configmaps and the installed drop-ins are compared as normalized key/value
+sets, so formatting differences pass and missing, changed and extra keys fail.
+"""
+
+from pathlib import Path
+
+from tests.helpers.assertions import (
+    assert_exit_code,
+    assert_output_contains,
+)
+from tests.helpers.docker_test import DockerTestRunner
+
+# Test script lives with tests and is copied into the package at run time
+_HARNESS_SOURCE = Path(__file__).parent / "run_with_installed_files.sh"
+_HARNESS_DEST = "skyhook_dir/run_with_installed_files.sh"
+
+ENV = {"SKYHOOK_RESOURCE_ID": "1_tuning_1.2.0"}
+
+
+def _run_check(runner: DockerTestRunner, configmaps: dict):
+    return runner.run_script(
+        script="run_with_installed_files.sh",
+        configmaps=configmaps,
+        env_vars=ENV,
+        script_args=["update_settings_check.sh"],
+        extra_files=[(_HARNESS_SOURCE, _HARNESS_DEST)],
+    )
+
+
+def test_check_ignores_formatting(base_image):
+    """Whitespace around '=', comments and spacing inside values don't cause failures."""
+    runner = DockerTestRunner(package="tuning", base_image=base_image)
+    try:
+        result = _run_check(
+            runner,
+            {
+                "sysctl.conf": "# GKE style\nvm.swappiness = 1\nnet.ipv4.tcp_rmem = 4096 87380 6291456\n",
+                "installed_sysctl.conf": "vm.swappiness=1\nnet.ipv4.tcp_rmem=4096  87380\t6291456\n",
+                "ulimit.conf": "memlock=128\n",
+                "installed_ulimit.conf": "* hard memlock 128\n",
+            },
+        )
+        assert_exit_code(result, 0)
+        assert_output_contains(result.stdout, "3 checks, 0 failed")
+    finally:
+        runner.cleanup()
+
+
+def test_check_reports_missing_changed_extra(base_image):
+    """Each kind of drift is listed per key and the check fails."""
+    runner = DockerTestRunner(package="tuning", base_image=base_image)
+    try:
+        result = _run_check(
+            runner,
+            {
+                "sysctl.conf": "vm.swappiness=1\nvm.max_map_count=262144\nkernel.pid_max=4194304\n",
+                "installed_sysctl.conf": "vm.swappiness=1\nvm.max_map_count=65530\nvm.stale=1\n",
+                "ulimit.conf": "nofile=1048576\n",
+            },
+        )
+        assert_exit_code(result, 1)
+        assert_output_contains(result.stdout, "CHANGED sysctl   vm.max_map_count")
+        assert_output_contains(result.stdout, "MISSING sysctl   kernel.pid_max")
+        assert_output_contains(result.stdout, "EXTRA   sysctl   vm.stale")
+        assert_output_contains(result.stdout, "MISSING ulimit   nofile")
+        assert_output_contains(result.stdout, "5 checks, 4 failed")
+    finally:
+        runner.cleanup()
+
+
+def test_check_dots_are_not_regex(base_image):
+    """A key only matches itself, not keys that would match it as a regex."""
+    runner = DockerTestRunner(package="tuning", base_image=base_image)
+    try:
+        result = _run_check(
+            runner,
+            {
+                "sysctl.conf": "vm.swappiness=1\n",
+                "installed_sysctl.conf": "vmXswappiness=1\n",
+            },
+        )
+        assert_exit_code(result, 1)
+        assert_output_contains(result.stdout, "MISSING sysctl   vm.swappiness")
+    finally:
+        runner.cleanup()
+
+
+CONTAINERD_FRAGMENT = """version = 2
+[plugins."io.containerd.grpc.v1.cri"]
+  max_concurrent_downloads = 10
+[plugins."io.containerd.grpc.v1.cri".registry.mirrors."docker.io"]
+  endpoint = ["https://mirror.gcr.io", "https://registry-1.docker.io"]
+"""
+
+
+def test_check_containerd_fragment_layout_independent(base_image):
+    """The drop-in is compared key by key, so dotted keys and wrapped arrays match tables."""
+    runner = DockerTestRunner(package="tuning", base_image=base_image)
+    try:
+        result = _run_check(
+            runner,
+            {
+                "containerd_config.toml": CONTAINERD_FRAGMENT,
+                "installed_containerd_config.toml": (
+                    "version = 2\n"
+                    '[plugins."io.containerd.grpc.v1.cri"]\n'
+                    "  max_concurrent_downloads = 10 # was 3\n"
+                    '  registry.mirrors."docker.io".endpoint = [\n'
+                    '    "https://mirror.gcr.io",\n'
+                    '    "https://registry-1.docker.io",\n'
+                    "  ]\n"
+                ),
+                "installed_containerd_main.toml": 'version = 2\nimports = ["/etc/containerd/conf.d/*.toml"]\n',
+            },
+        )
+        assert_exit_code(result, 0)
+        assert_output_contains(result.stdout, "PASS    import")
+        assert_output_contains(result.stdout, "3 checks, 0 failed")
+    finally:
+        runner.cleanup()
+
+
+def test_check_containerd_not_imported(base_image):
+    """A drop-in the main config doesn't import is reported."""
+    runner = DockerTestRunner(package="tuning", base_image=base_image)
+    try:
+        result = _run_check(
+            runner,
+            {
+                "containerd_config.toml": CONTAINERD_FRAGMENT,
+                "installed_containerd_config.toml": CONTAINERD_FRAGMENT,
+                "installed_containerd_main.toml": 'version = 2\nimports = ["/etc/containerd/other.toml"]\n',
+            },
+        )
+        assert_exit_code(result, 1)
+        assert_output_contains(result.stdout, "FAIL    import")
+        assert_output_contains(result.stdout, "3 checks, 1 failed")
+    finally:
+        runner.cleanup()
@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""
+Tests for tuning update_settings_post_check.sh.
+
+The container's /proc is the host's kernel view, so these use sysctl keys whose
+values are fixed (kernel.ostype is always "Linux") rather than tunables.
+"""
+
+from tests.helpers.assertions import (
+    assert_exit_code,
+    assert_output_contains,
+)
+from tests.helpers.docker_test import DockerTestRunner
+
+ENV = {"SKYHOOK_RESOURCE_ID": "1_tuning_1.2.0"}
+
+
+def test_post_check_sysctl_pass(base_image):
+    """Matching sysctls pass; comments and whitespace around '=' are ignored."""
+    runner = DockerTestRunner(package="tuning", base_image=base_image)
+    try:
+        result = runner.run_script(
+            script="update_settings_post_check.sh",
+            configmaps={"sysctl.conf": "# fixed value on every kernel\nkernel.ostype = Linux\n"},
+            env_vars=ENV,
+        )
+        assert_exit_code(result, 0)
+        assert_output_contains(result.stdout, "PASS    sysctl   kernel.ostype")
+        assert_output_contains(result.stdout, "1 checks, 0 failed")
+    finally:
+        runner.cleanup()
+
+
+def test_post_check_sysctl_fail_and_missing(base_image):
+    """Mismatched and unknown keys are each reported and the check exits 1."""
+    runner = DockerTestRunner(package="tuning", base_image=base_image)
+    try:
+        result = runner.run_script(
+            script="update_settings_post_check.sh",
+            configmaps={"sysctl.conf": "kernel.ostype=Plan9\nkernel.does_not_exist=1\n"},
+            env_vars=ENV,
+        )
+        assert_exit_code(result, 1)
+        assert_output_contains(result.stdout, "sysctl kernel.ostype: Plan9 != Linux")
+        assert_output_contains(result.stdout, "sysctl kernel.does_not_exist: 1 != <missing>")
+        assert_output_contains(result.stdout, "2 checks, 2 failed")
+    finally:
+        runner.cleanup()
@@ -28,6 +28,52 @@ CONFIGMAP_DIR="${SKYHOOK_DIR}/configmaps"
 TUNED_DIR="/etc/tuned"
 SCRIPTS_DIR="/etc/tuned/scripts"
 
+# Fingerprint and effective settings of the profiles loaded by the last successful apply:
+# a re-apply with the same content and the same active profile(s) leaves tuned alone, one
+# that only changes settings which can be applied live applies just those
+package_name=$(echo ${SKYHOOK_RESOURCE_ID:-} | cut -f 2 -d _)
+FINGERPRINT_FILE="${STATE_ROOT}/${package_name:-tuned}/tuned_fingerprint"
+EFFECTIVE_FILE="${STATE_ROOT}/${package_name:-tuned}/tuned_effective"
+# Settings applied live since tuned last loaded the profile, tuned still holds the old values
+HOT_APPLIED_FILE="${RUN_STATE_ROOT}/${package_name:-tuned}/tuned_hot_applied"
+PLAN_FILE=${INTERRUPT_PLAN_FILE:-${STATE_ROOT}/${package_name:-tuned}/interrupt_plan.json}
+# Set to true to run tuned-adm profile even when nothing changed
+TUNED_FORCE_APPLY=${TUNED_FORCE_APPLY:-false}
+# Set to false to always run tuned-adm profile when something changed
+TUNED_HOT_APPLY=${TUNED_HOT_APPLY:-true}
+
+# Usage: write_plan <unchanged|hot|full> <none|reboot>; uses the changes array
+write_plan() {
+    local json sep="" c
+    json="{\"apply\": \"$1\", \"interrupt\": \"$2\", \"changes\": ["
+    for c in "${changes[@]}"; do
+        json+="${sep}${c}"
+        sep=", "
+    done
+    json+="]}"
+    echo "Required interrupt: $2"
+    echo "$json"
+    if mkdir -p "$(dirname "$PLAN_FILE")" 2>/dev/null && echo "$json" > "${PLAN_FILE}.tmp" 2>/dev/null; then
+        mv -f "${PLAN_FILE}.tmp" "$PLAN_FILE"
+    else
+        echo "WARNING: could not write plan to $PLAN_FILE"
+    fi
+}
+
+# Usage: add_change <section> <plugin> <key> <old> <new> <live|full|reboot>
+declare -a changes=()
+add_change() {
+    local entry
+    printf "%-8s [%s] %s: %s -> %s\n" "$6" "$1" "$3" "${4:-<unset>}" "${5:-<unset>}"
+    json_escape "$1"; entry="{\"section\": \"$REPLY\""
+    json_escape "$2"; entry+=", \"plugin\": \"$REPLY\""
+    json_escape "$3"; entry+=", \"key\": \"$REPLY\""
+    json_escape "$4"; entry+=", \"old\": \"$REPLY\""
+    json_escape "$5"; entry+=", \"new\": \"$REPLY\""
+    entry+=", \"action\": \"$6\"}"
+    changes+=("$entry")
+}
+
 # ensure tuned directory exists
 mkdir -p "$TUNED_DIR"
 mkdir -p "$SCRIPTS_DIR"
@@ -45,10 +91,13 @@ for file in "$CONFIGMAP_DIR"/*_script; do
         script_path="$SCRIPTS_DIR/$(basename "$file")"
     fi
     
-    # Copy the script and make it executable
-    cp "$file" "$script_path"
+    # Copy the script if it changed and make it executable
+    if install_if_changed "$file" "$script_path"; then
+        echo "deployed script: $script_name -> $script_path"
+    else
+        echo "script unchanged: $script_name -> $script_path"
+    fi
     chmod +x "$script_path"
-    echo "deployed script: $script_name -> $script_path"
 done
 
 # process all other files as custom profiles (skip tuned_profile and *_script files)
@@ -64,9 +113,12 @@ for file in "$CONFIGMAP_DIR"/*; do
     # Create a directory for the custom profile if it doesn't exist
     mkdir -p "$custom_profile_dir"
 
-    # Copy the file contents as tuned.conf
-    cp "$file" "$custom_profile_dir/tuned.conf"
-    echo "created custom tuned profile: $profile_name"
+    # Copy the file contents as tuned.conf if they changed
+    if install_if_changed "$file" "$custom_profile_dir/tuned.conf"; then
+        echo "created custom tuned profile: $profile_name"
+    else
+        echo "custom tuned profile unchanged: $profile_name"
+    fi
 done
 
 # Now apply the main profile(s)
@@ -82,6 +134,107 @@ if [ -f "$TUNED_PROFILE_FILE" ]; then
     # Check tuned version if multiple profiles are specified
     check_tuned_version_for_multiple_profiles "$profile_count"
     
+    # Nothing to do when the profiles, their content and the active profile(s) are the
+    # same as after the last apply: tuned-adm profile re-applies every plugin
+    fingerprint=$(mktemp)
+    effective=$(mktemp)
+    trap 'rm -f "$fingerprint" "$effective"' EXIT
+    # shellcheck disable=SC2086
+    tuned_fingerprint $tuned_profiles > "$fingerprint"
+    # shellcheck disable=SC2086
+    tuned_effective_profile $tuned_profiles > "$effective"
+    active_profile=$(tuned-adm active 2>/dev/null | awk -F: '{print $2}' | xargs || true)
+    # Only changes to the settings of tuned.conf files can be applied without tuned
+    hot_apply=$TUNED_HOT_APPLY
+    if [ ! -f "$FINGERPRINT_FILE" ] || [ ! -f "$EFFECTIVE_FILE" ]; then
+        echo "no fingerprint of a previous apply at $FINGERPRINT_FILE"
+        hot_apply=false
+    else
+        files_changed=$(tuned_fingerprint_diff "$FINGERPRINT_FILE" "$fingerprint")
+        if [ -z "$files_changed" ] && [ "$active_profile" = "$tuned_profiles" ] && [ "$TUNED_FORCE_APPLY" != "true" ]; then
+            echo "tuned profile(s) $tuned_profiles already active and unchanged, nothing to apply"
+            write_plan unchanged none
+            exit 0
+        fi
+        if [ -n "$files_changed" ]; then
+            echo "changed since the last apply:"
+            echo "$files_changed" | sed 's/^/  /'
+            # Profiles owning the changed files (/etc/tuned/<profile>/..., /usr/lib/tuned/<profile>/...)
+            changed_profiles=$(echo "$files_changed" | awk '$1 != "profiles" { n = split($2, p, "/"); if (p[n - 2] == "tuned" && p[n - 1] != "scripts") print p[n - 1] }' | sort -u | xargs)
+            [ -z "$changed_profiles" ] || echo "changed profile(s): $changed_profiles"
+            if echo "$files_changed" | grep -qv '/tuned\.conf$'; then
+                hot_apply=false
+            fi
+        fi
+        if [ "$active_profile" != "$tuned_profiles" ]; then
+            echo "active profile(s) '${active_profile}' differ from '${tuned_profiles}'"
+            hot_apply=false
+        elif [ -z "$files_changed" ]; then
+            echo "TUNED_FORCE_APPLY=true, applying unchanged profile(s)"
+            hot_apply=false
+        fi
+    fi
+
+    # Diff the merged settings per plugin section. The bootloader plugin only takes effect
+    # on the next boot, settings of other plugins tuned applies right away
+    interrupt=none
+    if [ -f "$EFFECTIVE_FILE" ]; then
+        setting_changes=$(tuned_effective_diff "$EFFECTIVE_FILE" "$effective")
+        [ -z "$setting_changes" ] || echo "changed settings:"
+        while IFS=$'\t' read -r status section key old new; do
+            if [ "$status" = "removed" ]; then
+                new=""
+                tuned_section_plugin "$EFFECTIVE_FILE" "$section"
+            else
+                [ "$status" != "added" ] || old=""
+                tuned_section_plugin "$effective" "$section"
+            fi
+            plugin=$REPLY
+            if [ "$plugin" = "bootloader" ]; then
+                action=reboot
+                interrupt=reboot
+            elif tuned_live_option "$plugin" "$key" "$status" "$new"; then
+                action=live
+            else
+                action=full
+            fi
+            [ "$action" = "live" ] || hot_apply=false
+            add_change "$section" "$plugin" "$key" "$old" "$new" "$action"
+        done < <(printf '%s' "$setting_changes" | grep .)
+    elif awk -F '\t' '$1 == "bootloader" || ($2 == "type" && $3 == "bootloader") { found = 1 } END { exit !found }' "$effective"; then
+        echo "first apply of a profile with a [bootloader] section"
+        interrupt=reboot
+    fi
+
+    # Apply the live settings directly, tuned keeps its running profile until its next
+    # reload (reboot, service restart or a full apply), which loads the new files
+    if [ "$hot_apply" = "true" ]; then
+        hot_file=$(mktemp)
+        while IFS=$'\t' read -r status section key old new; do
+            tuned_section_plugin "$effective" "$section"
+            plugin=$REPLY
+            if ! tuned_live_apply "$plugin" "$key" "$new"; then
+                echo "could not apply [$section] $key=$new live"
+                hot_apply=false
+                break
+            fi
+            printf '%s\t%s\t%s\t%s\n' "$plugin" "$section" "$key" "$new" >> "$hot_file"
+            echo "applied live: [$section] $key=$new"
+        done < <(printf '%s' "$setting_changes" | grep .)
+        if [ "$hot_apply" = "true" ]; then
+            mkdir -p "$(dirname "$HOT_APPLIED_FILE")"
+            cat "$hot_file" >> "$HOT_APPLIED_FILE"
+            rm -f "$hot_file"
+            cp "$fingerprint" "$FINGERPRINT_FILE"
+            cp "$effective" "$EFFECTIVE_FILE"
+            echo "applied ${#changes[@]} changed setting(s) of $tuned_profiles live, skipped tuned-adm profile"
+            write_plan hot none
+            exit 0
+        fi
+        rm -f "$hot_file"
+        echo "falling back to tuned-adm profile"
+    fi
+
     # Validate each profile exists before applying
     available_profiles=$(tuned-adm list)
     for profile in $tuned_profiles; do
@@ -94,6 +247,13 @@ if [ -f "$TUNED_PROFILE_FILE" ]; then
     echo "applying tuned profile(s): $tuned_profiles"
     # shellcheck disable=SC2086
     tuned-adm profile $tuned_profiles
+
+    # tuned now holds every setting of the new files
+    rm -f "$HOT_APPLIED_FILE"
+    mkdir -p "$(dirname "$FINGERPRINT_FILE")"
+    cp "$fingerprint" "$FINGERPRINT_FILE"
+    cp "$effective" "$EFFECTIVE_FILE"
+    write_plan full "$interrupt"
 else
     echo "WARNING: no tuned_profile file found in $CONFIGMAP_DIR"
 fi
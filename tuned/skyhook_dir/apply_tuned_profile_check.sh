@@ -27,6 +27,11 @@ CONFIGMAP_DIR="${SKYHOOK_DIR}/configmaps"
 TUNED_DIR="/etc/tuned"
 SCRIPTS_DIR="/etc/tuned/scripts"
 
+# Settings apply_tuned_profile.sh applied live since tuned last loaded the profile
+package_name=$(echo ${SKYHOOK_RESOURCE_ID:-} | cut -f 2 -d _)
+HOT_APPLIED_FILE="${RUN_STATE_ROOT}/${package_name:-tuned}/tuned_hot_applied"
+VERIFY_REPORT_FILE=${TUNED_VERIFY_REPORT_FILE:-${STATE_ROOT}/${package_name:-tuned}/tuned_verify.json}
+
 # check tuned service is installed and running
 if ! command -v tuned-adm >/dev/null 2>&1; then
     echo "ERROR: tuned-adm is not installed"
@@ -130,12 +135,21 @@ else
     fi
 fi
 
-# verify that the profile is applied
-if ! tuned-adm verify; then
-    echo "ERROR: tuned-adm verify failed"
+# warn about profile sysctls that lose to sysctl.d files or /etc/sysctl.conf
+warn_shadowed_tuned_sysctls
 
-    echo "tuned-adm verify logs:"
-    cat /var/log/tuned/tuned.log
+# verify that the profile is applied. tuned-adm verify compares against the profile tuned
+# loaded, which doesn't have the settings applied live yet, so those are checked directly
+# and their verify failures ignored
+if [ -s "$HOT_APPLIED_FILE" ]; then
+    echo "tuned reloads the profile with the settings applied live on its next start, checking them directly"
+    if ! verify_hot_applied "$HOT_APPLIED_FILE"; then
+        echo "ERROR: settings applied live are not in effect"
+        exit 1
+    fi
+fi
+if ! tuned_verify_report "$VERIFY_REPORT_FILE" "${tuned_profiles:-}" "$HOT_APPLIED_FILE"; then
+    echo "ERROR: tuned-adm verify failed"
 
     if [[ "${INTERRUPT}" != "true" ]]; then
         echo "WARNING: Set the INTERRUPT environment variable to true if you're tunings require an interrupt or else the tunings can't be verified"
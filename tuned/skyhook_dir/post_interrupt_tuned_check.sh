@@ -18,10 +18,20 @@
 
 set -x
 
+# Source shared utilities
+SCRIPT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
+# shellcheck source=utils.sh
+source "${SCRIPT_DIR}/utils.sh"
+
 CONFIGMAP_DIR="${SKYHOOK_DIR}/configmaps"
 TUNED_DIR="/etc/tuned"
 SCRIPTS_DIR="/etc/tuned/scripts"
 
+# Settings apply_tuned_profile.sh applied live since tuned last loaded the profile
+package_name=$(echo ${SKYHOOK_RESOURCE_ID:-} | cut -f 2 -d _)
+HOT_APPLIED_FILE="${RUN_STATE_ROOT}/${package_name:-tuned}/tuned_hot_applied"
+VERIFY_REPORT_FILE=${TUNED_VERIFY_REPORT_FILE:-${STATE_ROOT}/${package_name:-tuned}/tuned_verify.json}
+
 # check tuned service is installed and running
 if ! command -v tuned-adm >/dev/null 2>&1; then
     echo "ERROR: tuned-adm is not installed"
@@ -101,29 +111,55 @@ if [ ! -f "$TUNED_PROFILE_FILE" ]; then
 else
     tuned_profiles=$(cat "$TUNED_PROFILE_FILE" | xargs)
     
-    # Validate each profile exists
-    available_profiles=$(tuned-adm list)
+    # Validate each profile exists, in the directories tuned-adm list reads
     for profile in $tuned_profiles; do
-        if ! echo "$available_profiles" | grep -q "^- $profile$"; then
-            echo "ERROR: tuned profile '$profile' not found in tuned-adm list"
+        if ! tuned_profile_dir "$profile"; then
+            echo "ERROR: tuned profile '$profile' not found in tuned's profile directories"
             exit 1
         fi
     done
     
-    # Check active profiles match expected profiles
-    active_profile=$(tuned-adm active | awk -F: '{print $2}' | xargs)
+    # Check active profiles match expected profiles. tuned records them in
+    # /etc/tuned/active_profile, ask the daemon only when the file isn't there
+    if [ -f /etc/tuned/active_profile ]; then
+        active_profile=$(xargs < /etc/tuned/active_profile)
+    else
+        active_profile=$(tuned-adm active | awk -F: '{print $2}' | xargs)
+    fi
     if [ "$active_profile" != "$tuned_profiles" ]; then
         echo "ERROR: tuned profile(s) '$tuned_profiles' not active (active: $active_profile)"
         exit 1
     fi
 fi
 
-# verify that the profile is applied
-if ! tuned-adm verify; then
-    echo "ERROR: tuned-adm verify failed"
-
-    echo "tuned-adm verify logs:"
-    cat /var/log/tuned/tuned.log
+# warn about profile sysctls that lose to sysctl.d files or /etc/sysctl.conf
+warn_shadowed_tuned_sysctls
+
+# verify that the profile is applied. Packages built on tuned can ship a drift check
+# (nvidia-tuned: tuned_drift_check.sh) that compares the live settings in one pass and
+# writes a JSON report. It only covers some plugins, so tuned-adm verify still runs
+# for the rest (script plugins, vm, sysfs, disk, ...)
+rc=0
+if [ -x "${SCRIPT_DIR}/tuned_drift_check.sh" ]; then
+    if ! "${SCRIPT_DIR}/tuned_drift_check.sh"; then
+        echo "ERROR: tuned profile settings drifted"
+        rc=1
+    fi
+fi
 
-    exit 1
+if [ -s "$HOT_APPLIED_FILE" ]; then
+    # tuned-adm verify compares against the profile tuned loaded, which doesn't have the
+    # settings applied live yet (a reboot clears the file, tuned loads the new files then),
+    # so those are checked directly and their verify failures ignored
+    echo "tuned reloads the profile with the settings applied live on its next start, checking them directly"
+    if ! verify_hot_applied "$HOT_APPLIED_FILE"; then
+        echo "ERROR: settings applied live are not in effect"
+        rc=1
+    fi
 fi
+if ! tuned_verify_report "$VERIFY_REPORT_FILE" "${tuned_profiles:-}" "$HOT_APPLIED_FILE"; then
+    echo "ERROR: tuned-adm verify failed"
+    rc=1
+fi
+
+exit $rc
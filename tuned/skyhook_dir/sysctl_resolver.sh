@@ -0,0 +1,285 @@
+#!/bin/bash
+
+# SPDX-FileCopyrightText: Copyright (c) 2026 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: Apache-2.0
+#
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Effective sysctl resolver.
+#
+# NOTE: identical copies of this script ship in tuning and tuned (which nvidia-tuned
+#       builds on). Keep them in sync (make check-shared-scripts).
+#
+# Several things set sysctls on a node and the last one to write a key wins:
+#   1. systemd-sysctl at boot: every *.conf in /etc/sysctl.d, /run/sysctl.d,
+#      /usr/local/lib/sysctl.d, /usr/lib/sysctl.d and /lib/sysctl.d, sorted by file name.
+#      A file name in an earlier directory hides the same name in later ones and a link
+#      to /dev/null masks it. /etc/sysctl.conf is only read through a sysctl.d link to it
+#      (99-sysctl.conf on most distros).
+#   2. tuned, when a profile is active: the [sysctl] sections of the active profiles and
+#      everything they include.
+#   3. tuned again, unless reapply_sysctl = 0 in tuned-main.conf: after the profile it
+#      re-applies the system files (/run/sysctl.d first, then /etc/sysctl.d, ...) and
+#      /etc/sysctl.conf last, so those win over the profile.
+# This script replays that chain from the files on disk and reports, for each key, the
+# value that ends up set and the file it comes from. Sources are file paths, or
+# tuned:<profile> for tuned profiles.
+#
+# Usage:
+#   sysctl_resolver.sh resolve [key...]     Print "key<TAB>value<TAB>source" for the winning value
+#                                           of each key (of every key set anywhere if none given)
+#   sysctl_resolver.sh layers <key>         Print "source<TAB>value" for every write of <key>, in
+#                                           the order they happen (the last line wins)
+#   sysctl_resolver.sh shadowed <file>...   Print "key<TAB>intended<TAB>value<TAB>source" for every
+#                                           key of the files whose value loses to another source;
+#                                           "tuned" checks the active tuned profiles. Exit 1 if any
+#
+# Environment:
+#   SYSCTL_ROOT     prefix for every path read (default: empty, i.e. the node's /)
+#   TUNED_PROFILES  space separated active tuned profiles (default: read from
+#                   /etc/tuned/active_profile, no tuned layer if it is missing or empty)
+
+set -e
+
+if [ ${SET_X:-0} -eq 1 ]; then
+set -x
+fi
+
+SYSCTL_ROOT=${SYSCTL_ROOT:-}
+
+SYSTEMD_SYSCTL_DIRS=(/etc/sysctl.d /run/sysctl.d /usr/local/lib/sysctl.d /usr/lib/sysctl.d /lib/sysctl.d)
+TUNED_SYSCTL_DIRS=(/run/sysctl.d /etc/sysctl.d /usr/local/lib/sysctl.d /usr/lib/sysctl.d /lib/sysctl.d)
+TUNED_PROFILE_DIRS=(/etc/tuned/profiles /etc/tuned /usr/lib/tuned/profiles /usr/lib/tuned)
+
+# Print "source<TAB>key<TAB>value" for every assignment in a sysctl.d style file
+# Keys use "." separators, values have their whitespace collapsed, "-" prefixes are dropped
+# Usage: emit_sysctl_file <source> <path>
+emit_sysctl_file() {
+    awk -v src="$1" '
+        /^[ \t]*([#;]|$)/ { next }
+        {
+            i = index($0, "=")
+            if (i == 0) next
+            key = substr($0, 1, i - 1)
+            val = substr($0, i + 1)
+            gsub(/^[ \t]+|[ \t]+$/, "", key)
+            sub(/^-/, "", key)
+            gsub("/", ".", key)
+            gsub(/[ \t]+/, " ", val)
+            gsub(/^ | $/, "", val)
+            print src "\t" key "\t" val
+        }' "$2"
+}
+
+# Print the sysctl.d files to apply, in order, with the directory precedence of $@
+# Usage: sysctl_d_files <dir>...
+sysctl_d_files() {
+    local dir f name
+    local -A seen=()
+    local -a names=()
+    for dir in "$@"; do
+        for f in "${SYSCTL_ROOT}${dir}"/*.conf; do
+            [ -e "$f" ] || [ -L "$f" ] || continue
+            name=$(basename "$f")
+            [ -z "${seen[$name]+set}" ] || continue
+            seen[$name]=$f
+            names+=("$name")
+        done
+    done
+    [ ${#names[@]} -gt 0 ] || return 0
+    while read -r name; do
+        f=${seen[$name]}
+        # Links to /dev/null (or empty files) mask the name without setting anything
+        [ "$(readlink "$f" 2>/dev/null)" = /dev/null ] && continue
+        [ -f "$f" ] || continue
+        echo "$f"
+    done < <(printf '%s\n' "${names[@]}" | LC_ALL=C sort)
+}
+
+# Usage: emit_system <systemd|tuned>
+emit_system() {
+    local f
+    if [ "$1" = systemd ]; then
+        while read -r f; do
+            emit_sysctl_file "${f#"$SYSCTL_ROOT"}" "$f"
+        done < <(sysctl_d_files "${SYSTEMD_SYSCTL_DIRS[@]}")
+    else
+        while read -r f; do
+            emit_sysctl_file "${f#"$SYSCTL_ROOT"}" "$f"
+        done < <(sysctl_d_files "${TUNED_SYSCTL_DIRS[@]}")
+        if [ -f "${SYSCTL_ROOT}/etc/sysctl.conf" ]; then
+            emit_sysctl_file /etc/sysctl.conf "${SYSCTL_ROOT}/etc/sysctl.conf"
+        fi
+    fi
+}
+
+# Sets REPLY to the tuned.conf of a profile, returns 1 if the profile isn't installed
+tuned_profile_conf() {
+    local dir
+    for dir in "${TUNED_PROFILE_DIRS[@]}"; do
+        if [ -f "${SYSCTL_ROOT}${dir}/$1/tuned.conf" ]; then
+            REPLY="${SYSCTL_ROOT}${dir}/$1/tuned.conf"
+            return 0
+        fi
+    done
+    return 1
+}
+
+# Print the sysctls of a tuned profile: included profiles first, then its own
+# [sysctl] sections (or sections with type=sysctl)
+# Usage: emit_tuned_profile <profile> [visited...]
+emit_tuned_profile() {
+    local profile=$1 conf inc
+    shift
+    case " $* " in *" $profile "*) return 0 ;; esac
+    if ! tuned_profile_conf "$profile"; then
+        echo "WARNING: tuned profile ${profile} not found" >&2
+        return 0
+    fi
+    conf=$REPLY
+    for inc in $(awk '
+        /^[ \t]*\[/ { main = ($0 ~ /^[ \t]*\[main\]/) ; next }
+        main && /^[ \t]*include[ \t]*=/ { sub(/^[^=]*=/, ""); gsub(/,/, " "); print }' "$conf"); do
+        # Includes built from variables (${f:...}) can't be resolved from the files
+        case "$inc" in *'$'*) continue ;; esac
+        emit_tuned_profile "$inc" "$@" "$profile"
+    done
+    awk -v src="tuned:${profile}" '
+        /^[ \t]*([#;]|$)/ { next }
+        /^[ \t]*\[/ {
+            sec = $0; gsub(/^[ \t]*\[|\][ \t]*$/, "", sec)
+            n++; name[n] = sec; start[n] = NR
+            next
+        }
+        { line[NR] = $0; in_sec[NR] = n }
+        END {
+            for (s = 1; s <= n; s++) is_sysctl[s] = (name[s] == "sysctl")
+            for (r in line) {
+                if (line[r] ~ /^[ \t]*type[ \t]*=[ \t]*sysctl[ \t]*$/) is_sysctl[in_sec[r]] = 1
+            }
+            for (r = 1; r <= NR; r++) {
+                if (!(r in line) || !is_sysctl[in_sec[r]]) continue
+                i = index(line[r], "=")
+                if (i == 0) continue
+                key = substr(line[r], 1, i - 1)
+                val = substr(line[r], i + 1)
+                gsub(/^[ \t]+|[ \t]+$/, "", key)
+                if (key == "type" || key == "devices" || key == "replace") continue
+                gsub("/", ".", key)
+                gsub(/[ \t]+/, " ", val)
+                gsub(/^ | $/, "", val)
+                print src "\t" key "\t" val
+            }
+        }' "$conf"
+}
+
+# Sets REPLY to the active tuned profiles, empty if tuned isn't in use
+tuned_active_profiles() {
+    REPLY=${TUNED_PROFILES:-}
+    if [ -z "$REPLY" ] && [ -f "${SYSCTL_ROOT}/etc/tuned/active_profile" ]; then
+        REPLY=$(cat "${SYSCTL_ROOT}/etc/tuned/active_profile")
+    fi
+    REPLY=$(echo $REPLY)
+}
+
+# Returns 0 unless tuned-main.conf has reapply_sysctl = 0 (tuned defaults it to 1)
+tuned_reapplies_sysctl() {
+    local main="${SYSCTL_ROOT}/etc/tuned/tuned-main.conf"
+    [ -f "$main" ] || return 0
+    ! awk -F= '
+        /^[ \t]*reapply_sysctl[ \t]*=/ { v = $2; gsub(/[ \t]/, "", v) }
+        END { exit !(v == "0" || tolower(v) == "false") }' "$main"
+}
+
+# Print every sysctl write, "source<TAB>key<TAB>value", in the order they happen
+emit_chain() {
+    local profile
+    emit_system systemd
+    tuned_active_profiles
+    [ -n "$REPLY" ] || return 0
+    for profile in $REPLY; do
+        emit_tuned_profile "$profile"
+    done
+    if tuned_reapplies_sysctl; then
+        emit_system tuned
+    fi
+}
+
+resolve() {
+    emit_chain | awk -F'\t' -v want="$*" '
+        BEGIN { n = split(want, w, " "); for (i = 1; i <= n; i++) wanted[w[i]] = 1 }
+        n && !($2 in wanted) { next }
+        !($2 in val) { order[++count] = $2 }
+        { val[$2] = $3; src[$2] = $1 }
+        END { for (i = 1; i <= count; i++) print order[i] "\t" val[order[i]] "\t" src[order[i]] }'
+}
+
+layers() {
+    emit_chain | awk -F'\t' -v key="$1" '$2 == key { print $1 "\t" $3 }'
+}
+
+# Usage: shadowed <file|tuned>...
+shadowed() {
+    local arg profile f
+    local -a intended=()
+    for arg in "$@"; do
+        if [ "$arg" = tuned ]; then
+            tuned_active_profiles
+            for profile in $REPLY; do
+                intended+=("$(emit_tuned_profile "$profile")")
+            done
+        else
+            [ -f "$arg" ] || { echo "ERROR: $arg not found" >&2; exit 1; }
+            f=$(readlink -f "$arg")
+            intended+=("$(emit_sysctl_file "${f#"$SYSCTL_ROOT"}" "$arg")")
+        fi
+    done
+    # Intended writes first, then the chain; a key is shadowed when the chain's last
+    # value for it differs from the last intended one
+    { printf '%s\n' "${intended[@]}" | awk 'NF { print "I\t" $0 }'; emit_chain | awk '{ print "C\t" $0 }'; } \
+        | awk -F'\t' '
+            $1 == "I" { if (!($3 in want)) order[++count] = $3; want[$3] = $4; next }
+            { val[$3] = $4; src[$3] = $2 }
+            END {
+                bad = 0
+                for (i = 1; i <= count; i++) {
+                    k = order[i]
+                    if (!(k in val) || val[k] == want[k]) continue
+                    print k "\t" want[k] "\t" val[k] "\t" src[k]
+                    bad = 1
+                }
+                exit bad
+            }'
+}
+
+cmd="${1:-}"
+case "$cmd" in
+    resolve)
+        shift
+        resolve "$@"
+        ;;
+    layers)
+        [ -n "${2:-}" ] || { echo "Usage: $0 layers <key>" >&2; exit 1; }
+        layers "$2"
+        ;;
+    shadowed)
+        [ -n "${2:-}" ] || { echo "Usage: $0 shadowed <file|tuned>..." >&2; exit 1; }
+        shift
+        shadowed "$@"
+        ;;
+    *)
+        echo "Usage: $0 resolve [key...] | layers <key> | shadowed <file|tuned>..." >&2
+        exit 1
+        ;;
+esac
@@ -43,3 +43,9 @@ if systemctl is-active --quiet tuned; then
     systemctl disable --now tuned
     systemctl status tuned
 fi
+
+# forget what the last apply did so a reinstall applies the profile again
+package_name=$(echo ${SKYHOOK_RESOURCE_ID:-} | cut -f 2 -d _)
+state_dir="${STATE_ROOT:-/var/lib/skyhook-packages}/${package_name:-tuned}"
+rm -f "$state_dir/tuned_fingerprint" "$state_dir/tuned_effective" "$state_dir/interrupt_plan.json"
+rm -f "${RUN_STATE_ROOT:-/run/skyhook-packages}/${package_name:-tuned}/tuned_hot_applied"
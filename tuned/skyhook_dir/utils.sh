@@ -18,6 +18,16 @@
 
 # Shared utility functions for tuned scripts
 
+# Roots of procfs and sysfs, overridable so the live settings can be checked against a fake tree
+PROC_ROOT=${PROC_ROOT:-/proc}
+SYS_ROOT=${SYS_ROOT:-/sys}
+
+# Where the package keeps node-local state (fingerprint and effective profile of the last apply)
+# and state that has to go away on reboot, when tuned loads its profile again.
+# Scripts use <root>/${package_name} so packages built on tuned don't collide
+STATE_ROOT=${STATE_ROOT:-/var/lib/skyhook-packages}
+RUN_STATE_ROOT=${RUN_STATE_ROOT:-/run/skyhook-packages}
+
 # Function to check if tuned version supports multiple profiles (requires >= 2.24)
 # Usage: check_tuned_version_for_multiple_profiles <profile_count>
 # Returns: 0 if OK, exits with 1 if version check fails
@@ -59,3 +69,519 @@ check_tuned_version_for_multiple_profiles() {
     
     echo "tuned version $tuned_version supports multiple profiles"
 }
+
+# Function to warn about sysctls of the active tuned profile(s) that end up with another value
+# tuned re-applies /etc/sysctl.d and /etc/sysctl.conf after the profile unless
+# reapply_sysctl = 0 is set in /etc/tuned/tuned-main.conf, so those files win
+# Usage: warn_shadowed_tuned_sysctls
+warn_shadowed_tuned_sysctls() {
+    local key intended value source
+    while IFS=$'\t' read -r key intended value source; do
+        echo "WARNING: tuned sysctl $key = $intended is overridden by $source ($value)"
+    done < <("${SCRIPT_DIR}/sysctl_resolver.sh" shadowed tuned || true)
+}
+
+# Copy src to dest unless dest already has the same content
+# Returns 0 when dest was written, 1 when it was already up to date
+# Usage: if install_if_changed src dest; then echo changed; fi
+install_if_changed() {
+    local src=$1 dest=$2
+    if [ -f "$dest" ] && cmp -s "$src" "$dest"; then
+        return 1
+    fi
+    if ! cp "$src" "$dest"; then
+        echo "ERROR: could not install ${dest}"
+        exit 1
+    fi
+    return 0
+}
+
+# Directory tuned loads a profile from, /etc/tuned wins over /usr/lib/tuned
+# (tuned >= 2.24 keeps them in a profiles/ subdirectory of each)
+# Usage: tuned_profile_dir name && echo "$REPLY"
+tuned_profile_dir() {
+    local dir
+    REPLY=""
+    for dir in /etc/tuned/profiles /etc/tuned /usr/lib/tuned/profiles /usr/lib/tuned; do
+        if [ -f "$dir/$1/tuned.conf" ]; then
+            REPLY="$dir/$1"
+            return 0
+        fi
+    done
+    return 1
+}
+
+# Print the directory of each given profile and of every profile it includes, once each
+# Usage: tuned_profile_closure profile...
+tuned_profile_closure() {
+    local -A seen=()
+    local -a queue=("$@")
+    local name
+    while [ ${#queue[@]} -gt 0 ]; do
+        name=${queue[0]}
+        queue=("${queue[@]:1}")
+        [ -z "${seen[$name]:-}" ] || continue
+        seen[$name]=1
+        tuned_profile_dir "$name" || continue
+        echo "$REPLY"
+        tuned_profile_includes "$REPLY/tuned.conf"
+        queue+=("${INCLUDES[@]}")
+    done
+}
+
+# Set INCLUDES to the profiles the include= of a tuned.conf [main] names, in order.
+# Includes tuned expands at runtime (${...}) can't be followed and are skipped
+# Usage: tuned_profile_includes /etc/tuned/<profile>/tuned.conf; echo "${INCLUDES[@]}"
+tuned_profile_includes() {
+    local name
+    INCLUDES=()
+    for name in $(awk '/^\[/ { main = ($0 ~ /^\[main\]/) }
+        main && /^[ \t]*include[ \t]*=/ { sub(/^[^=]*=/, ""); gsub(/,/, " "); print }' "$1"); do
+        [[ "$name" == *'$'* ]] || INCLUDES+=("$name")
+    done
+}
+
+# Print the tuned.conf files tuned merges for the given profiles, in the order it loads
+# them: the includes of a profile (recursively) before the profile itself
+# Usage: tuned_profile_load_order profile...
+tuned_profile_load_order() {
+    local name conf
+    local depth=${_TUNED_INCLUDE_DEPTH:-0}
+    if [ "$depth" -gt 16 ]; then
+        echo "WARNING: tuned includes nested too deep, include loop?" >&2
+        return 0
+    fi
+    for name in "$@"; do
+        tuned_profile_dir "$name" || continue
+        conf="$REPLY/tuned.conf"
+        tuned_profile_includes "$conf"
+        # shellcheck disable=SC2086
+        _TUNED_INCLUDE_DEPTH=$((depth + 1)) tuned_profile_load_order "${INCLUDES[@]}"
+        echo "$conf"
+    done
+}
+
+# Print the settings of the given profiles merged like tuned merges them, as
+# "<section>\t<key>\t<value>" lines sorted by section and key. Later files override
+# earlier ones key by key, replace=1 in a section drops what earlier files set in it.
+# [main] only holds the includes and summary and is left out
+# Usage: tuned_effective_profile profile... > file
+tuned_effective_profile() {
+    local -a files=()
+    local conf
+    while read -r conf; do
+        files+=("$conf")
+    done < <(tuned_profile_load_order "$@")
+    [ ${#files[@]} -gt 0 ] || return 0
+    awk '
+        function flush(   k, s) {
+            for (s in replace) {
+                for (k in merged) {
+                    split(k, p, SUBSEP)
+                    if (p[1] == s) delete merged[k]
+                }
+            }
+            for (k in file) merged[k] = file[k]
+            delete file
+            delete replace
+        }
+        FNR == 1 { flush(); section = "" }
+        /^[ \t]*[#;]/ || /^[ \t]*$/ { next }
+        /^[ \t]*\[.*\][ \t]*$/ { section = $0; gsub(/^[ \t]*\[|\][ \t]*$/, "", section); next }
+        section != "" && section != "main" && index($0, "=") {
+            key = substr($0, 1, index($0, "=") - 1); value = substr($0, index($0, "=") + 1)
+            gsub(/^[ \t]+|[ \t]+$/, "", key); gsub(/^[ \t]+|[ \t]+$/, "", value)
+            if (key == "replace" && value ~ /^(1|true|yes|y|on)$/) replace[section] = 1
+            file[section, key] = value
+        }
+        END {
+            flush()
+            for (k in merged) { split(k, p, SUBSEP); print p[1] "\t" p[2] "\t" merged[k] }
+        }' "${files[@]}" | sort -t $'\t' -k 1,1 -k 2,2
+}
+
+# Print the settings that differ between two effective profiles as
+# "<added|changed|removed>\t<section>\t<key>\t<old>\t<new>" lines, the missing
+# old or new value is "-" so read with IFS=$'\t' doesn't drop the field
+# Usage: tuned_effective_diff old_file new_file
+tuned_effective_diff() {
+    awk -F '\t' '
+        FNR == 1 { n++ }
+        { value[n, $1 SUBSEP $2] = $3; keys[$1 SUBSEP $2] = 1 }
+        END {
+            for (k in keys) {
+                split(k, p, SUBSEP)
+                if (!((1, k) in value)) print "added\t" p[1] "\t" p[2] "\t-\t" value[2, k]
+                else if (!((2, k) in value)) print "removed\t" p[1] "\t" p[2] "\t" value[1, k] "\t-"
+                else if (value[1, k] != value[2, k]) print "changed\t" p[1] "\t" p[2] "\t" value[1, k] "\t" value[2, k]
+            }
+        }' "$1" "$2" | sort -t $'\t' -k 2,2 -k 3,3
+}
+
+# Plugin of a section of an effective profile: its type= or else the section name
+# Usage: tuned_section_plugin file section; echo "$REPLY"
+tuned_section_plugin() {
+    REPLY=$(awk -F '\t' -v s="$2" '$1 == s && $2 == "type" { print $3 }' "$1")
+    REPLY=${REPLY:-$2}
+}
+
+# Options tuned handles the same way for every plugin; changing them changes which
+# devices or profiles the plugin applies to, which only tuned itself can work out
+TUNED_COMMON_OPTIONS=" type replace enabled devices devices_udev_regex priority uname_regex cpuinfo_regex drop "
+
+# Whether a change of one option can be applied live without tuned: sysctls, sysfs
+# attributes, the transparent hugepage mode and the CPU governor or energy performance
+# preference of options the loaded profile already sets. Added and removed options need
+# tuned-adm profile: tuned only saves the value it finds for the options it applies and
+# restores that one (tuned-adm off, uninstall), so neither may be changed behind its back.
+# Values tuned expands at runtime need it too
+# Usage: tuned_live_option <plugin> <key> <added|changed|removed> <value> && echo live
+tuned_live_option() {
+    local plugin=$1 key=$2 status=$3 value=$4
+    [ "$status" = "changed" ] || return 1
+    [[ "$value" != *'${'* ]] || return 1
+    [[ "$TUNED_COMMON_OPTIONS" != *" $key "* ]] || return 1
+    case "$plugin" in
+        sysctl|sysfs) return 0 ;;
+        vm) [[ "$key" =~ ^transparent_hugepages?(\.defrag)?$ ]] ;;
+        cpu) [ "$key" = "governor" ] || [ "$key" = "energy_performance_preference" ] ;;
+        *) return 1 ;;
+    esac
+}
+
+# Print the files an option sets, one per line
+# Usage: tuned_live_paths <plugin> <key>
+tuned_live_paths() {
+    local plugin=$1 key=$2 path
+    case "$plugin" in
+        sysctl)
+            path=${key//.//}
+            echo "${PROC_ROOT}/sys/${path}"
+            ;;
+        sysfs)
+            # shellcheck disable=SC2086
+            for path in ${SYS_ROOT}${key#/sys}; do
+                [ ! -e "$path" ] || echo "$path"
+            done
+            ;;
+        vm)
+            path=enabled
+            [[ "$key" != *.defrag ]] || path=defrag
+            echo "${SYS_ROOT}/kernel/mm/transparent_hugepage/${path}"
+            ;;
+        cpu)
+            for path in "${SYS_ROOT}"/devices/system/cpu/cpu[0-9]*/cpufreq; do
+                [ -d "$path" ] || continue
+                case "$key" in
+                    governor) echo "$path/scaling_governor" ;;
+                    energy_performance_preference) echo "$path/energy_performance_preference" ;;
+                esac
+            done
+            ;;
+    esac
+}
+
+# The value an option should have in a file: governors and energy performance
+# preferences are "a|b" lists of which the first one the CPU offers wins
+# Usage: tuned_live_wanted <plugin> <key> <value> <path>; echo "$REPLY"
+tuned_live_wanted() {
+    local plugin=$1 key=$2 value=$3 path=$4 available candidate
+    REPLY=$value
+    [ "$plugin" = "cpu" ] || return 0
+    case "$key" in
+        governor) available="$(dirname "$path")/scaling_available_governors" ;;
+        *) available="$(dirname "$path")/energy_performance_available_preferences" ;;
+    esac
+    [ -f "$available" ] || return 0
+    for candidate in ${value//|/ }; do
+        if [[ " $(cat "$available") " == *" $candidate "* ]]; then
+            REPLY=$candidate
+            return 0
+        fi
+    done
+}
+
+# Current value of a file, the selected "[word]" for files like transparent_hugepage/enabled,
+# with whitespace squashed so multi-field sysctls compare equal
+# Usage: tuned_live_current path; echo "$REPLY"
+tuned_live_current() {
+    local -a fields
+    REPLY=$(cat "$1" 2>/dev/null) || return 1
+    if [[ "$REPLY" =~ \[([^]]*)\] ]]; then
+        REPLY=${BASH_REMATCH[1]}
+    fi
+    read -r -a fields <<< "$REPLY"
+    REPLY="${fields[*]}"
+}
+
+# Apply one option live, returns 1 if a file couldn't be written or nothing matched
+# Usage: tuned_live_apply <plugin> <key> <value>
+tuned_live_apply() {
+    local plugin=$1 key=$2 value=$3 path found=false
+    while read -r path; do
+        found=true
+        tuned_live_wanted "$plugin" "$key" "$value" "$path"
+        echo "$REPLY" > "$path" 2>/dev/null || return 1
+    done < <(tuned_live_paths "$plugin" "$key")
+    [ "$found" = "true" ]
+}
+
+# Check one option applied live, prints "<key>: expected X, got Y" for every file that differs
+# Usage: tuned_live_verify <plugin> <key> <value>
+tuned_live_verify() {
+    local plugin=$1 key=$2 value=$3 path rc=0 wanted
+    while read -r path; do
+        tuned_live_wanted "$plugin" "$key" "$value" "$path"
+        read -r -a wanted <<< "$REPLY"
+        tuned_live_current "$path" || REPLY="<missing>"
+        if [ "$REPLY" != "${wanted[*]}" ]; then
+            echo "${key} (${path}): expected ${wanted[*]}, got ${REPLY}"
+            rc=1
+        fi
+    done < <(tuned_live_paths "$plugin" "$key")
+    return $rc
+}
+
+# Fingerprint of what applying the given profiles loads: the profile names, then
+# "<sha256>  <file>" for every file of the profiles, the profiles they include and
+# the shared scripts in /etc/tuned/scripts
+# Usage: tuned_fingerprint profile... > file
+tuned_fingerprint() {
+    local dir
+    echo "profiles $*"
+    {
+        tuned_profile_closure "$@" | while read -r dir; do
+            find "$dir" -type f -print0
+        done
+        [ ! -d /etc/tuned/scripts ] || find /etc/tuned/scripts -type f -print0
+    } | sort -zu | xargs -0 -r sha256sum
+}
+
+# Print what differs between two fingerprints, one "<added|changed|removed> <file>" per line,
+# and "profiles <old> -> <new>" when the requested profiles differ
+# Usage: tuned_fingerprint_diff old_file new_file
+tuned_fingerprint_diff() {
+    awk '
+        FNR == 1 { n++ }
+        /^profiles( |$)/ { profiles[n] = substr($0, 10); next }
+        { sum[n, substr($0, 67)] = $1; files[substr($0, 67)] = 1 }
+        END {
+            if (profiles[1] != profiles[2]) print "profiles " profiles[1] " -> " profiles[2]
+            for (f in files) {
+                if (!((1, f) in sum)) print "added " f
+                else if (!((2, f) in sum)) print "removed " f
+                else if (sum[1, f] != sum[2, f]) print "changed " f
+            }
+        }' "$1" "$2" | sort -k 2
+}
+
+# Check the settings apply_tuned_profile.sh applied live ("<plugin>\t<section>\t<key>\t<value>"
+# lines, a later line for the same option wins). Prints the ones that differ, returns 1 if any
+# Usage: verify_hot_applied file
+verify_hot_applied() {
+    local plugin section key value rc=0
+    local -A seen=()
+    while IFS=$'\t' read -r plugin section key value; do
+        [ -z "${seen[$section.$key]:-}" ] || continue
+        seen[$section.$key]=1
+        if tuned_live_verify "$plugin" "$key" "$value"; then
+            echo "verified live setting: [$section] $key=$value"
+        else
+            rc=1
+        fi
+    done < <(tac "$1")
+    return $rc
+}
+
+# tuned's log, the checks only look at the part written since the profile was last applied
+TUNED_LOG=${TUNED_LOG:-/var/log/tuned/tuned.log}
+TUNED_LOG_MAX_LINES=${TUNED_LOG_MAX_LINES:-500}
+
+# Print the tuned log lines written since tuned last started applying a profile, at most
+# TUNED_LOG_MAX_LINES of them. The log is read backwards from its end, so a long-lived
+# node's log costs no more than the lines printed
+# Usage: tuned_log_since_apply
+tuned_log_since_apply() {
+    [ -f "$TUNED_LOG" ] || return 0
+    tac "$TUNED_LOG" | awk -v max="$TUNED_LOG_MAX_LINES" '
+        NR > max { print "... earlier lines omitted, showing the last " max; exit }
+        { print }
+        / tuned\.daemon\.daemon: (Using .* profile|starting tuning)/ { exit }' | tac
+}
+
+# Summarize the verify run of a tuned log excerpt per plugin as
+# "<plugin>\t<passed>\t<failed>\t<elapsed ms>" lines, then "failed\t<plugin>\t<option>\t<message>"
+# lines. tuned logs most verify lines through tuned.plugins.base, so each line is attributed
+# by the option it names ('<option>' = ..., or the path of a script) to the plugin of the
+# effective profile section that sets it; options the profile doesn't name fall back to the
+# logger. Failures of options listed in the ignore file (settings applied live,
+# "<plugin>\t<section>\t<key>\t<value>" lines) are printed as "ignored\t<plugin>\t<option>\t<message>"
+# instead and not counted. Only the last "verifying profile" run counts; elapsed is the
+# time from the previous verify line to the plugin's last one, from the log timestamps
+# Usage: tuned_verify_results [effective profile file] [ignore file] < log excerpt
+tuned_verify_results() {
+    awk -v effective="${1:-}" -v ignore_file="${2:-}" -v common="$TUNED_COMMON_OPTIONS" '
+        function ms(t,   a) { split(t, a, /[:,.]/); return ((a[1] * 60 + a[2]) * 60 + a[3]) * 1000 + a[4] }
+        function elapsed(t,   d) {
+            # Without the "verifying profile" line the first verify line starts the clock
+            if (!have_prev) { prev = ms(t); have_prev = 1 }
+            d = ms(t) - prev; prev = ms(t)
+            return d < 0 ? d + 86400000 : d
+        }
+        function basename(path) { sub(/.*\//, "", path); return path }
+        BEGIN {
+            while (effective != "" && (getline line < effective) > 0) {
+                split(line, f, "\t")
+                if (!(f[1] in plugin_of)) plugin_of[f[1]] = f[1]
+                if (f[2] == "type") {
+                    plugin_of[f[1]] = f[3]
+                } else if (f[2] == "script") {
+                    n = split(f[3], words, /[ \t]+/)
+                    for (i = 1; i <= n; i++) if (words[i] != "") owner["script:" basename(words[i])] = f[1]
+                } else if (index(common, " " f[2] " ") == 0) {
+                    owner[f[2]] = f[1]
+                }
+            }
+            while (ignore_file != "" && (getline line < ignore_file) > 0) {
+                split(line, f, "\t")
+                ignore[f[1], f[3]] = 1
+            }
+            n = 0
+        }
+        / tuned\.daemon\.daemon: verifying profile/ {
+            split("", passed); split("", failed); split("", took); split("", order); split("", failures); split("", ignored)
+            n = 0; nf = 0; ni = 0; prev = ms($2); have_prev = 1
+            next
+        }
+        $4 ~ /^tuned\.plugins\./ && $5 == "verify:" && ($6 == "passed:" || $6 == "failed:") {
+            message = substr($0, index($0, $6) + length($6) + 1)
+            option = ""
+            if (match(message, /'\''[^'\'']*'\''/)) option = substr(message, RSTART + 1, RLENGTH - 2)
+            if (option in owner) {
+                plugin = plugin_of[owner[option]]
+            } else if (("script:" basename(option)) in owner) {
+                plugin = plugin_of[owner["script:" basename(option)]]
+            } else {
+                plugin = $4
+                sub(/:$/, "", plugin)
+                sub(/^tuned\.plugins\.(plugin_)?/, "", plugin)
+            }
+            if (!(plugin in took)) { order[++n] = plugin; passed[plugin] = 0; failed[plugin] = 0; took[plugin] = 0 }
+            took[plugin] += elapsed($2)
+            if ($6 == "passed:") {
+                passed[plugin]++
+            } else if ((plugin, option) in ignore) {
+                ignored[++ni] = plugin "\t" option "\t" message
+            } else {
+                failed[plugin]++
+                failures[++nf] = plugin "\t" option "\t" message
+            }
+        }
+        END {
+            for (i = 1; i <= n; i++) print order[i] "\t" passed[order[i]] "\t" failed[order[i]] "\t" took[order[i]]
+            for (i = 1; i <= nf; i++) print "failed\t" failures[i]
+            for (i = 1; i <= ni; i++) print "ignored\t" ignored[i]
+        }'
+}
+
+# Run tuned-adm verify and report the result per plugin, as a table and as one
+# line of JSON that is also written to the given file. The results come from the lines
+# tuned logged during this run; on failure the tuned log since the last apply is printed
+# (bounded by TUNED_LOG_MAX_LINES) instead of the whole log. tuned compares against the
+# profile it loaded, so failures of the settings listed in the hot-applied file (which
+# verify_hot_applied checks) are ignored: verify passes when they are the only ones
+# Usage: tuned_verify_report <report file> <profile(s)> [hot-applied file]; returns 1 if verify failed
+tuned_verify_report() {
+    local report_file=$1 profiles=$2 hot_file=${3:-}
+    local start duration result=passed rc=0 log_size verify_log effective
+    local plugin passed failed took option message entry json sep=""
+    local -a plugins=() failures=() ignored=() table=()
+
+    effective=$(mktemp)
+    # shellcheck disable=SC2086
+    [ -z "$profiles" ] || tuned_effective_profile $profiles > "$effective"
+    [ -s "$hot_file" ] || hot_file=""
+
+    log_size=$(stat -c %s "$TUNED_LOG" 2>/dev/null || echo 0)
+    start=$(date +%s%N)
+    if ! tuned-adm verify; then
+        result=failed
+        rc=1
+    fi
+    duration=$((($(date +%s%N) - start) / 1000000))
+    # What tuned logged for this run, or the log since the apply if it was rotated meanwhile
+    if [ -f "$TUNED_LOG" ] && [ "$(stat -c %s "$TUNED_LOG")" -ge "$log_size" ]; then
+        verify_log=$(tail -c +$((log_size + 1)) "$TUNED_LOG")
+    else
+        verify_log=$(tuned_log_since_apply)
+    fi
+
+    while IFS=$'\t' read -r plugin passed failed took; do
+        if [ "$plugin" = "failed" ] || [ "$plugin" = "ignored" ]; then
+            # "<failed|ignored>\t<plugin>\t<option>\t<message>"
+            option=$failed
+            message=$took
+            if [ "$plugin" = "ignored" ]; then
+                ignored+=("  ${passed} failed: ${message} (applied live, ignored)")
+                continue
+            fi
+            table+=("  ${passed} failed: ${message}")
+            json_escape "$passed"; entry="{\"plugin\": \"$REPLY\""
+            json_escape "$option"; entry+=", \"option\": \"$REPLY\""
+            json_escape "$message"; entry+=", \"message\": \"$REPLY\"}"
+            failures+=("$entry")
+            continue
+        fi
+        table+=("$(printf "%-16s %7s %7s %11s" "$plugin" "$passed" "$failed" "$took")")
+        json_escape "$plugin"
+        plugins+=("{\"plugin\": \"$REPLY\", \"passed\": $passed, \"failed\": $failed, \"elapsed_ms\": $took}")
+    done < <(printf '%s\n' "$verify_log" | tuned_verify_results "$effective" "$hot_file")
+    rm -f "$effective"
+    if [ "$rc" -ne 0 ] && [ ${#failures[@]} -eq 0 ] && [ ${#ignored[@]} -gt 0 ]; then
+        result=passed
+        rc=0
+    fi
+
+    echo "tuned-adm verify ${result} in ${duration} ms"
+    printf "%-16s %7s %7s %11s\n" PLUGIN PASSED FAILED ELAPSED_MS
+    [ ${#table[@]} -eq 0 ] || printf '%s\n' "${table[@]}"
+    [ ${#ignored[@]} -eq 0 ] || printf '%s\n' "${ignored[@]}"
+
+    json_escape "$profiles"
+    json="{\"profile\": \"$REPLY\", \"result\": \"$result\", \"duration_ms\": $duration, \"plugins\": ["
+    for entry in "${plugins[@]}"; do
+        json+="${sep}${entry}"
+        sep=", "
+    done
+    json+="], \"failures\": ["
+    sep=""
+    for entry in "${failures[@]}"; do
+        json+="${sep}${entry}"
+        sep=", "
+    done
+    json+="]}"
+    echo "$json"
+    if mkdir -p "$(dirname "$report_file")" 2>/dev/null && echo "$json" > "${report_file}.tmp" 2>/dev/null; then
+        mv -f "${report_file}.tmp" "$report_file"
+        echo "Report written to $report_file"
+    else
+        echo "WARNING: could not write report to $report_file"
+    fi
+
+    if [ "$rc" -ne 0 ]; then
+        echo "tuned log since the last profile apply:"
+        tuned_log_since_apply
+    fi
+    return $rc
+}
+
+# Escape a value for a JSON string
+# Usage: json_escape "$value"; echo "\"$REPLY\""
+json_escape() {
+    local s=$1
+    s=${s//\\/\\\\}
+    s=${s//\"/\\\"}
+    s=${s//$'\t'/\\t}
+    s=${s//$'\n'/\\n}
+    REPLY=$s
+}
@@ -0,0 +1,282 @@
+#!/bin/bash
+
+# SPDX-FileCopyrightText: Copyright (c) 2025 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: Apache-2.0
+#
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Work out the cheapest interrupt the configmaps actually need on this node.
+# Runs before update_settings.sh so it sees the node as it was before the apply:
+#   * grub.conf arguments missing from /proc/cmdline          -> reboot
+#   * modprobe.conf options differing on a loaded module       -> reboot (action reload
+#     if nothing uses the module, reboot if it is in use or built in)
+#   * service_<name>.conf differs from the installed drop-in,
+#     or the running service still has other Limit* values    -> restart <name>
+#   * sysctl.conf / sysfs.conf / ulimit.conf                   -> none (applied live)
+#   * containerd_config.toml differs from the installed drop-in -> restart containerd
+#   * kubelet_config.yaml values kubelet would load differently -> restart kubelet
+# The plan is printed and written as JSON to ${STATE_ROOT}/<package>/interrupt_plan.json
+# (override with INTERRUPT_PLAN_FILE). It never fails the apply.
+
+
+if [ ${SET_X:-0} -eq 1 ]; then
+set -x
+fi
+
+SCRIPT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
+# shellcheck source=utils.sh
+source "${SCRIPT_DIR}/utils.sh"
+
+# SKYHOOK_RESOURCE_ID is {id}_{package name}_{version}
+package_name=$(echo ${SKYHOOK_RESOURCE_ID} | cut -f 2 -d _)
+plan_file=${INTERRUPT_PLAN_FILE:-${STATE_ROOT}/${package_name}/interrupt_plan.json}
+
+interrupt="none"
+declare -a services=()
+declare -a changes=()
+
+# Usage: add_change <config> <key> <desired> <live> <action>
+# action is one of: live, unsupported, service, reload, reboot
+add_change() {
+    local config=$1 key=$2 desired=$3 live=$4 action=$5
+    local entry
+    printf "%-12s %-26s %-40s %-24s %s\n" "$action" "$config" "$key" "$desired" "$live"
+    json_escape "$config"; entry="{\"config\": \"$REPLY\""
+    json_escape "$key"; entry+=", \"key\": \"$REPLY\""
+    json_escape "$desired"; entry+=", \"desired\": \"$REPLY\""
+    json_escape "$live"; entry+=", \"live\": \"$REPLY\""
+    entry+=", \"action\": \"$action\"}"
+    changes+=("$entry")
+    case "$action" in
+        # There is no module reload interrupt, the apply only reports it can be done by hand
+        reboot|reload) interrupt="reboot" ;;
+        service) [ "$interrupt" = "reboot" ] || interrupt="service" ;;
+    esac
+}
+
+# Usage: add_service <name>
+add_service() {
+    local s
+    for s in "${services[@]}"; do
+        [ "$s" = "$1" ] && return 0
+    done
+    services+=("$1")
+}
+
+printf "%-12s %-26s %-40s %-24s %s\n" "ACTION" "CONFIG" "KEY" "DESIRED" "LIVE"
+
+if [ -f ${SKYHOOK_DIR}/configmaps/sysctl.conf ]; then
+    declare -A sysctl_desired=()
+    declare -a sysctl_keys=()
+    read_kv_file ${SKYHOOK_DIR}/configmaps/sysctl.conf sysctl_desired sysctl_keys
+    # Evaluated fresh: the plan is about what the apply is going to write
+    expand_hw_values sysctl sysctl_desired sysctl_keys ""
+    load_sysctl_translations
+    for name in "${sysctl_keys[@]}"; do
+        sysctl_target "$name"
+        if [ "$REPLY" == "unsupported" ]; then
+            add_change sysctl.conf "$name" "${sysctl_desired[$name]}" "<unsupported on ${KERNEL_RELEASE}>" unsupported
+        elif ! read_sysctl "$name"; then
+            add_change sysctl.conf "$name" "${sysctl_desired[$name]}" "<missing>" unsupported
+        elif [ "$REPLY" != "${sysctl_desired[$name]}" ]; then
+            # Written to /proc/sys by the apply, nothing to restart
+            add_change sysctl.conf "$name" "${sysctl_desired[$name]}" "$REPLY" live
+        fi
+    done
+fi
+
+if [ -f ${SKYHOOK_DIR}/configmaps/sysfs.conf ]; then
+    declare -A sysfs_desired=()
+    declare -a sysfs_keys=() sysfs_paths=()
+    read_kv_file ${SKYHOOK_DIR}/configmaps/sysfs.conf sysfs_desired sysfs_keys
+    expand_hw_values sysfs sysfs_desired sysfs_keys ""
+    for pattern in "${sysfs_keys[@]}"; do
+        sysfs_normalize "${sysfs_desired[$pattern]}"
+        desired=$REPLY
+        sysfs_glob "$pattern" sysfs_paths
+        for path in "${sysfs_paths[@]}"; do
+            if ! read_sysfs "$path" || [ "$REPLY" != "$desired" ]; then
+                # Written to /sys by the apply, nothing to restart
+                add_change sysfs.conf "${path#${SYS_ROOT}/}" "${sysfs_desired[$pattern]}" "${REPLY:-<unreadable>}" live
+            fi
+        done
+    done
+fi
+
+if [ -f ${SKYHOOK_DIR}/configmaps/modprobe.conf ]; then
+    declare -a modprobe_modules=()
+    declare -A modprobe_params=()
+    read_modprobe_file ${SKYHOOK_DIR}/configmaps/modprobe.conf modprobe_modules modprobe_params
+    for key in "${!modprobe_params[@]}"; do
+        mod=${key%%.*}
+        module_state "$mod"
+        state=$REPLY
+        # Not loaded: the options apply whenever it loads
+        [ "$state" != "absent" ] || continue
+        rc=0
+        module_param_matches "$mod" "${key#*.}" "${modprobe_params[$key]}" || rc=$?
+        [ $rc -eq 1 ] || continue
+        if [ "$state" = "loaded" ]; then
+            add_change modprobe.conf "$key" "${modprobe_params[$key]}" "$REPLY" reload
+        else
+            add_change modprobe.conf "$key" "${modprobe_params[$key]}" "$REPLY" reboot
+        fi
+    done
+fi
+
+if [ -f ${SKYHOOK_DIR}/configmaps/ulimit.conf ]; then
+    declare -A ulimit_desired=() ulimit_installed=()
+    read_kv_file ${SKYHOOK_DIR}/configmaps/ulimit.conf ulimit_desired
+    limits_file=/etc/security/limits.d/999-${package_name}-tuning.conf
+    if [ -f ${limits_file} ]; then
+        read_limits_file ${limits_file} ulimit_installed
+    fi
+    for name in "${!ulimit_desired[@]}"; do
+        if [ "${ulimit_installed[$name]:-}" != "${ulimit_desired[$name]}" ]; then
+            # limits.d is read by pam_limits on the next session
+            add_change ulimit.conf "$name" "${ulimit_desired[$name]}" "${ulimit_installed[$name]:-<missing>}" live
+        fi
+    done
+fi
+
+for f in ${SKYHOOK_DIR}/configmaps/service_*.conf; do
+    [ -f "$f" ] || continue
+    config=${f##*/}
+    service_name=${config#service_}
+    service_name=${service_name%.conf}
+    dropin=/etc/systemd/system/${service_name}.service.d/999-${package_name}-tuning.conf
+
+    declare -A service_desired=() service_installed=()
+    read_kv_file "$f" service_desired
+    if [ -f "$dropin" ]; then
+        read_kv_file "$dropin" service_installed
+    fi
+
+    changed=false
+    for key in "${!service_desired[@]}"; do
+        if [ "${service_installed[$key]:-}" != "${service_desired[$key]}" ]; then
+            add_change "$config" "$key" "${service_desired[$key]}" "${service_installed[$key]:-<missing>}" service
+            changed=true
+        fi
+    done
+    for key in "${!service_installed[@]}"; do
+        if [ -z "${service_desired[$key]+set}" ]; then
+            add_change "$config" "$key" "<absent>" "${service_installed[$key]}" service
+            changed=true
+        fi
+    done
+
+    # The drop-in can already be installed while the running process predates it
+    # (e.g. a previous apply whose restart never happened), so compare Limit*
+    # settings against the main process itself
+    if [ "$changed" = "false" ] && command -v systemctl >/dev/null 2>&1; then
+        main_pid=$(systemctl show -p MainPID --value "${service_name}" 2>/dev/null || echo 0)
+        declare -A service_limits=()
+        if [ "${main_pid:-0}" -gt 0 ] && read_limits service_limits "$main_pid"; then
+            for key in "${!service_desired[@]}"; do
+                [[ "$key" == Limit* ]] || continue
+                name=${key#Limit}
+                [ -n "${service_limits[$name]+set}" ] || continue
+                if [ "${service_limits[$name]}" != "${service_desired[$key]}" ]; then
+                    add_change "$config" "$key" "${service_desired[$key]}" "${service_limits[$name]}" service
+                    changed=true
+                fi
+            done
+        fi
+        unset service_limits
+    fi
+    unset service_desired service_installed
+
+    if [ "$changed" = "true" ]; then
+        add_service "$service_name"
+    fi
+done
+
+if [ -f ${SKYHOOK_DIR}/configmaps/containerd_config.toml ]; then
+    declare -A containerd_desired=() containerd_installed=()
+    declare -a containerd_keys=()
+    read_toml_file ${SKYHOOK_DIR}/configmaps/containerd_config.toml containerd_desired containerd_keys
+    containerd_dropin=${CONTAINERD_DROPIN_DIR:-/etc/containerd/conf.d}/999-${package_name}-tuning.toml
+    if [ -f ${containerd_dropin} ]; then
+        read_toml_file ${containerd_dropin} containerd_installed
+    fi
+    for key in "${containerd_keys[@]}"; do
+        if [ "${containerd_installed[$key]:-}" != "${containerd_desired[$key]}" ]; then
+            add_change containerd_config.toml "$key" "${containerd_desired[$key]}" "${containerd_installed[$key]:-<missing>}" service
+            add_service containerd
+        fi
+    done
+fi
+
+if [ -f ${SKYHOOK_DIR}/configmaps/kubelet_config.yaml ]; then
+    kubelet_config_paths
+    declare -A kubelet_desired=() kubelet_effective=()
+    declare -a kubelet_keys=()
+    read_yaml_file ${SKYHOOK_DIR}/configmaps/kubelet_config.yaml kubelet_desired kubelet_keys
+    read_kubelet_effective kubelet_effective
+    for key in "${kubelet_keys[@]}"; do
+        # apiVersion/kind only describe the drop-in
+        [ "$key" != "apiVersion" ] && [ "$key" != "kind" ] || continue
+        if [ "${kubelet_effective[$key]:-}" != "${kubelet_desired[$key]}" ]; then
+            add_change kubelet_config.yaml "$key" "${kubelet_desired[$key]}" "${kubelet_effective[$key]:-<missing>}" service
+            add_service kubelet
+        fi
+    done
+fi
+
+if [ -f ${SKYHOOK_DIR}/configmaps/grub.conf ]; then
+    declare -a cmdline=()
+    read_cmdline cmdline
+    while IFS= read -r line || [ -n "$line" ]; do
+        read -r -a args <<< "$line"
+        for arg in "${args[@]}"; do
+            if ! cmdline_has_arg "$arg"; then
+                add_change grub.conf "$arg" "present" "missing" reboot
+            fi
+        done
+    done < ${SKYHOOK_DIR}/configmaps/grub.conf
+fi
+
+# A reboot restarts every service, so only list services for a service interrupt
+if [ "$interrupt" != "service" ]; then
+    services=()
+fi
+
+json="{\"interrupt\": \"${interrupt}\", \"services\": ["
+sep=""
+for s in "${services[@]}"; do
+    json_escape "$s"
+    json+="${sep}\"$REPLY\""
+    sep=", "
+done
+json+="], \"changes\": ["
+sep=""
+for c in "${changes[@]}"; do
+    json+="${sep}${c}"
+    sep=", "
+done
+json+="]}"
+
+echo "-------------------------"
+echo "Required interrupt: ${interrupt}${services:+ (${services[*]})}"
+echo "${json}"
+
+if mkdir -p "$(dirname "${plan_file}")" 2>/dev/null && echo "${json}" > "${plan_file}.tmp" 2>/dev/null; then
+    mv -f "${plan_file}.tmp" "${plan_file}"
+    echo "Plan written to ${plan_file}"
+else
+    echo "WARNING: could not write plan to ${plan_file}"
+fi
+
+exit 0
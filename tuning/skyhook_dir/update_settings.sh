@@ -24,20 +24,209 @@ if [ ${SET_X:-0} -eq 1 ]; then
 set -x
 fi
 
+SCRIPT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
+# shellcheck source=utils.sh
+source "${SCRIPT_DIR}/utils.sh"
+
 # SKYHOOK_RESOURCE_ID is {id}_{package name}_{version}
 # We want to use the package name in the drop in files so multiple tuning packages can be installed
 package_name=$(echo ${SKYHOOK_RESOURCE_ID} | cut -f 2 -d _)
 
+# Everything below compares against the installed drop-ins and live values first so
+# re-applying an unchanged configmap writes nothing, sets nothing and reloads nothing
+declare -a summary=()
+declare -a sysctl_missing=() sysfs_failed=()
+# Files outside /proc/sys (translated sysctls, sysfs.conf) are restored at boot by tmpfiles.d
+tmpfiles_temp=$(mktemp)
+# {{ expression }} values are evaluated for this node and recorded for the checks
+hw_values_file=${STATE_ROOT}/${package_name}/hw_values.conf
+
 if [ -f ${SKYHOOK_DIR}/configmaps/sysctl.conf ]; then
     echo "-------------------------"
     echo "Updating sysctl settings"
     echo "-------------------------"
-    sysctl -p ${SKYHOOK_DIR}/configmaps/sysctl.conf
-    # Permenant setting
-    cp ${SKYHOOK_DIR}/configmaps/sysctl.conf /etc/sysctl.d/999-${package_name}-tuning.conf
+    declare -A sysctl_desired=()
+    declare -a sysctl_keys=() sysctl_changed=() sysctl_translated=() sysctl_unsupported=()
+    read_kv_file ${SKYHOOK_DIR}/configmaps/sysctl.conf sysctl_desired sysctl_keys
+    expand_hw_values sysctl sysctl_desired sysctl_keys ${hw_values_file} record
+    # Scheduler knobs moved to debugfs in 5.13 and some were dropped in 6.6, so each key
+    # is looked up in sysctl_translations.conf for the running kernel
+    load_sysctl_translations
+    sysctl_temp=$(mktemp)
+    for name in "${sysctl_keys[@]}"; do
+        value=${sysctl_desired[$name]}
+        sysctl_target "$name"
+        target=$REPLY
+        if ! sysctl_path "$name"; then
+            echo "Skipping ${name}: not supported on kernel ${KERNEL_RELEASE}"
+            sysctl_unsupported+=("$name")
+            continue
+        fi
+        path=$REPLY
+        if [ "$target" != "sysctl:${name}" ]; then
+            if [ ! -e "$path" ]; then
+                # e.g. debugfs not mounted or CONFIG_SCHED_DEBUG off
+                echo "Skipping ${name}: ${target} is not available on this node"
+                sysctl_unsupported+=("$name")
+                continue
+            fi
+            echo "Translating ${name} to ${target} for kernel ${KERNEL_RELEASE}"
+            sysctl_translated+=("${name} -> ${target}")
+        elif [ ! -e "$path" ]; then
+            # Not a known move, so this is a typo or a missing module: fail once the rest is applied
+            echo "ERROR: ${name} does not exist on kernel ${KERNEL_RELEASE}"
+            sysctl_missing+=("$name")
+            continue
+        fi
+        case "$target" in
+            sysctl:*)
+                # Permenant setting, under the name this kernel uses
+                echo "${target#sysctl:}=${value}" >> ${sysctl_temp}
+                ;;
+            *)
+                # systemd-sysctl only writes /proc/sys
+                echo "w ${path} - - - - ${value}" >> ${tmpfiles_temp}
+                ;;
+        esac
+        if read_sysctl "$name" && [ "$REPLY" == "${value}" ]; then
+            continue
+        fi
+        # Only keys whose live value differs are written
+        case "$target" in
+            sysctl:*) sysctl -w "${target#sysctl:}=${value}" ;;
+            *) echo "${value}" > "${path}" ;;
+        esac
+        sysctl_changed+=("$name")
+    done
+    if install_if_changed ${sysctl_temp} /etc/sysctl.d/999-${package_name}-tuning.conf; then
+        chmod a+r /etc/sysctl.d/999-${package_name}-tuning.conf
+        sysctl_file="drop-in updated"
+    else
+        sysctl_file="drop-in unchanged"
+    fi
+    rm -f ${sysctl_temp}
+    summary+=("sysctl: ${#sysctl_changed[@]} of ${#sysctl_keys[@]} keys changed${sysctl_changed:+ (${sysctl_changed[*]})}, ${sysctl_file}")
+    for line in "${sysctl_translated[@]}"; do
+        summary+=("sysctl: translated ${line}")
+    done
+    for name in "${sysctl_unsupported[@]}"; do
+        summary+=("sysctl: skipped ${name} (unsupported on ${KERNEL_RELEASE})")
+    done
     # Must use RestartAllService interrupt OR reboot to apply changes
 fi
 
+if [ -f ${SKYHOOK_DIR}/configmaps/sysfs.conf ]; then
+    echo "-------------------------"
+    echo "Updating sysfs settings"
+    echo "-------------------------"
+    declare -A sysfs_desired=()
+    declare -a sysfs_keys=() sysfs_paths=() sysfs_changed=() sysfs_unmatched=()
+    sysfs_total=0
+    read_kv_file ${SKYHOOK_DIR}/configmaps/sysfs.conf sysfs_desired sysfs_keys
+    expand_hw_values sysfs sysfs_desired sysfs_keys ${hw_values_file} record
+    for pattern in "${sysfs_keys[@]}"; do
+        value=${sysfs_desired[$pattern]}
+        # tmpfiles.d expands the glob itself at boot, so devices matched then are covered too
+        echo "w ${SYS_ROOT}/${pattern#/sys/} - - - - ${value}" >> ${tmpfiles_temp}
+        sysfs_glob "$pattern" sysfs_paths
+        if [ ${#sysfs_paths[@]} -eq 0 ]; then
+            echo "No match for ${pattern}"
+            sysfs_unmatched+=("$pattern")
+            continue
+        fi
+        sysfs_normalize "$value"
+        expected=$REPLY
+        for path in "${sysfs_paths[@]}"; do
+            sysfs_total=$((sysfs_total + 1))
+            if read_sysfs "$path" && [ "$REPLY" == "$expected" ]; then
+                continue
+            fi
+            # Only files whose live value differs are written
+            if echo "${value}" > "${path}"; then
+                echo "Set ${path} to ${value}"
+                sysfs_changed+=("$path")
+            else
+                sysfs_failed+=("$path")
+            fi
+        done
+    done
+    summary+=("sysfs: ${#sysfs_changed[@]} of ${sysfs_total} files changed${sysfs_changed:+ (${sysfs_changed[*]})}")
+    for pattern in "${sysfs_unmatched[@]}"; do
+        summary+=("sysfs: no files match ${pattern}")
+    done
+fi
+
+tmpfiles_file=/etc/tmpfiles.d/999-${package_name}-tuning.conf
+if [ -s ${tmpfiles_temp} ]; then
+    mkdir -p /etc/tmpfiles.d
+    if install_if_changed ${tmpfiles_temp} ${tmpfiles_file}; then
+        chmod a+r ${tmpfiles_file}
+        summary+=("tmpfiles.d: drop-in updated")
+    else
+        summary+=("tmpfiles.d: drop-in unchanged")
+    fi
+elif [ -f ${tmpfiles_file} ]; then
+    rm -f ${tmpfiles_file}
+    summary+=("tmpfiles.d: drop-in removed")
+fi
+rm -f ${tmpfiles_temp}
+
+if [ -f ${SKYHOOK_DIR}/configmaps/modprobe.conf ]; then
+    echo "-------------------------"
+    echo "Updating modprobe settings"
+    echo "-------------------------"
+    declare -a modprobe_modules=()
+    declare -A modprobe_params=()
+    read_modprobe_file ${SKYHOOK_DIR}/configmaps/modprobe.conf modprobe_modules modprobe_params
+    modprobe_file=/etc/modprobe.d/999-${package_name}-tuning.conf
+    # Defaults to the running kernel, set INITRAMFS_KERNEL when a different kernel boots next
+    initramfs_kernel=${INITRAMFS_KERNEL:-$(uname -r)}
+    mkdir -p /etc/modprobe.d
+    if install_if_changed ${SKYHOOK_DIR}/configmaps/modprobe.conf ${modprobe_file}; then
+        chmod a+r ${modprobe_file}
+        summary+=("modprobe: drop-in updated (${modprobe_modules[*]})")
+        # Modules loaded from the initramfs read their options from the copy of modprobe.d inside it
+        if initramfs_has_module "${initramfs_kernel}" "${modprobe_modules[@]}"; then
+            if regenerate_initramfs "${initramfs_kernel}"; then
+                summary+=("modprobe: initramfs regenerated for ${initramfs_kernel}")
+            else
+                summary+=("modprobe: initramfs for ${initramfs_kernel} NOT regenerated")
+            fi
+        else
+            summary+=("modprobe: modules not in the initramfs for ${initramfs_kernel}, not regenerated")
+        fi
+    else
+        summary+=("modprobe: drop-in unchanged")
+    fi
+    # Options only take effect when a module is loaded, so work out what each one needs
+    for mod in "${modprobe_modules[@]}"; do
+        module_state "$mod"
+        state=$REPLY
+        pending=""
+        for key in "${!modprobe_params[@]}"; do
+            [ "${key%%.*}" = "$mod" ] || continue
+            rc=0
+            module_param_matches "$mod" "${key#*.}" "${modprobe_params[$key]}" || rc=$?
+            # 2 means the parameter isn't exposed in sysfs, nothing to compare
+            if [ $rc -eq 1 ]; then
+                pending+=" ${key#*.}"
+            fi
+        done
+        case "$state" in
+            absent) summary+=("modprobe: ${mod} not loaded, settings apply when it loads") ;;
+            *)
+                if [ -z "$pending" ]; then
+                    summary+=("modprobe: ${mod} up to date")
+                elif [ "$state" = "loaded" ]; then
+                    summary+=("modprobe: ${mod} needs a reload (modprobe -r ${mod} && modprobe ${mod}) or a reboot for${pending}")
+                else
+                    summary+=("modprobe: ${mod} is ${state}, needs a reboot for${pending}")
+                fi
+                ;;
+        esac
+    done
+fi
+
 if [ -f ${SKYHOOK_DIR}/configmaps/ulimit.conf ]; then
     echo "-------------------------"
     echo "Updating ulimit settings"
@@ -73,35 +262,192 @@ if [ -f ${SKYHOOK_DIR}/configmaps/ulimit.conf ]; then
         # then we can move it over if everything is successful
         echo "* hard ${name} ${value}" >> ${temp_file}
     done  <<< $(cat ${SKYHOOK_DIR}/configmaps/ulimit.conf)
-    # Move the temp file over to the final location
-    mv ${temp_file} /etc/security/limits.d/999-${package_name}-tuning.conf
-    chmod a+r /etc/security/limits.d/999-${package_name}-tuning.conf
-    
+    # Move the temp file over to the final location if it changed
+    if install_if_changed ${temp_file} /etc/security/limits.d/999-${package_name}-tuning.conf; then
+        chmod a+r /etc/security/limits.d/999-${package_name}-tuning.conf
+        summary+=("ulimit: drop-in updated")
+    else
+        summary+=("ulimit: drop-in unchanged")
+    fi
+    rm -f ${temp_file}
 
     # Update session files so on reboot limits file is correclty applied
     for f in /etc/pam.d/common-session*; do
-        if [ $(grep -c "session required pam_limits.so" $f) -eq 0 ]; then
+        [ -f "$f" ] || continue
+        if ! grep -q "session required pam_limits.so" $f; then
             echo "session required pam_limits.so" >> $f
+            summary+=("pam: enabled pam_limits in ${f}")
         fi
     done
 fi
 
-if [ $(ls ${SKYHOOK_DIR}/configmaps | grep -c service_.*.conf) -gt 0 ]; then
+declare -a services_changed=()
+for f in ${SKYHOOK_DIR}/configmaps/service_*.conf; do
+    [ -f "$f" ] || continue
     # Loop through all service files and add them as drop-ins
-    for f in ${SKYHOOK_DIR}/configmaps/service_*.conf; do
-        service_name=$(basename ${f} | cut -f 2 -d _ | cut -f 1 -d .)
-        echo "-------------------------"
-        echo "Updating ${service_name} settings"
-        echo "-------------------------"
-        mkdir -p /etc/systemd/system/${service_name}.service.d
-        cp ${f} /etc/systemd/system/${service_name}.service.d/999-${package_name}-tuning.conf
+    service_name=$(basename ${f} | cut -f 2 -d _ | cut -f 1 -d .)
+    echo "-------------------------"
+    echo "Updating ${service_name} settings"
+    echo "-------------------------"
+    mkdir -p /etc/systemd/system/${service_name}.service.d
+    if install_if_changed ${f} /etc/systemd/system/${service_name}.service.d/999-${package_name}-tuning.conf; then
+        services_changed+=("${service_name}")
+        summary+=("service ${service_name}: drop-in updated")
+    else
+        summary+=("service ${service_name}: drop-in unchanged")
+    fi
+done
+
+if [ -f ${SKYHOOK_DIR}/configmaps/kubelet_config.yaml ]; then
+    echo "-------------------------"
+    echo "Updating kubelet settings"
+    echo "-------------------------"
+    kubelet_config_paths
+    kubelet_root=${KUBELET_ROOT:-/var/lib/kubelet}
+    declare -A kubelet_desired=() kubelet_before=() kubelet_after=()
+    declare -a kubelet_keys=() kubelet_changed=()
+    read_yaml_file ${SKYHOOK_DIR}/configmaps/kubelet_config.yaml kubelet_desired kubelet_keys
+    read_kubelet_effective kubelet_before
+
+    if [ -n "${KUBELET_CONFIG_DIR}" ]; then
+        # kubelet merges --config-dir drop-ins over the main config itself
+        kubelet_dropin=${KUBELET_CONFIG_DIR}/999-${package_name}-tuning.conf
+        kubelet_temp=$(mktemp)
+        if [ -z "${kubelet_desired[kind]:-}" ]; then
+            # Every drop-in has to say what it is
+            printf 'apiVersion: kubelet.config.k8s.io/v1beta1\nkind: KubeletConfiguration\n' > ${kubelet_temp}
+        fi
+        cat ${SKYHOOK_DIR}/configmaps/kubelet_config.yaml >> ${kubelet_temp}
+        mkdir -p ${KUBELET_CONFIG_DIR}
+        if install_if_changed ${kubelet_temp} ${kubelet_dropin}; then
+            summary+=("kubelet: drop-in ${kubelet_dropin} updated")
+        else
+            summary+=("kubelet: drop-in ${kubelet_dropin} unchanged")
+        fi
+        rm -f ${kubelet_temp}
+    else
+        # Without --config-dir the top-level keys are merged into the main config in place.
+        # The original lines are kept in the state dir so uninstall can put them back.
+        kubelet_orig=${STATE_ROOT}/${package_name}/kubelet_config.orig
+        mkdir -p $(dirname ${kubelet_orig})
+        touch ${kubelet_orig}
+        for key in "${kubelet_keys[@]}"; do
+            if [[ "$key" == *.* ]] || [[ "${kubelet_desired[$key]}" == "- "* ]]; then
+                echo "ERROR: ${key} is a nested value, merging it needs kubelet started with --config-dir"
+                exit 1
+            fi
+        done
+        for key in "${kubelet_keys[@]}"; do
+            [ "${kubelet_before[$key]:-}" != "${kubelet_desired[$key]}" ] || continue
+            line=$(grep -m1 -E "^${key}:" ${SKYHOOK_DIR}/configmaps/kubelet_config.yaml)
+            if ! grep -q -P "^${key}\t" ${kubelet_orig}; then
+                printf '%s\t%s\n' "${key}" "$(grep -m1 -E "^${key}:" ${KUBELET_CONFIG} || echo '<absent>')" >> ${kubelet_orig}
+            fi
+            if grep -q -E "^${key}:" ${KUBELET_CONFIG}; then
+                yaml_replace_line ${KUBELET_CONFIG} "${key}" "${line}"
+            else
+                echo "${line}" >> ${KUBELET_CONFIG}
+            fi
+        done
+    fi
+
+    read_kubelet_effective kubelet_after
+    for key in "${kubelet_keys[@]}"; do
+        [ "${kubelet_before[$key]:-}" == "${kubelet_after[$key]:-}" ] || kubelet_changed+=("$key")
     done
 
+    # kubelet refuses to start when the CPU/memory manager policy differs from the one in its
+    # checkpoint, so the checkpoint is dropped before start whenever the policies don't match
+    kubelet_reset=/etc/systemd/system/kubelet.service.d/999-${package_name}-state-reset.conf
+    kubelet_reset_temp=$(mktemp)
+    for manager in cpu memory; do
+        policy=${kubelet_after[${manager}ManagerPolicy]:-}
+        [ -n "$policy" ] || continue
+        state_file=${kubelet_root}/${manager}_manager_state
+        # "." stands in for the JSON quotes, which systemd's own unquoting would eat
+        echo "ExecStartPre=-/bin/sh -c 'grep -qis policyName.:.${policy}. ${state_file} || rm -f ${state_file}'" >> ${kubelet_reset_temp}
+    done
+    if [ -s ${kubelet_reset_temp} ]; then
+        sed -i '1i [Service]' ${kubelet_reset_temp}
+        mkdir -p $(dirname ${kubelet_reset})
+        if install_if_changed ${kubelet_reset_temp} ${kubelet_reset}; then
+            services_changed+=("kubelet")
+        fi
+    elif [ -f ${kubelet_reset} ]; then
+        rm -f ${kubelet_reset}
+        services_changed+=("kubelet")
+    fi
+    rm -f ${kubelet_reset_temp}
+
+    if [ ${#kubelet_changed[@]} -gt 0 ]; then
+        summary+=("kubelet: effective config changed (${kubelet_changed[*]}), needs a kubelet restart (service interrupt)")
+    else
+        summary+=("kubelet: effective config unchanged, no restart needed")
+    fi
+fi
 
+if [ ${#services_changed[@]} -gt 0 ]; then
     echo "-------------------------"
     echo "Reloading systemd"
     echo "-------------------------"
     systemctl daemon-reload
+    summary+=("systemd: reloaded for ${services_changed[*]}")
+fi
+
+if [ -f ${SKYHOOK_DIR}/configmaps/containerd_config.toml ]; then
+    echo "-------------------------"
+    echo "Updating containerd settings"
+    echo "-------------------------"
+    containerd_config=${CONTAINERD_CONFIG:-/etc/containerd/config.toml}
+    containerd_dropin=${CONTAINERD_DROPIN_DIR:-/etc/containerd/conf.d}/999-${package_name}-tuning.toml
+    containerd_stamp=${STATE_ROOT}/${package_name}/containerd_config.sha256
+    # The merged config containerd would load before and after the change decides the restart,
+    # so formatting-only changes to the fragment don't restart it
+    containerd_before=$(containerd --config ${containerd_config} config dump 2>/dev/null | sha256sum | cut -f 1 -d ' ')
+
+    containerd_backup=$(mktemp -d)
+    [ ! -f ${containerd_config} ] || cp -p ${containerd_config} ${containerd_backup}/config.toml
+    [ ! -f ${containerd_dropin} ] || cp -p ${containerd_dropin} ${containerd_backup}/dropin.toml
+    mkdir -p $(dirname ${containerd_dropin})
+    containerd_files=""
+    if install_if_changed ${SKYHOOK_DIR}/configmaps/containerd_config.toml ${containerd_dropin}; then
+        chmod a+r ${containerd_dropin}
+        containerd_files="drop-in updated"
+    fi
+    # A new config.toml uses the schema version of the fragment
+    containerd_version=$(sed -n -E 's/^[[:space:]]*version[[:space:]]*=[[:space:]]*([0-9]+).*/\1/p' ${SKYHOOK_DIR}/configmaps/containerd_config.toml | head -n1)
+    if containerd_add_import ${containerd_config} ${containerd_dropin} ${containerd_version:-2}; then
+        containerd_files+="${containerd_files:+, }import added to ${containerd_config}"
+    fi
+
+    # Validate by having containerd parse and merge everything; put the old files back if it can't
+    if ! containerd_dump=$(containerd --config ${containerd_config} config dump 2>&1); then
+        echo "${containerd_dump}"
+        echo "ERROR: containerd rejected the merged config, restoring the previous files"
+        rm -f ${containerd_dropin}
+        [ ! -f ${containerd_backup}/dropin.toml ] || cp -p ${containerd_backup}/dropin.toml ${containerd_dropin}
+        [ ! -f ${containerd_backup}/config.toml ] || cp -p ${containerd_backup}/config.toml ${containerd_config}
+        rm -rf ${containerd_backup}
+        exit 1
+    fi
+    rm -rf ${containerd_backup}
+    containerd_after=$(echo "${containerd_dump}" | sha256sum | cut -f 1 -d ' ')
+
+    # containerd is restarted by the service interrupt plan_interrupt.sh asks for, once,
+    # after the apply. The stamp records the merged config and when it last changed, so the
+    # post-interrupt check can tell whether containerd was restarted since
+    containerd_applied=""
+    containerd_changed_at=0
+    [ ! -f ${containerd_stamp} ] || read -r containerd_applied containerd_changed_at < ${containerd_stamp}
+    if [ "${containerd_after}" != "${containerd_before}" ] || { [ -n "${containerd_applied}" ] && [ "${containerd_applied}" != "${containerd_after}" ]; }; then
+        echo "Merged containerd config changed, containerd needs a restart"
+        containerd_changed_at=$(date +%s)
+        summary+=("containerd: ${containerd_files:-files unchanged}, merged config changed, restart pending (service interrupt)")
+    else
+        summary+=("containerd: ${containerd_files:-files unchanged}, merged config unchanged, no restart needed")
+    fi
+    mkdir -p $(dirname ${containerd_stamp})
+    echo "${containerd_after} ${containerd_changed_at:-0}" > ${containerd_stamp}
 fi
 
 if [ -f ${SKYHOOK_DIR}/configmaps/grub.conf ]; then
@@ -113,6 +459,35 @@ if [ -f ${SKYHOOK_DIR}/configmaps/grub.conf ]; then
     do
         grub_update="${grub_update} ${line}"
     done <<< $(cat ${SKYHOOK_DIR}/configmaps/grub.conf)
-    echo "GRUB_CMDLINE_LINUX_DEFAULT=\" ${grub_update}\"" > /etc/default/grub.d/999-${package_name}-tuning.cfg
-    update-grub
+    grub_output=$(echo "GRUB_CMDLINE_LINUX_DEFAULT=\" ${grub_update}\"" | ${SKYHOOK_DIR}/skyhook_dir/grub_coordinator.sh write 999-${package_name}-tuning.cfg)
+    echo "${grub_output}"
+    # Only regenerates grub.cfg if the GRUB inputs changed since the last regeneration
+    ${SKYHOOK_DIR}/skyhook_dir/grub_coordinator.sh update
+    if [[ "${grub_output}" == *unchanged* ]]; then
+        summary+=("grub: drop-in unchanged")
+    else
+        summary+=("grub: drop-in updated")
+    fi
+fi
+
+write_hw_values ${hw_values_file}
+if [ ${#HW_RECORDED[@]} -gt 0 ]; then
+    summary+=("hardware: ${#HW_RECORDED[@]} values evaluated for this node, recorded in ${hw_values_file}")
+fi
+
+echo "-------------------------"
+echo "Summary"
+echo "-------------------------"
+for line in "${summary[@]}"; do
+    echo "${line}"
+done
+
+if [ ${#sysctl_missing[@]} -gt 0 ]; then
+    echo "ERROR: unknown sysctl keys: ${sysctl_missing[*]}"
+fi
+if [ ${#sysfs_failed[@]} -gt 0 ]; then
+    echo "ERROR: could not write sysfs files: ${sysfs_failed[*]}"
+fi
+if [ ${#sysctl_missing[@]} -gt 0 ] || [ ${#sysfs_failed[@]} -gt 0 ]; then
+    exit 1
 fi
@@ -22,6 +22,10 @@ if [ ${SET_X:-0} -eq 1 ]; then
 set -x
 fi
 
+SCRIPT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
+# shellcheck source=utils.sh
+source "${SCRIPT_DIR}/utils.sh"
+
 # SKYHOOK_RESOURCE_ID is {id}_{package name}_{version}
 # We want to use the package name in the drop in files so multiple tuning packages can be installed
 
@@ -31,29 +35,139 @@ fi
 #       which could cause conflicts if multiple tuning packages are installed
 package_name=$(echo ${SKYHOOK_RESOURCE_ID} | cut -f 2 -d _)
 
-failures=""
+sysctl_file=/etc/sysctl.d/999-${package_name}-tuning.conf
+limits_file=/etc/security/limits.d/999-${package_name}-tuning.conf
+tmpfiles_file=/etc/tmpfiles.d/999-${package_name}-tuning.conf
+hw_values_file=${STATE_ROOT}/${package_name}/hw_values.conf
+modprobe_file=/etc/modprobe.d/999-${package_name}-tuning.conf
+containerd_config=${CONTAINERD_CONFIG:-/etc/containerd/config.toml}
+containerd_dropin=${CONTAINERD_DROPIN_DIR:-/etc/containerd/conf.d}/999-${package_name}-tuning.toml
+
+# Entries expected in tmpfiles_file, filled by the sysctl and sysfs sections
+declare -A tmpfiles_expected=() tmpfiles_installed=()
+declare -a tmpfiles_keys=()
+
+# Both sides are parsed into normalized key -> value maps and compared as sets,
+# so whitespace around "=" doesn't matter and keys are matched literally (not as regexes)
 
 if [ -f ${SKYHOOK_DIR}/configmaps/sysctl.conf ]; then
-    while IFS= read -r line
-    do
-        if [ $(grep -c "${line}" /etc/sysctl.d/999-${package_name}-tuning.conf) -eq 0 ]; then
-            failures=$(printf "%s\n%s" "$failures" "not in sysctl: ${line}")
-        fi
-    done  <<< $(cat ${SKYHOOK_DIR}/configmaps/sysctl.conf)
+    declare -A sysctl_configmap=() sysctl_expected=() sysctl_installed=()
+    declare -a sysctl_configmap_keys=() sysctl_keys=()
+    read_kv_file ${SKYHOOK_DIR}/configmaps/sysctl.conf sysctl_configmap sysctl_configmap_keys
+    expand_hw_values sysctl sysctl_configmap sysctl_configmap_keys ${hw_values_file}
+    # Split the configmap the same way update_settings.sh does: keys this kernel has under
+    # /proc/sys go to sysctl.d, translated debugfs/sysfs keys to tmpfiles.d
+    load_sysctl_translations
+    for name in "${sysctl_configmap_keys[@]}"; do
+        sysctl_target "$name"
+        target=$REPLY
+        case "$target" in
+            sysctl:*)
+                sysctl_keys+=("${target#sysctl:}")
+                sysctl_expected[${target#sysctl:}]=${sysctl_configmap[$name]}
+                ;;
+            unsupported)
+                echo "Skipping ${name}: not supported on kernel ${KERNEL_RELEASE}"
+                ;;
+            *)
+                sysctl_path "$name"
+                if [ ! -e "$REPLY" ]; then
+                    echo "Skipping ${name}: ${target} is not available on this node"
+                    continue
+                fi
+                tmpfiles_keys+=("$REPLY")
+                tmpfiles_expected[$REPLY]=${sysctl_configmap[$name]}
+                ;;
+        esac
+    done
+
+    report_header "Checking ${sysctl_file}"
+    if [ -f ${sysctl_file} ]; then
+        read_kv_file ${sysctl_file} sysctl_installed
+    fi
+    compare_kv sysctl sysctl_expected sysctl_installed sysctl_keys
+    warn_shadowed_sysctls ${sysctl_file}
 fi
 
 if [ -f ${SKYHOOK_DIR}/configmaps/ulimit.conf ]; then
-    while IFS= read -r line
-    do
-        name=$(echo $line | cut -f 1 -d =)
-        value=$(echo $line | cut -f 2 -d =)
-        if [ $(grep -c "hard ${name} ${value}" /etc/security/limits.d/999-${package_name}-tuning.conf) -eq 0 ]; then
-            failures=$(printf "%s\n%s" "$failures" "No ${line} setting in /etc/security/limits.d/999-${package_name}-tuning.conf")
+    report_header "Checking ${limits_file}"
+    declare -A ulimit_expected=() ulimit_installed=()
+    declare -a ulimit_keys=()
+    read_kv_file ${SKYHOOK_DIR}/configmaps/ulimit.conf ulimit_expected ulimit_keys
+    if [ -f ${limits_file} ]; then
+        read_limits_file ${limits_file} ulimit_installed
+    fi
+    compare_kv ulimit ulimit_expected ulimit_installed ulimit_keys
+fi
+
+if [ -f ${SKYHOOK_DIR}/configmaps/sysfs.conf ]; then
+    declare -A sysfs_configmap=()
+    declare -a sysfs_keys=()
+    read_kv_file ${SKYHOOK_DIR}/configmaps/sysfs.conf sysfs_configmap sysfs_keys
+    expand_hw_values sysfs sysfs_configmap sysfs_keys ${hw_values_file}
+    # Globs are persisted as-is so tmpfiles.d expands them at boot
+    for pattern in "${sysfs_keys[@]}"; do
+        path="${SYS_ROOT}/${pattern#/sys/}"
+        tmpfiles_keys+=("$path")
+        tmpfiles_expected[$path]=${sysfs_configmap[$pattern]}
+    done
+fi
+
+if [ -f ${SKYHOOK_DIR}/configmaps/modprobe.conf ]; then
+    report_header "Checking ${modprobe_file}"
+    # modprobe.d has no key=value shape, so each directive line is compared as a whole
+    declare -A modprobe_expected=() modprobe_installed=()
+    declare -a modprobe_keys=()
+    read_directive_file ${SKYHOOK_DIR}/configmaps/modprobe.conf modprobe_expected modprobe_keys
+    if [ -f ${modprobe_file} ]; then
+        read_directive_file ${modprobe_file} modprobe_installed
+    fi
+    compare_kv modprobe modprobe_expected modprobe_installed modprobe_keys
+fi
+
+if [ -f ${SKYHOOK_DIR}/configmaps/containerd_config.toml ]; then
+    report_header "Checking ${containerd_dropin}"
+    declare -A containerd_expected=() containerd_installed=()
+    declare -a containerd_keys=()
+    read_toml_file ${SKYHOOK_DIR}/configmaps/containerd_config.toml containerd_expected containerd_keys
+    if [ -f ${containerd_dropin} ]; then
+        read_toml_file ${containerd_dropin} containerd_installed
+    fi
+    compare_kv toml containerd_expected containerd_installed containerd_keys
+    # The drop-in does nothing unless the main config imports it
+    if containerd_imports ${containerd_config} ${containerd_dropin}; then
+        report_result PASS import "${containerd_config}" "${containerd_dropin}" "imported"
+    else
+        report_result FAIL import "${containerd_config}" "${containerd_dropin}" "not imported"
+    fi
+fi
+
+if [ -f ${SKYHOOK_DIR}/configmaps/kubelet_config.yaml ]; then
+    kubelet_config_paths
+    report_header "Checking kubelet config (${KUBELET_CONFIG_DIR:-${KUBELET_CONFIG}})"
+    # Compared against what kubelet will load, since other drop-ins or the main config can win
+    declare -A kubelet_expected=() kubelet_effective=()
+    declare -a kubelet_keys=()
+    read_yaml_file ${SKYHOOK_DIR}/configmaps/kubelet_config.yaml kubelet_expected kubelet_keys
+    read_kubelet_effective kubelet_effective
+    for key in "${kubelet_keys[@]}"; do
+        if [ -z "${kubelet_effective[$key]+set}" ]; then
+            report_result MISSING kubelet "$key" "${kubelet_expected[$key]}" "<missing>"
+        elif [ "${kubelet_effective[$key]}" != "${kubelet_expected[$key]}" ]; then
+            report_result CHANGED kubelet "$key" "${kubelet_expected[$key]}" "${kubelet_effective[$key]}"
+        else
+            report_result PASS kubelet "$key" "${kubelet_expected[$key]}" "${kubelet_effective[$key]}"
         fi
-    done  <<< $(cat ${SKYHOOK_DIR}/configmaps/ulimit.conf)
+    done
 fi
 
-if [ -n "$failures" ]; then
-    echo "${failures}"
-    exit 1
+# Translated sysctls and sysfs.conf share the tmpfiles.d drop-in
+if [ ${#tmpfiles_keys[@]} -gt 0 ] || [ -f ${tmpfiles_file} ]; then
+    report_header "Checking ${tmpfiles_file}"
+    if [ -f ${tmpfiles_file} ]; then
+        read_tmpfiles_file ${tmpfiles_file} tmpfiles_installed
+    fi
+    compare_kv tmpfiles tmpfiles_expected tmpfiles_installed tmpfiles_keys
 fi
+
+report_summary || exit 1
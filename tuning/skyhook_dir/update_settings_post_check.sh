@@ -22,68 +22,133 @@ if [ ${SET_X:-0} -eq 1 ]; then
 set -x
 fi
 
-failures=""
+SCRIPT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
+# shellcheck source=utils.sh
+source "${SCRIPT_DIR}/utils.sh"
+
+# SKYHOOK_RESOURCE_ID is {id}_{package name}_{version}
+package_name=$(echo ${SKYHOOK_RESOURCE_ID} | cut -f 2 -d _)
+hw_values_file=${STATE_ROOT}/${package_name}/hw_values.conf
+
+# Everything below reads /proc directly with builtins: one process checks every
+# sysctl, limit and kernel argument instead of forking sysctl/ulimit/cut per line.
 
 if [ -f ${SKYHOOK_DIR}/configmaps/sysctl.conf ]; then
-    echo "-------------------------"
-    echo "Checking sysctl settings"
-    echo "-------------------------"
-    while IFS= read -r line
-    do
-        name=$(echo $line | cut -f 1 -d =)
-        exp_value=$(echo $line | cut -f 2 -d =)
-        value=$(sysctl $name | cut -f 2 -d =)
-        if [ $exp_value != $value ]; then
-            failures=$(printf "%s\n%s" "${failures}" "$name:  ${exp_value} != ${value}")
+    report_header "Checking sysctl settings"
+    declare -A sysctl_expected=()
+    declare -a sysctl_keys=()
+    read_kv_file ${SKYHOOK_DIR}/configmaps/sysctl.conf sysctl_expected sysctl_keys
+    expand_hw_values sysctl sysctl_expected sysctl_keys ${hw_values_file}
+    load_sysctl_translations
+    for name in "${sysctl_keys[@]}"; do
+        expected=${sysctl_expected[$name]}
+        sysctl_target "$name"
+        target=$REPLY
+        if [ "$target" == "unsupported" ]; then
+            report_result SKIP sysctl "$name" "$expected" "<unsupported on ${KERNEL_RELEASE}>"
+            continue
+        fi
+        if [ "$target" != "sysctl:${name}" ]; then
+            echo "${name} is ${target} on kernel ${KERNEL_RELEASE}"
+            sysctl_path "$name"
+            if [ ! -e "$REPLY" ]; then
+                # The apply skips these as well
+                report_result SKIP sysctl "$name" "$expected" "<${target} unavailable>"
+                continue
+            fi
+        fi
+        if ! read_sysctl "$name"; then
+            report_result FAIL sysctl "$name" "$expected" "<missing>"
+        elif [ "$REPLY" != "$expected" ]; then
+            report_result FAIL sysctl "$name" "$expected" "$REPLY"
+        else
+            report_result PASS sysctl "$name" "$expected" "$REPLY"
+        fi
+    done
+    # Names the file that wins when a FAIL above comes from another source overriding ours
+    warn_shadowed_sysctls /etc/sysctl.d/999-${package_name}-tuning.conf
+fi
+
+if [ -f ${SKYHOOK_DIR}/configmaps/sysfs.conf ]; then
+    report_header "Checking sysfs settings"
+    declare -A sysfs_expected=()
+    declare -a sysfs_keys=() sysfs_paths=()
+    read_kv_file ${SKYHOOK_DIR}/configmaps/sysfs.conf sysfs_expected sysfs_keys
+    expand_hw_values sysfs sysfs_expected sysfs_keys ${hw_values_file}
+    for pattern in "${sysfs_keys[@]}"; do
+        expected=${sysfs_expected[$pattern]}
+        sysfs_glob "$pattern" sysfs_paths
+        if [ ${#sysfs_paths[@]} -eq 0 ]; then
+            # e.g. a NIC or disk this node doesn't have
+            report_result SKIP sysfs "$pattern" "$expected" "<no match>"
+            continue
         fi
-    done  <<< $(cat ${SKYHOOK_DIR}/configmaps/sysctl.conf)
+        sysfs_normalize "$expected"
+        normalized=$REPLY
+        for path in "${sysfs_paths[@]}"; do
+            if ! read_sysfs "$path"; then
+                report_result FAIL sysfs "${path#${SYS_ROOT}/}" "$expected" "<unreadable>"
+            elif [ "$REPLY" != "$normalized" ]; then
+                report_result FAIL sysfs "${path#${SYS_ROOT}/}" "$expected" "$REPLY"
+            else
+                report_result PASS sysfs "${path#${SYS_ROOT}/}" "$expected" "$REPLY"
+            fi
+        done
+    done
+fi
+
+if [ -f ${SKYHOOK_DIR}/configmaps/modprobe.conf ]; then
+    report_header "Checking module parameters"
+    declare -a modprobe_modules=()
+    declare -A modprobe_params=()
+    read_modprobe_file ${SKYHOOK_DIR}/configmaps/modprobe.conf modprobe_modules modprobe_params
+    for key in "${!modprobe_params[@]}"; do
+        mod=${key%%.*}
+        expected=${modprobe_params[$key]}
+        module_state "$mod"
+        if [ "$REPLY" = "absent" ]; then
+            report_result SKIP module "$key" "$expected" "<not loaded>"
+            continue
+        fi
+        rc=0
+        module_param_matches "$mod" "${key#*.}" "$expected" || rc=$?
+        case $rc in
+            0) report_result PASS module "$key" "$expected" "$REPLY" ;;
+            1) report_result FAIL module "$key" "$expected" "$REPLY" ;;
+            *) report_result SKIP module "$key" "$expected" "<not in sysfs>" ;;
+        esac
+    done
 fi
 
+declare -A live_limits=()
+read_limits live_limits
+
 function container_check {
     file=$1
-    echo "-------------------------"
-    echo "Check container limits"
-    echo "-------------------------"
-    while IFS= read -r line
-    do
-        name=$(echo $line | cut -f 1 -d = | sed 's/Limit//g')
-        expected_value=$(echo $line | cut -f 2 -d =)
-        if [ ${expected_value} == "infinity" ]; then
+    report_header "Check container limits (${file##*/})"
+    declare -A service_expected=()
+    declare -a service_keys=()
+    read_kv_file ${file} service_expected service_keys
+    for key in "${service_keys[@]}"; do
+        [[ "$key" == Limit* ]] || continue
+        name=${key#Limit}
+        expected=${service_expected[$key]}
+        if [ "${expected}" == "infinity" ]; then
+            report_result SKIP limit "$name" "$expected" "${live_limits[$name]:-}"
             continue
         fi
-        case $name in
-            "NOFILE")
-                actual_value=$(ulimit -n)
-            ;;
-            "FSIZE")
-                actual_value=$(ulimit -f)
-            ;;
-            "STACK")
-                actual_value=$(ulimit -s)
-                # The value is actually 1024 of the expected value due to being in KB
-                expected_value=$((${expected_value} / 1024))
-            ;;
-            "NPROC")
-                actual_value=$(ulimit -u)
-            ;;
-            "MEMLOCK")
-                actual_value=$(ulimit -l)
-                # The value is actually 1024 of the expected value due to being in KB
-                if [ ${expected_value} != "infinity" ]; then
-                    expected_value="infinity"
-                else
-                    expected_value=$((${expected_value} / 1024))
-                fi
-            ;;
-            *)
-            echo "Unkown setting ${name}"
-            ;;
-        esac
-        if [ ${expected_value} != ${actual_value} ]; then
-            failures=$(printf "%s\n%s" "${failures}" "$name: ${expected_value} != ${actual_value}")
+        if [ -z "${LIMIT_ROWS[$name]+set}" ]; then
+            echo "Unknown setting ${name}"
+            continue
+        fi
+        # /proc/self/limits reports sizes in bytes like systemd does, so no
+        # conversion is needed (ulimit -s/-l report KiB)
+        if [ "${expected}" != "${live_limits[$name]:-}" ]; then
+            report_result FAIL limit "$name" "$expected" "${live_limits[$name]:-<missing>}"
+        else
+            report_result PASS limit "$name" "$expected" "${live_limits[$name]}"
         fi
-    # Use cat here instead of < file in case of single line files
-    done <<< $(cat $file | grep Limit)
+    done
 }
 
 if [ -f ${SKYHOOK_DIR}/configmaps/service_containerd.conf ]; then
@@ -94,21 +159,95 @@ if [ -f ${SKYHOOK_DIR}/configmaps/service_crio.conf ]; then
     container_check ${SKYHOOK_DIR}/configmaps/service_crio.conf
 fi
 
-if [ -f ${SKYHOOK_DIR}/configmaps/grub.conf ]; then
-    echo "-------------------------"
-    echo "Checking grub settings"
-    echo "-------------------------"
-    grub_update=""
-    while IFS= read -r line
-    do
-        grub_update="${grub_update} ${line}"
-    done <<< $(cat ${SKYHOOK_DIR}/configmaps/grub.conf)
-    if [ $(grep -c "${grub_update}" /proc/cmdline) -eq 0 ]; then
-        failures=$(printf "%s\n%s" "${failures}" "${grub_update} NOT in kernel cmdline: $(cat /proc/cmdline)")
+if [ -f ${SKYHOOK_DIR}/configmaps/containerd_config.toml ]; then
+    report_header "Checking effective containerd config"
+    declare -A containerd_expected=() containerd_effective=()
+    declare -a containerd_keys=()
+    read_toml_file ${SKYHOOK_DIR}/configmaps/containerd_config.toml containerd_expected containerd_keys
+    containerd_config=${CONTAINERD_CONFIG:-/etc/containerd/config.toml}
+    # Every setting of the fragment has to survive the merge with the main config and other imports
+    if containerd_dump=$(containerd --config ${containerd_config} config dump 2>/dev/null); then
+        read_toml_file - containerd_effective <<< "${containerd_dump}"
+        for key in "${containerd_keys[@]}"; do
+            if [ "${containerd_effective[$key]:-<missing>}" == "${containerd_expected[$key]}" ]; then
+                report_result PASS toml "$key" "${containerd_expected[$key]}" "${containerd_effective[$key]}"
+            else
+                report_result FAIL toml "$key" "${containerd_expected[$key]}" "${containerd_effective[$key]:-<missing>}"
+            fi
+        done
+        # The apply records the merged config and when it changed; the interrupt must have
+        # restarted containerd since
+        containerd_stamp=${STATE_ROOT}/${package_name}/containerd_config.sha256
+        containerd_hash=$(echo "${containerd_dump}" | sha256sum | cut -f 1 -d ' ')
+        containerd_applied=""
+        containerd_changed_at=0
+        [ ! -f ${containerd_stamp} ] || read -r containerd_applied containerd_changed_at < ${containerd_stamp}
+        containerd_pid=$(systemctl show -p MainPID --value containerd 2>/dev/null || echo 0)
+        if [ "${containerd_applied}" != "${containerd_hash}" ]; then
+            report_result FAIL restart containerd "restarted" "pending"
+        elif [ "${containerd_pid:-0}" -gt 0 ] && process_start_time ${containerd_pid}; then
+            if [ "$REPLY" -ge "${containerd_changed_at:-0}" ]; then
+                report_result PASS restart containerd "restarted" "restarted"
+            else
+                report_result FAIL restart containerd "restarted" "pending"
+            fi
+        else
+            report_result FAIL restart containerd "running" "<not running>"
+        fi
+    else
+        report_result FAIL toml "${containerd_config}" "valid" "<containerd config dump failed>"
     fi
 fi
 
-if [ -n "$failures" ]; then
-    echo "${failures}"
-    exit 1
+if [ -f ${SKYHOOK_DIR}/configmaps/kubelet_config.yaml ]; then
+    report_header "Checking kubelet config"
+    kubelet_config_paths
+    declare -A kubelet_expected=() kubelet_effective=()
+    declare -a kubelet_keys=()
+    read_yaml_file ${SKYHOOK_DIR}/configmaps/kubelet_config.yaml kubelet_expected kubelet_keys
+    read_kubelet_effective kubelet_effective
+    for key in "${kubelet_keys[@]}"; do
+        if [ "${kubelet_effective[$key]:-<missing>}" == "${kubelet_expected[$key]}" ]; then
+            report_result PASS kubelet "$key" "${kubelet_expected[$key]}" "${kubelet_effective[$key]}"
+        else
+            report_result FAIL kubelet "$key" "${kubelet_expected[$key]}" "${kubelet_effective[$key]:-<missing>}"
+        fi
+    done
+    # kubelet only reads its config at start, so it must have started after the last change
+    kubelet_pid=$(systemctl show -p MainPID --value kubelet 2>/dev/null || echo 0)
+    if [ "${kubelet_pid:-0}" -gt 0 ] && process_start_time ${kubelet_pid}; then
+        kubelet_started=$REPLY
+        kubelet_modified=0
+        for f in ${KUBELET_CONFIG} ${KUBELET_CONFIG_DIR:+${KUBELET_CONFIG_DIR}/*.conf}; do
+            [ -f "$f" ] || continue
+            m=$(stat -c %Y "$f")
+            [ "$m" -le "$kubelet_modified" ] || kubelet_modified=$m
+        done
+        if [ "$kubelet_started" -ge "$kubelet_modified" ]; then
+            report_result PASS restart kubelet "restarted" "restarted"
+        else
+            report_result FAIL restart kubelet "restarted" "pending"
+        fi
+    else
+        report_result FAIL restart kubelet "running" "<not running>"
+    fi
+fi
+
+if [ -f ${SKYHOOK_DIR}/configmaps/grub.conf ]; then
+    report_header "Checking grub settings"
+    declare -a cmdline=()
+    read_cmdline cmdline
+    # Arguments must appear in the same order as in grub.conf
+    while IFS= read -r line || [ -n "$line" ]; do
+        read -r -a args <<< "$line"
+        for arg in "${args[@]}"; do
+            if cmdline_has_arg "$arg"; then
+                report_result PASS cmdline "$arg" "present" "present"
+            else
+                report_result FAIL cmdline "$arg" "present" "missing"
+            fi
+        done
+    done < ${SKYHOOK_DIR}/configmaps/grub.conf
 fi
+
+report_summary || exit 1
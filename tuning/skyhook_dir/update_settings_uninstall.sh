@@ -25,6 +25,10 @@ if [ ${SET_X:-0} -eq 1 ]; then
     set -x
 fi
 
+SCRIPT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
+# shellcheck source=utils.sh
+source "${SCRIPT_DIR}/utils.sh"
+
 # SKYHOOK_RESOURCE_ID is {id}_{package name}_{version}
 # We want to use the package name in the drop in files so multiple tuning packages can be installed
 package_name=$(echo ${SKYHOOK_RESOURCE_ID} | cut -f 2 -d _)
@@ -33,6 +37,44 @@ if [ -f /etc/sysctl.d/999-${package_name}-tuning.conf ]; then
     rm /etc/sysctl.d/999-${package_name}-tuning.conf
 fi
 
+if [ -f /etc/tmpfiles.d/999-${package_name}-tuning.conf ]; then
+    rm /etc/tmpfiles.d/999-${package_name}-tuning.conf
+fi
+
+rm -f ${STATE_ROOT}/${package_name}/hw_values.conf
+
+if [ -f /etc/modprobe.d/999-${package_name}-tuning.conf ]; then
+    rm /etc/modprobe.d/999-${package_name}-tuning.conf
+    # Drop the options from the initramfs copy of modprobe.d as well
+    regenerate_initramfs "${INITRAMFS_KERNEL:-$(uname -r)}" || true
+fi
+
+containerd_dropin=${CONTAINERD_DROPIN_DIR:-/etc/containerd/conf.d}/999-${package_name}-tuning.toml
+if [ -f ${containerd_dropin} ]; then
+    rm ${containerd_dropin}
+    containerd_remove_import ${CONTAINERD_CONFIG:-/etc/containerd/config.toml} ${containerd_dropin}
+    rm -f ${STATE_ROOT}/${package_name}/containerd_config.sha256
+    systemctl restart containerd
+fi
+
+kubelet_config_paths
+if [ -n "${KUBELET_CONFIG_DIR}" ] && [ -f ${KUBELET_CONFIG_DIR}/999-${package_name}-tuning.conf ]; then
+    rm ${KUBELET_CONFIG_DIR}/999-${package_name}-tuning.conf
+fi
+# Put back the main config lines the apply merged over
+kubelet_orig=${STATE_ROOT}/${package_name}/kubelet_config.orig
+if [ -f ${kubelet_orig} ]; then
+    while IFS=$'\t' read -r key line; do
+        if [ "${line}" = "<absent>" ]; then
+            sed -i "/^${key}:/d" ${KUBELET_CONFIG}
+        else
+            yaml_replace_line ${KUBELET_CONFIG} "${key}" "${line}"
+        fi
+    done < ${kubelet_orig}
+    rm ${kubelet_orig}
+fi
+rm -f /etc/systemd/system/kubelet.service.d/999-${package_name}-state-reset.conf
+
 if [ -f /etc/security/limits.d/999-${package_name}-tuning.conf ]; then
     rm /etc/security/limits.d/999-${package_name}-tuning.conf
 fi
@@ -40,6 +82,8 @@ fi
 # remove any service drop in files that may have been created
 rm /etc/systemd/system/*.d/999-${package_name}-tuning.conf
 
-if [ -f /etc/default/grub.d/999-${package_name}-tuning.cfg ]; then
-    rm /etc/default/grub.d/999-${package_name}-tuning.cfg
+# Regenerate grub.cfg so the tuning kernel arguments are gone at the next boot
+if [ -f ${GRUB_D_DIR:-/etc/default/grub.d}/999-${package_name}-tuning.cfg ]; then
+    "${SKYHOOK_DIR}/skyhook_dir/grub_coordinator.sh" remove 999-${package_name}-tuning.cfg
+    "${SKYHOOK_DIR}/skyhook_dir/grub_coordinator.sh" update
 fi
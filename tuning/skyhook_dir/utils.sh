@@ -0,0 +1,1087 @@
+#!/bin/bash
+
+# SPDX-FileCopyrightText: Copyright (c) 2025 NVIDIA CORPORATION & AFFILIATES. All rights reserved.
+# SPDX-License-Identifier: Apache-2.0
+#
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Shared utility functions for tuning scripts
+#
+# These stick to bash builtins on purpose: checks run once per setting and
+# forking sysctl/cut/sed for each one dominates their runtime on large configs.
+# Functions that produce a single value return it in REPLY.
+
+# Root of procfs, overridable so the checks can run against a fake tree
+PROC_ROOT=${PROC_ROOT:-/proc}
+
+# Roots of sysfs and debugfs, overridable the same way
+SYS_ROOT=${SYS_ROOT:-/sys}
+DEBUGFS_ROOT=${DEBUGFS_ROOT:-${SYS_ROOT}/kernel/debug}
+
+# Where the package keeps node-local state (plans, records of what was applied).
+# Scripts use ${STATE_ROOT}/${package_name} so multiple tuning packages don't collide
+STATE_ROOT=${STATE_ROOT:-/var/lib/skyhook-packages}
+
+# Strip leading and trailing whitespace from $1
+# Usage: trim "  value  "; echo "$REPLY"
+trim() {
+    local s=$1
+    s="${s#"${s%%[![:space:]]*}"}"
+    s="${s%"${s##*[![:space:]]}"}"
+    REPLY=$s
+}
+
+# Collapse every run of whitespace in $1 to a single space and trim the ends
+# so multi-field values like "4096 87380 6291456" compare equal to /proc/sys output
+# Usage: squash "4096	87380   6291456"; echo "$REPLY"
+squash() {
+    local -a fields
+    read -r -a fields <<< "$1"
+    REPLY="${fields[*]}"
+}
+
+# Parse a key=value file (sysctl.conf, ulimit.conf, ...) into an associative array
+# Blank lines and comments are skipped, whitespace around "=" is ignored and
+# values are squashed. A leading "-" (sysctl's ignore-errors marker) is dropped.
+# Keys are also appended to the optional order array so reports follow the file.
+# Usage: declare -A kv; declare -a keys; read_kv_file file kv keys
+read_kv_file() {
+    local file=$1
+    local -n _kv_map=$2
+    local _kv_order_name=${3:-}
+    local line key
+    while IFS= read -r line || [ -n "$line" ]; do
+        trim "$line"
+        line=$REPLY
+        case "$line" in
+            ""|"#"*|";"*) continue ;;
+            *=*) ;;
+            *) continue ;;
+        esac
+        trim "${line%%=*}"
+        key=${REPLY#-}
+        squash "${line#*=}"
+        if [ -n "$_kv_order_name" ] && [ -z "${_kv_map[$key]+set}" ]; then
+            local -n _kv_order=$_kv_order_name
+            _kv_order+=("$key")
+        fi
+        _kv_map[$key]=$REPLY
+    done < "$file"
+}
+
+# Hardware facts that {{ expression }} values in sysctl.conf/sysfs.conf can use, filled by load_hw_facts
+#   mem_kb, mem_mb, mem_gb  MemTotal from /proc/meminfo
+#   cpus                    online CPUs
+#   numa_nodes              online NUMA nodes
+#   nic_speed_mbps          fastest link speed of the physical NICs, 0 if none reports one
+declare -A HW_FACTS=()
+
+# Number of entries in a sysfs list like "0-3,8-11"
+# Usage: list_count "0-3,8-11"; echo "$REPLY"
+list_count() {
+    local IFS=, part n=0
+    for part in $1; do
+        case "$part" in
+            *-*) n=$((n + ${part#*-} - ${part%-*} + 1)) ;;
+            *) n=$((n + 1)) ;;
+        esac
+    done
+    REPLY=$n
+}
+
+load_hw_facts() {
+    [ ${#HW_FACTS[@]} -eq 0 ] || return 0
+    local key value rest f speed
+    HW_FACTS[mem_kb]=0
+    if [ -r ${PROC_ROOT}/meminfo ]; then
+        while read -r key value rest; do
+            if [ "$key" = "MemTotal:" ]; then
+                HW_FACTS[mem_kb]=$value
+                break
+            fi
+        done < ${PROC_ROOT}/meminfo
+    fi
+    HW_FACTS[mem_mb]=$((HW_FACTS[mem_kb] / 1024))
+    HW_FACTS[mem_gb]=$((HW_FACTS[mem_kb] / 1048576))
+    HW_FACTS[cpus]=1
+    if { read -r value < ${SYS_ROOT}/devices/system/cpu/online; } 2>/dev/null; then
+        list_count "$value"
+        HW_FACTS[cpus]=$REPLY
+    fi
+    HW_FACTS[numa_nodes]=1
+    if { read -r value < ${SYS_ROOT}/devices/system/node/online; } 2>/dev/null; then
+        list_count "$value"
+        HW_FACTS[numa_nodes]=$REPLY
+    fi
+    HW_FACTS[nic_speed_mbps]=0
+    for f in ${SYS_ROOT}/class/net/*/speed; do
+        # Virtual interfaces (no device link) report made up speeds, down links fail the read
+        [ -e "${f%/speed}/device" ] || continue
+        { read -r speed < "$f"; } 2>/dev/null || continue
+        [[ "$speed" =~ ^[0-9]+$ ]] || continue
+        [ "$speed" -le "${HW_FACTS[nic_speed_mbps]}" ] || HW_FACTS[nic_speed_mbps]=$speed
+    done
+}
+
+# Evaluate one expression over HW_FACTS with awk, truncated to an integer
+# Only numbers, + - * / % ( ) , the fact names and min/max/clamp are accepted.
+# The expression is parsed rather than handed to awk, so a zero divisor is an error
+# on every awk (mawk would print inf), and so is a result that isn't finite.
+# Usage: hw_expr "clamp(mem_kb / 1000, 65536, 4194304)"; echo "$REPLY"
+hw_expr() {
+    local expr=$1 rest=$1 name facts=""
+    load_hw_facts
+    if [[ "$expr" =~ [^0-9a-z_+*/%(),.\ -] ]]; then
+        echo "ERROR: invalid character in {{ ${expr} }}" >&2
+        return 1
+    fi
+    while [[ "$rest" =~ [a-z_]+ ]]; do
+        name=${BASH_REMATCH[0]}
+        rest=${rest#*"$name"}
+        case "$name" in
+            min|max|clamp) ;;
+            *)
+                if [ -z "${HW_FACTS[$name]+set}" ]; then
+                    echo "ERROR: unknown name ${name} in {{ ${expr} }}" >&2
+                    return 1
+                fi
+                ;;
+        esac
+    done
+    for name in "${!HW_FACTS[@]}"; do
+        facts+="${name}=${HW_FACTS[$name]} "
+    done
+    REPLY=$(HW_EXPR=$expr HW_EXPR_FACTS=$facts awk '
+        function fail(msg) { print msg > "/dev/stderr"; exit 1 }
+        function next_token(   c) {
+            while (substr(src, pos, 1) == " ") pos++
+            c = substr(src, pos, 1)
+            if (c == "") { tok = ""; return }
+            if (match(substr(src, pos), /^[0-9.]+/) || match(substr(src, pos), /^[a-z_]+/)) {
+                tok = substr(src, pos, RLENGTH)
+                pos += RLENGTH
+                return
+            }
+            tok = c
+            pos++
+        }
+        function expect(t) {
+            if (tok != t) fail("expected \"" t "\" at \"" (tok == "" ? "end" : tok) "\"")
+            next_token()
+        }
+        function sum(   v, op) {
+            v = product()
+            while (tok == "+" || tok == "-") {
+                op = tok
+                next_token()
+                v = op == "+" ? v + product() : v - product()
+            }
+            return v
+        }
+        function product(   v, op, d) {
+            v = unary()
+            while (tok == "*" || tok == "/" || tok == "%") {
+                op = tok
+                next_token()
+                d = unary()
+                if (op == "*") { v = v * d; continue }
+                if (d == 0) fail("division by zero")
+                v = op == "/" ? v / d : v % d
+            }
+            return v
+        }
+        function unary() {
+            if (tok == "-") { next_token(); return -unary() }
+            if (tok == "+") { next_token(); return unary() }
+            return primary()
+        }
+        function primary(   t, a, b, c) {
+            t = tok
+            if (t == "(") { next_token(); a = sum(); expect(")"); return a }
+            if (t ~ /^[0-9]*\.?[0-9]+$|^[0-9]+\.$/) { next_token(); return t + 0 }
+            if (t == "min" || t == "max" || t == "clamp") {
+                next_token(); expect("(")
+                a = sum(); expect(","); b = sum()
+                if (t == "clamp") { expect(","); c = sum() }
+                expect(")")
+                if (t == "min") return a < b ? a : b
+                if (t == "max") return a > b ? a : b
+                a = a > b ? a : b
+                return a < c ? a : c
+            }
+            if (t in facts) { next_token(); return facts[t] }
+            fail("unexpected \"" (t == "" ? "end" : t) "\"")
+        }
+        BEGIN {
+            n = split(ENVIRON["HW_EXPR_FACTS"], kv, " ")
+            for (i = 1; i <= n; i++) facts[substr(kv[i], 1, index(kv[i], "=") - 1)] = substr(kv[i], index(kv[i], "=") + 1)
+            src = ENVIRON["HW_EXPR"]
+            pos = 1
+            next_token()
+            v = sum()
+            if (tok != "") fail("unexpected \"" tok "\"")
+            printf "%.0f\n", int(v)
+        }' 2>&1) || {
+        echo "ERROR: could not evaluate {{ ${expr} }}: ${REPLY}" >&2
+        return 1
+    }
+    # Overflow leaves inf or nan, which printf prints as such
+    if ! [[ "$REPLY" =~ ^-?[0-9]+$ ]]; then
+        echo "ERROR: could not evaluate {{ ${expr} }}: ${REPLY} is not a finite number" >&2
+        return 1
+    fi
+}
+
+# Replace every {{ expression }} in a value with what it evaluates to on this node
+# Usage: eval_hw_value "4096 87380 {{ mem_kb * 4 }}"; echo "$REPLY"
+eval_hw_value() {
+    local value=$1 out=""
+    while [[ "$value" == *"{{"*"}}"* ]]; do
+        out+=${value%%"{{"*}
+        value=${value#*"{{"}
+        trim "${value%%"}}"*}"
+        value=${value#*"}}"}
+        hw_expr "$REPLY" || return 1
+        out+=$REPLY
+    done
+    REPLY=$out$value
+}
+
+# Expression values used by the apply, see expand_hw_values
+declare -a HW_RECORDED=()
+
+# Replace the {{ expression }} values of a map with their value on this node
+# With "record" (the apply) each one is printed and added to HW_RECORDED as
+# type<TAB>key<TAB>expression<TAB>value for write_hw_values. Otherwise (the checks) a value
+# recorded in the file for the same expression is reused, so the checks compare against what
+# the apply wrote even if a fact changed since (a NIC went down, memory was offlined)
+# Usage: expand_hw_values type map keys record_file [record]
+expand_hw_values() {
+    local type=$1 record_file=$4 mode=${5:-}
+    local -n _hw_map=$2 _hw_keys=$3
+    local -A recorded=()
+    local key expr rtype rkey rexpr rvalue
+    if [ "$mode" != record ] && [ -n "$record_file" ] && [ -f "$record_file" ]; then
+        while IFS=$'\t' read -r rtype rkey rexpr rvalue; do
+            [ "$rtype" = "$type" ] && recorded[$rkey]="${rexpr}"$'\t'"${rvalue}"
+        done < "$record_file"
+    fi
+    for key in "${_hw_keys[@]}"; do
+        expr=${_hw_map[$key]}
+        [[ "$expr" == *"{{"*"}}"* ]] || continue
+        if [ -n "${recorded[$key]+set}" ] && [ "${recorded[$key]%%$'\t'*}" = "$expr" ]; then
+            _hw_map[$key]=${recorded[$key]#*$'\t'}
+            continue
+        fi
+        if ! eval_hw_value "$expr"; then
+            echo "ERROR: could not evaluate ${type} ${key} = ${expr}"
+            exit 1
+        fi
+        _hw_map[$key]=$REPLY
+        if [ "$mode" = record ]; then
+            echo "${key}: ${expr} = ${REPLY}"
+            HW_RECORDED+=("${type}"$'\t'"${key}"$'\t'"${expr}"$'\t'"${REPLY}")
+        fi
+    done
+}
+
+# Write the values expand_hw_values recorded, or remove the file if there are none
+# Usage: write_hw_values record_file
+write_hw_values() {
+    if [ ${#HW_RECORDED[@]} -eq 0 ]; then
+        rm -f "$1"
+        return 0
+    fi
+    mkdir -p "$(dirname "$1")"
+    printf '%s\n' "${HW_RECORDED[@]}" > "$1"
+}
+
+# Parse a limits.d file into an associative array of item -> value
+# Only "* hard <item> <value>" entries are read, which is what update_settings.sh writes
+# Usage: declare -A kv; read_limits_file /etc/security/limits.d/x.conf kv
+read_limits_file() {
+    local file=$1
+    local -n _lf_map=$2
+    local domain type item value rest
+    while read -r domain type item value rest || [ -n "$domain" ]; do
+        [ "$domain" = "*" ] && [ "$type" = "hard" ] || continue
+        _lf_map[$item]=$value
+    done < "$file"
+}
+
+# Parse a tmpfiles.d file into an associative array of path -> value
+# Only "w" entries are read, which is what update_settings.sh writes for translated keys
+# Usage: declare -A kv; read_tmpfiles_file /etc/tmpfiles.d/x.conf kv
+read_tmpfiles_file() {
+    local file=$1
+    local -n _tf_map=$2
+    local type path mode user group age value
+    while read -r type path mode user group age value || [ -n "$type" ]; do
+        [ "$type" = "w" ] || continue
+        squash "$value"
+        _tf_map[$path]=$REPLY
+    done < "$file"
+}
+
+# Parse a directive file (modprobe.d, ...) into an associative array keyed by each
+# non-comment line with whitespace squashed, so two files can be compared with compare_kv
+# Usage: declare -A lines; declare -a order; read_directive_file file lines order
+read_directive_file() {
+    local file=$1
+    local -n _df_map=$2
+    local _df_order_name=${3:-}
+    local line
+    while IFS= read -r line || [ -n "$line" ]; do
+        squash "$line"
+        line=$REPLY
+        case "$line" in
+            ""|"#"*) continue ;;
+        esac
+        if [ -n "$_df_order_name" ] && [ -z "${_df_map[$line]+set}" ]; then
+            local -n _df_order=$_df_order_name
+            _df_order+=("$line")
+        fi
+        _df_map[$line]=present
+    done < "$file"
+}
+
+# Compare an expected and an installed associative array as sets in one pass
+# Every key is reported once: PASS, CHANGED, MISSING (expected but not installed)
+# or EXTRA (installed but no longer expected)
+# Usage: compare_kv <type> expected_map installed_map [expected_order_array]
+compare_kv() {
+    local type=$1
+    local -n _cmp_expected=$2
+    local -n _cmp_installed=$3
+    local -a _cmp_keys
+    local key
+    if [ -n "${4:-}" ]; then
+        local -n _cmp_order=$4
+        _cmp_keys=("${_cmp_order[@]}")
+    else
+        _cmp_keys=("${!_cmp_expected[@]}")
+    fi
+    for key in "${_cmp_keys[@]}"; do
+        if [ -z "${_cmp_installed[$key]+set}" ]; then
+            report_result MISSING "$type" "$key" "${_cmp_expected[$key]}" "<missing>"
+        elif [ "${_cmp_installed[$key]}" != "${_cmp_expected[$key]}" ]; then
+            report_result CHANGED "$type" "$key" "${_cmp_expected[$key]}" "${_cmp_installed[$key]}"
+        else
+            report_result PASS "$type" "$key" "${_cmp_expected[$key]}" "${_cmp_installed[$key]}"
+        fi
+    done
+    for key in "${!_cmp_installed[@]}"; do
+        if [ -z "${_cmp_expected[$key]+set}" ]; then
+            report_result EXTRA "$type" "$key" "<absent>" "${_cmp_installed[$key]}"
+        fi
+    done
+}
+
+# Copy src over dest only when the content differs
+# Returns 0 if dest was written, 1 if it already had the same content
+# Exits if dest can't be written: set -e doesn't apply inside the if callers use
+# Usage: if install_if_changed src dest; then echo changed; fi
+install_if_changed() {
+    local src=$1 dest=$2
+    if [ -f "$dest" ] && cmp -s "$src" "$dest"; then
+        return 1
+    fi
+    if ! cp "$src" "$dest"; then
+        echo "ERROR: could not install ${dest}"
+        exit 1
+    fi
+    return 0
+}
+
+# Turn a kernel release ("6.8.0-1015-gcp", "5.13") into a comparable number (6008, 5013)
+# Usage: kernel_version_number "$(uname -r)"; echo "$REPLY"
+kernel_version_number() {
+    local v=$1 major minor
+    major=${v%%.*}
+    v=${v#*.}
+    minor=${v%%[!0-9]*}
+    REPLY=$(( ${major:-0} * 1000 + ${minor:-0} ))
+}
+
+# sysctl.conf key -> target on the running kernel, filled by load_sysctl_translations
+declare -A SYSCTL_TRANSLATION=()
+KERNEL_RELEASE=""
+
+# Load the rows of sysctl_translations.conf that apply to the running kernel
+# Keys without a matching row stay plain sysctls
+# Usage: load_sysctl_translations [file]
+load_sysctl_translations() {
+    local file=${1:-${SCRIPT_DIR}/sysctl_translations.conf}
+    local key from to target rest current
+    IFS= read -r KERNEL_RELEASE < "${PROC_ROOT}/sys/kernel/osrelease" || true
+    [ -n "$KERNEL_RELEASE" ] && [ -f "$file" ] || return 0
+    kernel_version_number "$KERNEL_RELEASE"
+    current=$REPLY
+    while read -r key from to target rest || [ -n "$key" ]; do
+        case "$key" in
+            ""|"#"*) continue ;;
+        esac
+        [ -z "${SYSCTL_TRANSLATION[$key]+set}" ] || continue
+        kernel_version_number "$from"
+        [ "$current" -ge "$REPLY" ] || continue
+        if [ "$to" != "-" ]; then
+            kernel_version_number "$to"
+            [ "$current" -lt "$REPLY" ] || continue
+        fi
+        SYSCTL_TRANSLATION[$key]=$target
+    done < "$file"
+}
+
+# Where a sysctl.conf key is applied on this kernel: sysctl:<key>, debugfs:<path>,
+# sysfs:<path> or unsupported
+# Usage: sysctl_target kernel.sched_latency_ns; echo "$REPLY"
+sysctl_target() {
+    REPLY=${SYSCTL_TRANSLATION[$1]:-sysctl:$1}
+}
+
+# Map a sysctl key to the file backing it, following the translation table
+# Keys using "/" as the separator are taken as-is, otherwise "." becomes "/"
+# Returns 1 if the key is unsupported on this kernel
+# Usage: sysctl_path net.core.rmem_max; echo "$REPLY"
+sysctl_path() {
+    local key
+    sysctl_target "$1"
+    case "$REPLY" in
+        sysctl:*)
+            key=${REPLY#sysctl:}
+            if [[ "$key" == */* ]]; then
+                REPLY="${PROC_ROOT}/sys/${key}"
+            else
+                REPLY="${PROC_ROOT}/sys/${key//.//}"
+            fi
+            ;;
+        debugfs:*) REPLY="${DEBUGFS_ROOT}/${REPLY#debugfs:}" ;;
+        sysfs:*) REPLY="${SYS_ROOT}/${REPLY#sysfs:}" ;;
+        *)
+            REPLY=""
+            return 1
+            ;;
+    esac
+}
+
+# Read the live value of a sysctl key without forking sysctl
+# Returns 1 if the key does not exist on this kernel
+# Usage: read_sysctl vm.swappiness && echo "$REPLY"
+read_sysctl() {
+    local path value
+    sysctl_path "$1" || return 1
+    path=$REPLY
+    REPLY=""
+    [ -r "$path" ] || return 1
+    IFS= read -r value < "$path" || [ -n "$value" ] || return 1
+    squash "$value"
+}
+
+# Warn about keys of a sysctl file that lose to another sysctl.d file, /etc/sysctl.conf
+# or tuned (see sysctl_resolver.sh for the precedence). Only a warning: the live value
+# is what the post-interrupt check fails on, this names the file that will win
+# Usage: warn_shadowed_sysctls file
+warn_shadowed_sysctls() {
+    local key intended value source
+    [ -f "$1" ] || return 0
+    while IFS=$'\t' read -r key intended value source; do
+        echo "WARNING: sysctl ${key} = ${intended} from $1 is overridden by ${source} (${value})"
+    done < <("${SCRIPT_DIR}/sysctl_resolver.sh" shadowed "$1" || true)
+}
+
+# Expand a sysfs.conf path (relative to /sys, or absolute, with shell globs) into the
+# existing files it matches
+# Usage: declare -a paths; sysfs_glob "block/nvme*n1/queue/scheduler" paths
+sysfs_glob() {
+    local pattern=${1#/sys/}
+    local -n _sg_paths=$2
+    local p
+    _sg_paths=()
+    # sysfs names have no whitespace, so unquoted expansion only globs
+    for p in ${SYS_ROOT}/${pattern#/}; do
+        if [ -e "$p" ]; then
+            _sg_paths+=("$p")
+        fi
+    done
+}
+
+# Normalize a sysfs value so what was written compares equal to what reads back:
+# the selected "[choice]" of a choice list, hex masks without "," separators and
+# leading zeros ("00000000,000000ff" -> "ff"), otherwise whitespace squashed
+# Usage: sysfs_normalize "always madvise [never]"; echo "$REPLY"
+sysfs_normalize() {
+    local v
+    squash "$1"
+    v=$REPLY
+    if [[ "$v" =~ \[([^]]*)\] ]]; then
+        REPLY=${BASH_REMATCH[1]}
+    elif [[ "$v" =~ ^[0-9a-fA-F,]+$ ]]; then
+        v=${v//,/}
+        v=${v,,}
+        while [[ "$v" == 0* ]]; do
+            v=${v#0}
+        done
+        REPLY=${v:-0}
+    fi
+}
+
+# Read a sysfs file and normalize it with sysfs_normalize
+# Returns 1 if it can't be read
+# Usage: read_sysfs /sys/kernel/mm/transparent_hugepage/enabled && echo "$REPLY"
+read_sysfs() {
+    local value
+    REPLY=""
+    [ -r "$1" ] || return 1
+    IFS= read -r value < "$1" || [ -n "$value" ] || return 1
+    sysfs_normalize "$value"
+}
+
+# Parse a modprobe.d file: every module it mentions is appended to the modules array
+# and "options" parameters go into the params map as module.param -> value.
+# Module names are normalized to "_" like /sys/module does.
+# Usage: declare -a mods; declare -A params; read_modprobe_file file mods params
+read_modprobe_file() {
+    local file=$1
+    local -n _mp_modules=$2
+    local -n _mp_params=$3
+    local directive first second rest mod opt
+    local -a opts
+    while read -r directive first second rest || [ -n "$directive" ]; do
+        case "$directive" in
+            options|blacklist|install|remove|softdep) mod=$first ;;
+            alias) mod=$second ;;
+            *) continue ;;
+        esac
+        [ -n "$mod" ] || continue
+        mod=${mod//-/_}
+        [[ " ${_mp_modules[*]} " == *" ${mod} "* ]] || _mp_modules+=("$mod")
+        [ "$directive" = "options" ] || continue
+        read -r -a opts <<< "${second} ${rest}"
+        for opt in "${opts[@]}"; do
+            [[ "$opt" == *=* ]] || continue
+            _mp_params[${mod}.${opt%%=*}]=${opt#*=}
+        done
+    done < "$file"
+}
+
+# How a change to a module's configuration can take effect
+# Sets REPLY to absent (not loaded, applies on next load), builtin (reboot),
+# in-use (loaded with users, reboot) or loaded (can be reloaded)
+# Usage: module_state nvme; echo "$REPLY"
+module_state() {
+    local dir="${SYS_ROOT}/module/$1" refcnt=0
+    if [ ! -d "$dir" ]; then
+        REPLY=absent
+    elif [ ! -f "${dir}/initstate" ]; then
+        REPLY=builtin
+    else
+        [ -r "${dir}/refcnt" ] && read -r refcnt < "${dir}/refcnt"
+        if [ "${refcnt:-0}" -gt 0 ] || [ -n "$(ls -A "${dir}/holders" 2>/dev/null)" ]; then
+            REPLY=in-use
+        else
+            REPLY=loaded
+        fi
+    fi
+}
+
+# Compare a module parameter with /sys/module/<mod>/parameters/<param>
+# Boolean parameters read back as Y/N whatever form they were given in
+# Returns 0 if it matches, 1 if it differs, 2 if it can't be read (not loaded,
+# or the parameter isn't exposed). The live value is left in REPLY.
+# Usage: module_param_matches nvme poll_queues 4
+module_param_matches() {
+    local desired
+    read_sysfs "${SYS_ROOT}/module/$1/parameters/$2" || return 2
+    if [ "$REPLY" = "Y" ] || [ "$REPLY" = "N" ]; then
+        case "${3,,}" in
+            1|y|yes|on|true) desired=Y ;;
+            0|n|no|off|false) desired=N ;;
+            *) desired=$3 ;;
+        esac
+    else
+        local live=$REPLY
+        sysfs_normalize "$3"
+        desired=$REPLY
+        REPLY=$live
+    fi
+    [ "$REPLY" = "$desired" ]
+}
+
+# Check whether any of the given modules is packed in the initramfs of a kernel
+# Listing an initramfs takes a while, so it is done once for all modules. Returns 0
+# (assume yes) if the initramfs can't be listed on this distro.
+# Usage: initramfs_has_module <kernel> <module>...
+initramfs_has_module() {
+    local kernel=$1 listing mod
+    shift
+    if command -v lsinitramfs &> /dev/null && [ -f "/boot/initrd.img-${kernel}" ]; then
+        listing=$(lsinitramfs "/boot/initrd.img-${kernel}" 2>/dev/null) || return 0
+    elif command -v lsinitrd &> /dev/null; then
+        listing=$(lsinitrd -k "${kernel}" 2>/dev/null) || return 0
+    else
+        return 0
+    fi
+    for mod in "$@"; do
+        # File names may use "-" where /sys/module uses "_"
+        if grep -qE "/${mod//_/[-_]}\.ko(\.(xz|zst|gz))?\$" <<< "$listing"; then
+            return 0
+        fi
+    done
+    return 1
+}
+
+# Rebuild the initramfs of a single kernel rather than all installed ones
+# Usage: regenerate_initramfs <kernel>
+regenerate_initramfs() {
+    local kernel=$1
+    if command -v update-initramfs &> /dev/null; then
+        update-initramfs -u -k "${kernel}"
+    elif command -v dracut &> /dev/null; then
+        dracut -f --kver "${kernel}"
+    else
+        echo "WARNING: no update-initramfs or dracut, initramfs for ${kernel} not regenerated"
+        return 1
+    fi
+}
+
+# Flatten a TOML file (or stdin with "-") into "table.key = value" lines so a config
+# fragment can be matched against `containerd config dump` whatever the layout.
+# Handles comments, dotted keys and arrays split over several lines; whitespace
+# outside strings is dropped from array and inline table values.
+# Usage: toml_flatten /etc/containerd/conf.d/x.toml
+toml_flatten() {
+    awk '
+    # Drop a trailing comment and whitespace outside quoted strings
+    # (keep_space=0 also drops whitespace between array elements)
+    function clean(s, keep_space,    out, i, c, q) {
+        out = ""; q = ""
+        for (i = 1; i <= length(s); i++) {
+            c = substr(s, i, 1)
+            if (q != "") {
+                out = out c
+                if (c == "\\" && q == "\"") { i++; out = out substr(s, i, 1) }
+                else if (c == q) q = ""
+            } else if (c == "\"" || c == "\047") {
+                q = c; out = out c
+            } else if (c == "#") {
+                break
+            } else if (c ~ /[ \t]/ && !keep_space) {
+                continue
+            } else {
+                out = out c
+            }
+        }
+        sub(/^[ \t]+/, "", out); sub(/[ \t]+$/, "", out)
+        # A trailing comma before "]" is allowed in arrays
+        if (!keep_space) gsub(/,\]/, "]", out)
+        return out
+    }
+    function balance(s,    n, i, c, q) {
+        n = 0; q = ""
+        for (i = 1; i <= length(s); i++) {
+            c = substr(s, i, 1)
+            if (q != "") { if (c == q) q = "" }
+            else if (c == "\"" || c == "\047") q = c
+            else if (c == "[" || c == "{") n++
+            else if (c == "]" || c == "}") n--
+        }
+        return n
+    }
+    {
+        line = clean($0, 1)
+        if (pending != "") {
+            pending = pending line
+            if (balance(pending) > 0) next
+            print prefix " = " clean(pending, 0)
+            pending = ""
+            next
+        }
+        if (line == "") next
+        if (line ~ /^\[/) {
+            table = clean(line, 0)
+            gsub(/^\[+|\]+$/, "", table)
+            next
+        }
+        eq = index(line, "=")
+        if (eq == 0) next
+        key = clean(substr(line, 1, eq - 1), 0)
+        value = clean(substr(line, eq + 1), 1)
+        prefix = (table == "" ? key : table "." key)
+        if (value ~ /^[\[{]/) {
+            if (balance(value) > 0) { pending = value; next }
+            value = clean(value, 0)
+        }
+        print prefix " = " value
+    }' "$1"
+}
+
+# Read a flattened TOML file (or stdin with "-") into an associative array of
+# table.key -> value. The top-level "version" is skipped: containerd migrates
+# configs to its own schema version.
+# Usage: declare -A kv; declare -a keys; read_toml_file file kv keys
+read_toml_file() {
+    local file=$1
+    local -n _tm_map=$2
+    local _tm_order_name=${3:-}
+    local line key
+    while IFS= read -r line; do
+        key=${line%% = *}
+        [ "$key" != "version" ] || continue
+        if [ -n "$_tm_order_name" ] && [ -z "${_tm_map[$key]+set}" ]; then
+            local -n _tm_order=$_tm_order_name
+            _tm_order+=("$key")
+        fi
+        _tm_map[$key]=${line#* = }
+    done < <(toml_flatten "$file")
+}
+
+# Check whether containerd's main config imports a drop-in, directly or through a glob
+# Usage: containerd_imports /etc/containerd/config.toml /etc/containerd/conf.d/x.toml
+containerd_imports() {
+    local config=$1 dropin=$2
+    local line entry
+    local -a entries=()
+    [ -f "$config" ] || return 1
+    line=$(grep -m1 -E '^[[:space:]]*imports[[:space:]]*=' "$config") || return 1
+    line=${line#*[}
+    line=${line%]*}
+    IFS=',' read -r -a entries <<< "$line"
+    for entry in "${entries[@]}"; do
+        trim "$entry"
+        entry=${REPLY//\"/}
+        # shellcheck disable=SC2053 # entries can be globs
+        [[ "$dropin" == $entry ]] && return 0
+    done
+    return 1
+}
+
+# Make containerd's main config import a drop-in, adding it to the top-level
+# imports array (or creating one) when no entry already covers it
+# Returns 0 if the config was changed, 1 if it already imported the drop-in
+# Usage: containerd_add_import /etc/containerd/config.toml /etc/containerd/conf.d/x.toml [version]
+containerd_add_import() {
+    local config=$1 dropin=$2 version=${3:-2}
+    containerd_imports "$config" "$dropin" && return 1
+    if [ ! -f "$config" ]; then
+        mkdir -p "$(dirname "$config")"
+        printf 'version = %s\nimports = ["%s"]\n' "$version" "$dropin" > "$config"
+    elif grep -q -E '^[[:space:]]*imports[[:space:]]*=' "$config"; then
+        sed -i -E "0,/^[[:space:]]*imports[[:space:]]*=[[:space:]]*\[/s||&\"${dropin//\//\\/}\", |" "$config"
+    else
+        # imports is a top-level key so it has to come before the first table
+        sed -i "1i imports = [\"${dropin}\"]" "$config"
+    fi
+    return 0
+}
+
+# Undo containerd_add_import: drop the drop-in from the imports array, and the
+# imports line itself if nothing else is left. containerd fails to start when an
+# imported file is missing.
+# Usage: containerd_remove_import /etc/containerd/config.toml /etc/containerd/conf.d/x.toml
+containerd_remove_import() {
+    local config=$1 dropin=${2//\//\\/}
+    [ -f "$config" ] || return 0
+    sed -i -E \
+        -e "/^[[:space:]]*imports[[:space:]]*=[[:space:]]*\[[[:space:]]*\"${dropin}\"[[:space:]]*,?[[:space:]]*\][[:space:]]*\$/d" \
+        -e "/^[[:space:]]*imports[[:space:]]*=/s/\"${dropin}\"[[:space:]]*,[[:space:]]*//" \
+        -e "/^[[:space:]]*imports[[:space:]]*=/s/,[[:space:]]*\"${dropin}\"//" \
+        "$config"
+}
+
+# Flatten a YAML file (or stdin with "-") into "parent.key = value" lines for the
+# subset kubelet configs use: nested maps by indentation and scalar values with
+# quotes removed. A list is kept whole as one value, its items joined with ";".
+# Usage: yaml_flatten /var/lib/kubelet/config.yaml
+yaml_flatten() {
+    awk '
+    function strip(s,    out, i, c, q) {
+        out = ""; q = ""
+        for (i = 1; i <= length(s); i++) {
+            c = substr(s, i, 1)
+            if (q != "") { if (c == q) q = "" }
+            else if (c == "\"" || c == "\047") q = c
+            else if (c == "#" && (i == 1 || substr(s, i - 1, 1) ~ /[ \t]/)) break
+            out = out c
+        }
+        sub(/[ \t]+$/, "", out)
+        return out
+    }
+    function unquote(s) {
+        sub(/^[ \t]+/, "", s); sub(/[ \t]+$/, "", s)
+        if (s ~ /^".*"$/ || s ~ /^\047.*\047$/) s = substr(s, 2, length(s) - 2)
+        return s
+    }
+    function flush() {
+        if (listkey != "" && listval != "") print listkey " = " listval
+        listkey = ""; listval = ""
+    }
+    {
+        line = strip($0)
+        if (line ~ /^[ \t]*$/ || line ~ /^(---|\.\.\.)/) next
+        match(line, /^ */)
+        indent = RLENGTH
+        text = substr(line, indent + 1)
+        if (listkey != "" && (text ~ /^-( |$)/ && indent >= listindent || listval != "" && indent > listindent)) {
+            gsub(/[ \t]+/, " ", text)
+            listval = listval (listval == "" ? "" : ";") text
+            next
+        }
+        flush()
+        while (n > 0 && ind[n] >= indent) n--
+        colon = index(text, ":")
+        if (colon == 0) next
+        key = unquote(substr(text, 1, colon - 1))
+        value = unquote(substr(text, colon + 1))
+        path = (n > 0 ? pth[n] "." : "") key
+        if (value == "") {
+            # A map or a list follows, which one is decided by the next line
+            n++; ind[n] = indent; pth[n] = path
+            listkey = path; listindent = indent
+            next
+        }
+        print path " = " value
+    }
+    END { flush() }' "$1"
+}
+
+# Read a flattened YAML file into an associative array of path -> value
+# Usage: declare -A kv; declare -a keys; read_yaml_file file kv keys
+read_yaml_file() {
+    local file=$1
+    local -n _ym_map=$2
+    local _ym_order_name=${3:-}
+    local line key
+    while IFS= read -r line; do
+        key=${line%% = *}
+        if [ -n "$_ym_order_name" ] && [ -z "${_ym_map[$key]+set}" ]; then
+            local -n _ym_order=$_ym_order_name
+            _ym_order+=("$key")
+        fi
+        _ym_map[$key]=${line#* = }
+    done < <(yaml_flatten "$file")
+}
+
+# Replace the top level "key: ..." line of a YAML file with line, taken as is
+# (awk reads it from the environment, so "&", "\" and "|" aren't special)
+# Usage: yaml_replace_line file key line
+yaml_replace_line() {
+    local file=$1 tmp
+    tmp=$(mktemp)
+    YAML_KEY=$2 YAML_LINE=$3 awk '
+        index($0, ENVIRON["YAML_KEY"] ":") == 1 { print ENVIRON["YAML_LINE"]; next }
+        { print }
+    ' "$file" > "$tmp"
+    cat "$tmp" > "$file"
+    rm -f "$tmp"
+}
+
+# Read a flag of the running kubelet from its command line (--flag=value or --flag value)
+# Returns 1 if kubelet isn't running or doesn't have the flag
+# Usage: kubelet_flag config && echo "$REPLY"
+kubelet_flag() {
+    local flag="--$1" pid arg take=false
+    local -a args=()
+    REPLY=""
+    pid=$(systemctl show -p MainPID --value kubelet 2>/dev/null || echo 0)
+    [ "${pid:-0}" -gt 0 ] && [ -r "${PROC_ROOT}/${pid}/cmdline" ] || return 1
+    mapfile -d '' -t args < "${PROC_ROOT}/${pid}/cmdline"
+    for arg in "${args[@]}"; do
+        if [ "$take" = "true" ]; then
+            REPLY=$arg
+            return 0
+        fi
+        case "$arg" in
+            "${flag}="*) REPLY=${arg#*=}; return 0 ;;
+            "${flag}") take=true ;;
+        esac
+    done
+    return 1
+}
+
+# Work out where kubelet reads its configuration from
+# Sets KUBELET_CONFIG (main config file) and KUBELET_CONFIG_DIR (drop-in directory,
+# empty if kubelet isn't started with --config-dir). Both can be set in the environment.
+# Usage: kubelet_config_paths
+kubelet_config_paths() {
+    if [ -z "${KUBELET_CONFIG:-}" ]; then
+        KUBELET_CONFIG=/var/lib/kubelet/config.yaml
+        if kubelet_flag config; then
+            KUBELET_CONFIG=$REPLY
+        fi
+    fi
+    if [ -z "${KUBELET_CONFIG_DIR+set}" ]; then
+        KUBELET_CONFIG_DIR=""
+        if kubelet_flag config-dir; then
+            KUBELET_CONFIG_DIR=$REPLY
+        fi
+    fi
+}
+
+# The configuration kubelet ends up with: the main config overlaid by the *.conf
+# drop-ins of KUBELET_CONFIG_DIR in lexical order, as path -> value
+# Usage: kubelet_config_paths; declare -A kv; read_kubelet_effective kv
+read_kubelet_effective() {
+    local -n _ke_map=$1
+    local f
+    [ ! -f "$KUBELET_CONFIG" ] || read_yaml_file "$KUBELET_CONFIG" "$1"
+    if [ -n "$KUBELET_CONFIG_DIR" ] && [ -d "$KUBELET_CONFIG_DIR" ]; then
+        for f in "$KUBELET_CONFIG_DIR"/*.conf; do
+            [ -f "$f" ] && read_yaml_file "$f" "$1"
+        done
+    fi
+    return 0
+}
+
+# Resource names used by systemd Limit* settings mapped to the rows of /proc/<pid>/limits
+declare -A LIMIT_ROWS=(
+    [CPU]="Max cpu time"
+    [FSIZE]="Max file size"
+    [DATA]="Max data size"
+    [STACK]="Max stack size"
+    [CORE]="Max core file size"
+    [RSS]="Max resident set"
+    [NPROC]="Max processes"
+    [NOFILE]="Max open files"
+    [AS]="Max address space"
+    [LOCKS]="Max file locks"
+    [MEMLOCK]="Max locked memory"
+    [SIGPENDING]="Max pending signals"
+    [MSGQUEUE]="Max msgqueue size"
+    [NICE]="Max nice priority"
+    [RTPRIO]="Max realtime priority"
+    [RTTIME]="Max realtime timeout"
+)
+
+# Read the soft limits of a process (default: this shell) from /proc/<pid>/limits
+# into an associative array keyed by systemd resource name (NOFILE, STACK, ...).
+# Values are in the kernel's units (bytes for sizes), matching how systemd Limit*
+# values are written, except that "unlimited" is reported as systemd's "infinity".
+# Usage: declare -A limits; read_limits limits [pid]
+read_limits() {
+    local -n _limits=$1
+    local pid=${2:-self}
+    local line name label soft
+    local -a fields
+    [ -r "${PROC_ROOT}/${pid}/limits" ] || return 1
+    while IFS= read -r line; do
+        for name in "${!LIMIT_ROWS[@]}"; do
+            label=${LIMIT_ROWS[$name]}
+            if [[ "$line" == "$label "* ]]; then
+                read -r -a fields <<< "${line#"$label"}"
+                soft=${fields[0]}
+                [ "$soft" = "unlimited" ] && soft=infinity
+                _limits[$name]=$soft
+                break
+            fi
+        done
+    done < "${PROC_ROOT}/${pid}/limits"
+}
+
+# Time a process started, in seconds since the epoch: starttime (field 22 of
+# /proc/<pid>/stat, in clock ticks since boot) plus the boot time from /proc/stat.
+# The mtime of /proc/<pid> is when the directory was first looked at, not the start.
+# Usage: process_start_time pid && echo "$REPLY"
+process_start_time() {
+    local pid=$1 stat btime="" hz line
+    local -a fields
+    REPLY=""
+    [ -r "${PROC_ROOT}/${pid}/stat" ] || return 1
+    IFS= read -r stat < "${PROC_ROOT}/${pid}/stat" || return 1
+    # comm (field 2) can hold spaces and parentheses, so split after its closing one
+    read -r -a fields <<< "${stat##*) }"
+    while IFS= read -r line; do
+        [[ "$line" == "btime "* ]] && btime=${line#btime } && break
+    done < "${PROC_ROOT}/stat"
+    hz=$(getconf CLK_TCK 2>/dev/null || echo 100)
+    [[ "${fields[19]:-}" =~ ^[0-9]+$ ]] && [[ "$btime" =~ ^[0-9]+$ ]] || return 1
+    REPLY=$((btime + fields[19] / hz))
+}
+
+# Read the kernel command line into an array of arguments
+# Usage: declare -a cmdline; read_cmdline cmdline
+read_cmdline() {
+    local -n _cmdline=$1
+    local line=""
+    IFS= read -r line < "${PROC_ROOT}/cmdline" || true
+    read -r -a _cmdline <<< "$line"
+}
+
+# Check that a kernel argument is on the command line after the previously matched one
+# Arguments have to be checked in order because some only make sense in sequence
+# (hugepagesz=/hugepages= pairs). Uses the cmdline array filled by read_cmdline and
+# advances cmdline_position on a match.
+# Usage: read_cmdline cmdline; cmdline_position=0; cmdline_has_arg hugepages=2
+cmdline_position=0
+cmdline_has_arg() {
+    local arg=$1 i
+    for ((i = cmdline_position; i < ${#cmdline[@]}; i++)); do
+        if [ "${cmdline[$i]}" == "$arg" ]; then
+            cmdline_position=$((i + 1))
+            return 0
+        fi
+    done
+    return 1
+}
+
+# Escape $1 for use inside a JSON string
+# Usage: json_escape "$value"; echo "\"$REPLY\""
+json_escape() {
+    local s=$1
+    s=${s//\\/\\\\}
+    s=${s//\"/\\\"}
+    s=${s//$'\t'/\\t}
+    s=${s//$'\n'/\\n}
+    REPLY=$s
+}
+
+# Structured check report shared by the check scripts
+# report_result appends a row, report_summary prints the failures and returns 1 if any
+check_total=0
+check_failed=0
+failures=""
+
+# Usage: report_header "Checking sysctl settings"
+report_header() {
+    echo "-------------------------"
+    echo "$1"
+    echo "-------------------------"
+    printf "%-7s %-8s %-40s %-24s %s\n" "RESULT" "TYPE" "KEY" "EXPECTED" "ACTUAL"
+}
+
+# Anything other than PASS or SKIP (FAIL, MISSING, CHANGED, EXTRA, ...) counts as a failure
+# Usage: report_result <status> <type> <key> <expected> <actual>
+report_result() {
+    local status=$1 type=$2 key=$3 expected=$4 actual=$5
+    printf "%-7s %-8s %-40s %-24s %s\n" "$status" "$type" "$key" "$expected" "$actual"
+    case "$status" in
+        SKIP) return 0 ;;
+        PASS) check_total=$((check_total + 1)) ;;
+        *)
+            check_total=$((check_total + 1))
+            check_failed=$((check_failed + 1))
+            failures+=$'\n'"${type} ${key}: ${expected} != ${actual}"
+            ;;
+    esac
+}
+
+# Usage: report_summary || exit 1
+report_summary() {
+    echo "-------------------------"
+    echo "${check_total} checks, ${check_failed} failed"
+    if [ -n "$failures" ]; then
+        echo "${failures}"
+        return 1
+    fi
+    return 0
+}